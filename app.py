@@ -1,22 +1,51 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file, make_response
-from models import db, DailySession, Task, Pause, FocusSession, FocusPause, Tag, SuperTag, UserProfile
+from flask import Flask, render_template, request, jsonify, redirect, url_for, send_file, make_response, stream_with_context, g
+from models import db, task_tags, DailySession, Task, Pause, FocusSession, FocusPause, Tag, SuperTag, UserProfile, DailyRollup, DailyTagRollup, AppliedOperation
 from datetime import datetime, timedelta, date
 from fpdf import FPDF
 from fpdf.enums import XPos, YPos
 import textwrap
+import json
+import calendar
 import io
 import os
-from sqlalchemy import text
-from translations import TRANSLATIONS
+import time
+from sqlalchemy import text, or_, and_, case, delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+import i18n
+from rollups import rebuild_rollups, range_fingerprint, mark_sessions_dirty, apply_pending, bump_revisions
+from changes import (current_version, changes_since, collapse, table_versions, wait_for_changes,
+                     record_changes, bump_tables, write_pending)
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import is_resource_modified
+import wire
+from jobs import JobQueue
+import registry
+from report_cache import ReportCache
+from sqlite_profile import PRAGMAS_PROFILES, install_pragmas, check_query_plans
+import migrations
+import snapshots
+import perf
+import monitoring
+import assets
+import pwa
+import summaries
+from intervals import Intervals
 
 app = Flask(__name__)
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///database.db'
+# DATABASE_URL points the app at another database (benchmarks, tests); relative SQLite paths live in instance/
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///database.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# SQLite pragmas applied to every connection: a PRAGMAS_PROFILES name, plus per-pragma overrides
+app.config['SQLITE_PROFILE'] = os.environ.get('SQLITE_PROFILE', 'performance')
+app.config['SQLITE_PRAGMAS'] = {}
+# Server-Timing headers and /debug/perf (see perf.py)
+app.config['PERF_PROFILING'] = os.environ.get('PERF_PROFILING') == '1'
+# Prometheus scrape endpoint at /metrics (see monitoring.py); unauthenticated, so opt-in
+app.config['PROMETHEUS_METRICS'] = os.environ.get('PROMETHEUS_METRICS') == '1'
 
 db.init_app(app)
 
-SNAPSHOTS = {}
-
 def hex_to_rgb(hex_str):
     hex_str = hex_str.lstrip('#')
     return tuple(int(hex_str[i:i+2], 16) for i in (0, 2, 4))
@@ -28,52 +57,199 @@ def pdf_safe(text):
     # Transliterate or remove characters that cannot be represented in Latin-1
     return text.encode('latin-1', 'ignore').decode('latin-1')
 
-def ensure_status_column():
-    try:
-        columns = [row[1] for row in db.session.execute(text("PRAGMA table_info(daily_session)")).all()]
-        if 'status' not in columns:
-            db.session.execute(text(
-                "ALTER TABLE daily_session ADD COLUMN status VARCHAR(20) NOT NULL DEFAULT 'work'"
-            ))
-            db.session.commit()
-    except Exception:
-        db.session.rollback()
-        raise
-
 with app.app_context():
-    db.create_all()
-    ensure_status_column()
+    install_pragmas(db.engine, {**PRAGMAS_PROFILES[app.config['SQLITE_PROFILE']], **app.config['SQLITE_PRAGMAS']})
+    # The only schema work done at startup: one version lookup
+    schema_version = migrations.applied_version()
+    if schema_version < migrations.latest_version():
+        if __name__ == '__main__':
+            # Local launch (python app.py / Launch_App.bat): bring the database up to date
+            migrations.upgrade()
+        else:
+            app.logger.warning("Database schema is at version %s, the code expects %s: run `flask --app app migrate`",
+                               schema_version, migrations.latest_version())
+
+            @app.before_request
+            def require_migrated_schema():
+                # Re-checked until someone runs the migration, then free again
+                global schema_version
+                if schema_version < migrations.latest_version():
+                    schema_version = migrations.applied_version()
+                if schema_version < migrations.latest_version():
+                    return jsonify({'error': 'Database schema is out of date, run `flask --app app migrate`'}), 503
+
+if app.config['PERF_PROFILING']:
+    perf.init_app(app, db)
+if app.config['PROMETHEUS_METRICS']:
+    monitoring.init_app(app, db)
+assets.init_app(app)
+pwa.init_app(app)
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations (run once per deploy)."""
+    applied = migrations.upgrade()
+    for name in applied:
+        print(f"Applied {name}")
+    print(f"Schema at version {migrations.applied_version()}.")
+
+@app.cli.command('check-query-plans')
+def check_query_plans_command():
+    """Show the query plan of each hot query; exits non-zero if one scans a whole table."""
+    missing = 0
+    for label, plan, uses_index in check_query_plans():
+        print(f"{'ok  ' if uses_index else 'SCAN'} {label}: {plan}")
+        missing += not uses_index
+    if missing:
+        raise SystemExit(1)
+
+@app.cli.command('rebuild-rollups')
+def rebuild_rollups_command():
+    """Recompute the daily rollup tables from the raw session data."""
+    count = rebuild_rollups()
+    print(f"Rebuilt rollups for {count} sessions.")
+
+def commit():
+    """Commit the request's changes; inside /api/batch only flush, the batch commits once at the end."""
+    if g.get('in_batch'):
+        db.session.flush()
+    else:
+        db.session.commit()
+
+# Tables each cached read depends on
+METRICS_TABLES = ('daily_session', 'task', 'tag', 'pause', 'focus_session', 'focus_pause')
+INDEX_TABLES = METRICS_TABLES + ('user_profile',)
+
+def conditional_response(tables, build, *extra):
+    """Answer 304 if none of `tables` changed since the client's copy, else call build().
+
+    The ETag is made of the tables' change counters plus any `extra` inputs
+    the response depends on (e.g. the language).
+    """
+    versions, last_modified = table_versions(tables)
+    etag = '-'.join(str(part) for part in (*versions, *extra))
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = app.response_class(status=304)
+    else:
+        response = make_response(build())
+    response.set_etag(etag)
+    if last_modified:
+        response.last_modified = last_modified
+    # Cache, but always revalidate
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
 
 def get_locale():
     return request.cookies.get('lang', 'en')
 
 @app.context_processor
 def inject_translations():
-    lang = get_locale()
-    if lang not in TRANSLATIONS:
-        lang = 'en'
-    return dict(lang=lang, t=TRANSLATIONS[lang], all_translations=TRANSLATIONS)
+    # Only the active locale; pages load its catalog for scripts from i18n_bundle
+    lang = i18n.resolve_locale(get_locale())
+    return dict(lang=lang, t=i18n.catalog(lang),
+                i18n_bundle=url_for('i18n_bundle', filename=i18n.bundle_filename(lang)))
+
+@app.route('/i18n/<filename>')
+def i18n_bundle(filename):
+    lang, _, digest = filename.removesuffix('.js').partition('.')
+    if lang not in i18n.BUNDLES:
+        return jsonify({'error': 'Unknown locale'}), 404
+    current_digest, body = i18n.BUNDLES[lang]
+    if digest != current_digest:
+        # Stale page from before a deploy: point it at the current bundle
+        return redirect(url_for('i18n_bundle', filename=i18n.bundle_filename(lang)))
+    response = make_response(body)
+    response.mimetype = 'application/javascript'
+    # The URL changes with the content
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
 
 @app.route('/set_language/<lang>')
 def set_language(lang):
-    if lang not in TRANSLATIONS:
-        lang = 'en'
+    lang = i18n.resolve_locale(lang)
     response = redirect(request.referrer or url_for('index'))
     response.set_cookie('lang', lang, max_age=31536000) # 1 year
     return response
 
+HISTORY_PAGE_SIZE = 50
+
+def history_page(args):
+    """One page of the session history table, newest first.
+
+    Supports ?before=<YYYY-MM-DD>:<id> (cursor from the previous page), ?q=
+    (goal or task text) and ?start=/?end= dates. Returns (sessions, next_cursor),
+    next_cursor being None on the last page. Raises ValueError on bad input.
+    """
+    query = DailySession.query.options(
+        selectinload(DailySession.pauses),
+        selectinload(DailySession.tasks),
+    )
+    before = args.get('before')
+    if before:
+        before_date, before_id = before.split(':')
+        before_date = parse_date_arg(before_date)
+        before_id = int(before_id)
+        # (date, id) is unique, so the cursor never skips or repeats rows
+        query = query.filter(or_(
+            DailySession.date < before_date,
+            and_(DailySession.date == before_date, DailySession.id < before_id)
+        ))
+    start_date = parse_date_arg(args.get('start'))
+    end_date = parse_date_arg(args.get('end'))
+    if start_date:
+        query = query.filter(DailySession.date >= start_date)
+    if end_date:
+        query = query.filter(DailySession.date <= end_date)
+    term = (args.get('q') or '').strip()
+    if term:
+        pattern = f"%{term}%"
+        query = query.filter(or_(
+            DailySession.goal.ilike(pattern),
+            DailySession.tasks.any(Task.description.ilike(pattern))
+        ))
+
+    limit = min(max(int(args.get('limit', HISTORY_PAGE_SIZE)), 1), 200)
+    sessions = query.order_by(DailySession.date.desc(), DailySession.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        last = sessions[-1]
+        next_cursor = f"{last.date.isoformat()}:{last.id}"
+    return sessions, next_cursor
+
 @app.route('/')
 def index():
-    sessions = DailySession.query.order_by(DailySession.date.desc()).all()
-    
-    # Get user birthday for timeline
-    user = UserProfile.query.first()
-    birthday_md = None
-    if user and user.birthday:
-        birthday_md = user.birthday.strftime('%m-%d')
-        
-    response = make_response(render_template('metrics.html', sessions=sessions, birthday_md=birthday_md))
-    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, max-age=0'
+    def render():
+        # Only the first page of the history; the rest is fetched while scrolling
+        sessions, next_cursor = history_page({})
+
+        # Get user birthday for timeline
+        user = UserProfile.query.first()
+        birthday_md = None
+        if user and user.birthday:
+            birthday_md = user.birthday.strftime('%m-%d')
+
+        return render_template('metrics.html', sessions=sessions, next_cursor=next_cursor,
+                               birthday_md=birthday_md)
+
+    # The build and the translations decide which assets and bundle the page links
+    response = conditional_response(INDEX_TABLES, render, get_locale(), assets.build_version(),
+                                    i18n.bundle_filename(get_locale()))
+    # The page is rendered in the language from the cookie
+    response.vary.add('Cookie')
+    return response
+
+@app.route('/api/sessions/history')
+def session_history():
+    """History table rows as an HTML fragment; the next page's cursor is in X-Next-Cursor."""
+    try:
+        sessions, next_cursor = history_page(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid history parameters'}), 400
+
+    response = make_response(render_template('session_rows.html', sessions=sessions,
+                                             first_page=not request.args.get('before')))
+    response.headers['X-Next-Cursor'] = next_cursor or ''
     return response
 
 
@@ -97,7 +273,7 @@ def profile():
     if not user:
         user = UserProfile(first_name="", last_name="")
         db.session.add(user)
-        db.session.commit()
+        commit()
     
     return render_template('profile.html', 
                            total_sessions=total_sessions, 
@@ -130,7 +306,7 @@ def update_profile():
     else:
         user.birthday = None
         
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/new')
@@ -156,7 +332,7 @@ def start_day():
     
     # If goal is empty, use the English Day Name (e.g. "Monday") as the goal
     if not goal or not goal.strip():
-        trans = TRANSLATIONS['en']
+        trans = i18n.catalog('en')
         goal = trans['full_days'][session_date.weekday()]
         
     # Check if session exists for this date
@@ -166,7 +342,7 @@ def start_day():
         # Update goal if new one provided? Or keep old? 
         # User intention "Start Day" implies setting input.
         existing_session.goal = goal
-        db.session.commit()
+        commit()
         return redirect(url_for('dashboard', session_id=existing_session.id))
     
     # If creating a past/future session, what should start_time be?
@@ -184,28 +360,24 @@ def start_day():
     
     session = DailySession(goal=goal, date=session_date, start_time=start_dt)
     db.session.add(session)
-    db.session.commit()
+    commit()
     return redirect(url_for('dashboard', session_id=session.id))
 
 @app.route('/dashboard/<int:session_id>')
 def dashboard(session_id):
+    # Read first: the page subscribes to /api/events from this version
+    data_version = current_version()
     session_obj = DailySession.query.get_or_404(session_id)
     
-    # Create a snapshot of the session state for rollback on every visit
-    SNAPSHOTS[session_id] = {
-        'goal': session_obj.goal,
-        'status': session_obj.status,
-        'start_time': session_obj.start_time.isoformat() if session_obj.start_time else None,
-        'end_time': session_obj.end_time.isoformat() if session_obj.end_time else None,
-        'tasks': [{'description': t.description, 'is_completed': t.is_completed, 'tags': [tag.name for tag in t.tags]} for t in session_obj.tasks],
-        'pauses': [{'start_time': p.start_time.isoformat() if p.start_time else None, 
-                    'end_time': p.end_time.isoformat() if p.end_time else None} for p in session_obj.pauses]
-    }
-        
-    return render_template('dashboard.html', session=session_obj)
+    response = make_response(render_template('dashboard.html', session=session_obj, data_version=data_version))
+    # New generation for "discard changes": the day is only copied at its first change
+    response.set_cookie(snapshots.cookie_name(session_id), snapshots.new_generation(),
+                        max_age=snapshots.TTL_SECONDS, httponly=True, samesite='Lax')
+    return response
 
 @app.route('/focus/task/<int:task_id>')
 def focus_task(task_id):
+    data_version = current_version()
     task = db.session.get(Task, task_id)
     if not task:
         return redirect(url_for('index'))
@@ -262,7 +434,8 @@ def focus_task(task_id):
             "active": fs.end_time is None,
             "active_pause": active_pause
         })
-    return render_template('focus.html', session=session, task=task, focus_rows=focus_rows, mode="task", active_focus=active_focus)
+    return render_template('focus.html', session=session, task=task, focus_rows=focus_rows, mode="task",
+                           active_focus=active_focus, data_version=data_version)
 
 
 
@@ -282,15 +455,12 @@ def add_task():
     
     tags_list = []
     if tag_name:
-        tag_obj = Tag.query.filter_by(name=tag_name).first()
-        if not tag_obj:
-            tag_obj = Tag(name=tag_name)
-            db.session.add(tag_obj)
+        tag_obj = registry.attach_tag(tag_name)
         task.tags.append(tag_obj)
         tags_list.append({'id': tag_obj.id, 'name': tag_obj.name, 'color': tag_obj.color})
         
     db.session.add(task)
-    db.session.commit()
+    commit()
     return jsonify({
         'id': task.id, 
         'description': task.description, 
@@ -300,6 +470,38 @@ def add_task():
         'order': task.order
     })
 
+def parse_task_ids(data):
+    """Distinct integer task ids from data['task_ids'], or None if missing or invalid."""
+    task_ids = (data or {}).get('task_ids')
+    if not isinstance(task_ids, list) or not task_ids:
+        return None
+    try:
+        return list(dict.fromkeys(int(task_id) for task_id in task_ids))
+    except (TypeError, ValueError):
+        return None
+
+def task_sessions(task_ids):
+    """(task id, session id) rows of the tasks that exist among task_ids."""
+    return db.session.execute(
+        select(Task.id, Task.session_id).where(Task.id.in_(task_ids))
+    ).all()
+
+def focus_days(task_ids):
+    """Session ids of the focus sessions spent on task_ids, whose tag rollups depend on the tasks."""
+    return set(db.session.execute(
+        select(FocusSession.session_id).where(FocusSession.task_id.in_(task_ids))
+    ).scalars())
+
+def apply_bulk_changes(rows, tables, op='upsert', dirty_sessions=()):
+    """Feed snapshots, rollups, change log and table versions for bulk statements the ORM doesn't see."""
+    session_ids = {session_id for _, session_id in rows} | set(dirty_sessions)
+    snapshots.before_change(db.session, session_ids)
+    mark_sessions_dirty(db.session, session_ids)
+    apply_pending(db.session)
+    record_changes(db.session, 'task', rows, op=op)
+    bump_tables(db.session, tables)
+    write_pending(db.session)
+
 @app.route('/api/task/reorder', methods=['POST'])
 def reorder_tasks():
     data = request.json
@@ -307,15 +509,128 @@ def reorder_tasks():
     
     if not order_data:
         return jsonify({'error': 'Missing data'}), 400
-        
-    for item in order_data:
-        task = db.session.get(Task, item['id'])
-        if task:
-            task.order = item['order']
-            
-    db.session.commit()
+    try:
+        new_order = {int(item['id']): int(item['order']) for item in order_data}
+    except (KeyError, TypeError, ValueError):
+        return jsonify({'error': 'Invalid data'}), 400
+
+    # One UPDATE ... SET order = CASE id WHEN ... END for the whole list
+    db.session.execute(
+        update(Task).where(Task.id.in_(new_order))
+        .values(order=case(new_order, value=Task.id))
+        .execution_options(synchronize_session=False)
+    )
+    # The order doesn't feed any rollup figure, but the task report lists tasks in it
+    rows = task_sessions(list(new_order))
+    session_ids = {session_id for _, session_id in rows}
+    snapshots.before_change(db.session, session_ids)
+    bump_revisions(db.session, session_ids)
+    record_changes(db.session, 'task', rows)
+    bump_tables(db.session, ['task'])
+    write_pending(db.session)
+    commit()
     return jsonify({'status': 'success'})
 
+@app.route('/api/tasks/complete', methods=['POST'])
+def bulk_complete_tasks():
+    data = request.json
+    task_ids = parse_task_ids(data)
+    if task_ids is None:
+        return jsonify({'error': 'Invalid data'}), 400
+    is_completed = bool(data.get('is_completed', True))
+
+    rows = task_sessions(task_ids)
+    db.session.execute(
+        update(Task).where(Task.id.in_(task_ids)).values(is_completed=is_completed)
+        .execution_options(synchronize_session=False)
+    )
+    apply_bulk_changes(rows, ['task'])
+    commit()
+    return jsonify({'status': 'success', 'updated': len(rows)})
+
+@app.route('/api/tasks/tag', methods=['POST'])
+def bulk_tag_tasks():
+    data = request.json
+    task_ids = parse_task_ids(data)
+    tag_name = (data or {}).get('tag_name')
+    if task_ids is None or not isinstance(tag_name, str) or not tag_name.strip():
+        return jsonify({'error': 'Invalid data'}), 400
+
+    tag_name = tag_name.strip()
+    tag_obj = registry.attach_tag(tag_name)
+    if tag_obj.id is None:
+        db.session.flush()
+
+    rows = task_sessions(task_ids)
+    tagged = set(db.session.execute(
+        select(task_tags.c.task_id).where(task_tags.c.tag_id == tag_obj.id, task_tags.c.task_id.in_(task_ids))
+    ).scalars())
+    rows = [row for row in rows if row.id not in tagged]
+    if rows:
+        db.session.execute(insert(task_tags), [{'task_id': task_id, 'tag_id': tag_obj.id} for task_id, _ in rows])
+        # Loaded Task.tags collections are stale now
+        db.session.expire_all()
+        apply_bulk_changes(rows, ['task'], dirty_sessions=focus_days([task_id for task_id, _ in rows]))
+    commit()
+    return jsonify({'status': 'success', 'updated': len(rows),
+                    'tag': {'id': tag_obj.id, 'name': tag_obj.name, 'color': tag_obj.color}})
+
+@app.route('/api/tasks/move', methods=['POST'])
+def bulk_move_tasks():
+    data = request.json
+    task_ids = parse_task_ids(data)
+    target = db.session.get(DailySession, (data or {}).get('session_id'))
+    if task_ids is None:
+        return jsonify({'error': 'Invalid data'}), 400
+    if not target:
+        return jsonify({'error': 'Session not found'}), 404
+
+    rows = [row for row in task_sessions(task_ids) if row.session_id != target.id]
+    if rows:
+        # Appended to the target day's list, keeping their relative order
+        last_order = db.session.scalar(
+            select(func.max(Task.order)).where(Task.session_id == target.id)
+        )
+        moved_ids = [row.id for row in rows]
+        current_order = dict(db.session.execute(
+            select(Task.id, Task.order).where(Task.id.in_(moved_ids))
+        ).all())
+        moved_ids.sort(key=lambda task_id: (current_order[task_id] or 0, task_id))
+        start = (last_order if last_order is not None else -1) + 1
+        db.session.execute(
+            update(Task).where(Task.id.in_(moved_ids))
+            .values(session_id=target.id,
+                    order=case({task_id: start + i for i, task_id in enumerate(moved_ids)}, value=Task.id))
+            .execution_options(synchronize_session=False)
+        )
+        db.session.expire_all()
+        # Entries carry the new day; the days they left are logged as changed sessions
+        record_changes(db.session, 'session', [(row.session_id, row.session_id) for row in rows])
+        apply_bulk_changes([(row.id, target.id) for row in rows], ['task'],
+                           dirty_sessions={row.session_id for row in rows})
+    commit()
+    return jsonify({'status': 'success', 'updated': len(rows)})
+
+@app.route('/api/tasks/delete', methods=['POST'])
+def bulk_delete_tasks():
+    data = request.json
+    task_ids = parse_task_ids(data)
+    if task_ids is None:
+        return jsonify({'error': 'Invalid data'}), 400
+
+    rows = task_sessions(task_ids)
+    existing_ids = [row.id for row in rows]
+    if existing_ids:
+        dirty_sessions = focus_days(existing_ids)
+        db.session.execute(delete(task_tags).where(task_tags.c.task_id.in_(existing_ids)))
+        db.session.execute(
+            delete(Task).where(Task.id.in_(existing_ids)).execution_options(synchronize_session=False)
+        )
+        db.session.expire_all()
+        apply_bulk_changes(rows, ['task'], op='delete', dirty_sessions=dirty_sessions)
+    commit()
+    return jsonify({'status': 'success', 'deleted': len(rows)})
+
 @app.route('/api/task/add_tag', methods=['POST'])
 def add_task_tag():
     data = request.json
@@ -327,15 +642,12 @@ def add_task_tag():
         return jsonify({'error': 'Invalid data'}), 400
         
     tag_name = tag_name.strip()
-    tag_obj = Tag.query.filter_by(name=tag_name).first()
-    if not tag_obj:
-        tag_obj = Tag(name=tag_name)
-        db.session.add(tag_obj)
+    tag_obj = registry.attach_tag(tag_name)
         
     if tag_obj not in task.tags:
         task.tags.append(tag_obj)
         
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success', 'tag': {'id': tag_obj.id, 'name': tag_obj.name, 'color': tag_obj.color}})
 
 @app.route('/api/task/remove_tag', methods=['POST'])
@@ -348,22 +660,27 @@ def remove_task_tag():
     if not task or not tag_name:
         return jsonify({'error': 'Invalid data'}), 400
         
-    tag_obj = Tag.query.filter_by(name=tag_name).first()
-    if tag_obj and tag_obj in task.tags:
+    tag_info = registry.tag_by_name(tag_name)
+    tag_obj = next((t for t in task.tags if tag_info and t.id == tag_info.id), None)
+    if tag_obj:
         task.tags.remove(tag_obj)
-        db.session.commit()
+        commit()
         
     return jsonify({'status': 'success'})
 
 @app.route('/api/tags', methods=['GET'])
 def get_tags():
-    tags = Tag.query.all()
-    return jsonify([{'id': t.id, 'name': t.name, 'color': t.color} for t in tags])
+    def build():
+        tags = registry.tags()
+        return jsonify([{'id': t.id, 'name': t.name, 'color': t.color} for t in tags])
+    return conditional_response(('tag',), build)
 
 @app.route('/api/supertags', methods=['GET'])
 def get_supertags():
-    supertags = SuperTag.query.all()
-    return jsonify([{'id': st.id, 'color': st.color, 'name': st.name} for st in supertags])
+    def build():
+        supertags = registry.supertags()
+        return jsonify([{'id': st.id, 'color': st.color, 'name': st.name} for st in supertags])
+    return conditional_response(('super_tag',), build)
 
 @app.route('/api/tag/delete', methods=['POST'])
 def delete_tag():
@@ -379,7 +696,7 @@ def delete_tag():
         return jsonify({'error': 'Tag is in use', 'in_use': True}), 400
         
     db.session.delete(tag)
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/tag/update_color', methods=['POST'])
@@ -393,7 +710,7 @@ def update_tag_color():
         return jsonify({'error': 'Invalid data'}), 400
         
     tag.color = color
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/tag/update_name', methods=['POST'])
@@ -407,7 +724,7 @@ def update_tag_name():
         return jsonify({'error': 'Invalid data'}), 400
         
     tag.name = name.strip()
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/supertag/update_name', methods=['POST'])
@@ -419,14 +736,14 @@ def update_supertag_name():
     if not color or not name:
         return jsonify({'error': 'Invalid data'}), 400
         
-    super_tag = SuperTag.query.filter_by(color=color).first()
+    super_tag = registry.attach_supertag(color)
     if not super_tag:
         super_tag = SuperTag(color=color, name=name.strip())
         db.session.add(super_tag)
     else:
         super_tag.name = name.strip()
         
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/task/toggle', methods=['POST'])
@@ -439,7 +756,7 @@ def toggle_task():
         return jsonify({'error': 'Task not found'}), 404
         
     task.is_completed = not task.is_completed
-    db.session.commit()
+    commit()
     return jsonify({'id': task.id, 'is_completed': task.is_completed})
 
 @app.route('/api/task/update', methods=['POST'])
@@ -458,17 +775,14 @@ def update_task():
     if tag_name:
         # Legacy support: if a tag is passed (from description parsing), ensure it's added
         tag_name = tag_name.strip()
-        tag_obj = Tag.query.filter_by(name=tag_name).first()
-        if not tag_obj:
-            tag_obj = Tag(name=tag_name)
-            db.session.add(tag_obj)
+        tag_obj = registry.attach_tag(tag_name)
         
         if tag_obj not in task.tags:
             task.tags.append(tag_obj)
     
     # Note: we don't automatically remove tags here to allow multiple tags
         
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/task/delete', methods=['POST'])
@@ -481,7 +795,7 @@ def delete_task():
         return jsonify({'error': 'Task not found'}), 404
     
     db.session.delete(task)
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/pause/add', methods=['POST'])
@@ -502,7 +816,7 @@ def add_pause():
         pause.end_time = datetime.fromisoformat(end_time_str.replace('Z', ''))
     
     db.session.add(pause)
-    db.session.commit()
+    commit()
     return jsonify({
         'id': pause.id,
         'start_time': pause.start_time.isoformat() if pause.start_time else None,
@@ -525,7 +839,7 @@ def update_pause():
     if end_time_str:
         pause.end_time = datetime.fromisoformat(end_time_str.replace('Z', ''))
     
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/pause/delete', methods=['POST'])
@@ -538,9 +852,21 @@ def delete_pause():
         return jsonify({'error': 'Pause not found'}), 404
     
     db.session.delete(pause)
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
+def event_time(data):
+    """When a timer action happened: the client's `at` (ISO 8601) for actions replayed
+    from the offline outbox, never later than now. Defaults to now."""
+    now = datetime.now()
+    try:
+        at = datetime.fromisoformat(data.get('at'))
+    except (TypeError, ValueError):
+        return now
+    if at.tzinfo:
+        at = at.astimezone().replace(tzinfo=None)
+    return min(at, now)
+
 @app.route('/api/focus/start', methods=['POST'])
 def start_focus():
     data = request.json
@@ -556,9 +882,10 @@ def start_focus():
     if active:
         return jsonify({'error': 'Focus session already active', 'focus_session_id': active.id}), 409
 
-    focus = FocusSession(session_id=session_id, task_id=task_id, pomodoro_mode=pomodoro_mode, note=note)
+    focus = FocusSession(session_id=session_id, task_id=task_id, pomodoro_mode=pomodoro_mode, note=note,
+                         start_time=event_time(data))
     db.session.add(focus)
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success', 'focus_session_id': focus.id})
 
 @app.route('/api/focus/stop', methods=['POST'])
@@ -570,12 +897,13 @@ def stop_focus():
     if not focus:
         return jsonify({'error': 'Focus session not found'}), 404
 
+    stopped_at = event_time(data)
     open_pause = FocusPause.query.filter_by(focus_session_id=focus.id, end_time=None).first()
     if open_pause:
-        open_pause.end_time = datetime.now()
+        open_pause.end_time = stopped_at
 
-    focus.end_time = datetime.now()
-    db.session.commit()
+    focus.end_time = stopped_at
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/focus/pause/start', methods=['POST'])
@@ -590,9 +918,9 @@ def start_focus_pause():
     if open_pause:
         return jsonify({'error': 'Pause already active', 'pause_id': open_pause.id}), 409
 
-    pause = FocusPause(focus_session_id=focus.id, start_time=datetime.now())
+    pause = FocusPause(focus_session_id=focus.id, start_time=event_time(data))
     db.session.add(pause)
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success', 'pause_id': pause.id})
 
 @app.route('/api/focus/pause/end', methods=['POST'])
@@ -607,8 +935,8 @@ def end_focus_pause():
     if not open_pause:
         return jsonify({'error': 'No active pause'}), 404
 
-    open_pause.end_time = datetime.now()
-    db.session.commit()
+    open_pause.end_time = event_time(data)
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/focus/pause_total', methods=['POST'])
@@ -633,7 +961,7 @@ def update_focus_pause_total():
         pause = FocusPause(focus_session_id=focus.id, start_time=base_time, end_time=base_time + timedelta(seconds=seconds))
         db.session.add(pause)
 
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/focus/update', methods=['POST'])
@@ -666,7 +994,7 @@ def update_focus_session():
     if pomodoro_mode is not None:
         focus.pomodoro_mode = pomodoro_mode if pomodoro_mode != 'off' else None
 
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/focus/pause/update', methods=['POST'])
@@ -687,7 +1015,7 @@ def update_focus_pause():
     pause.start_time = base_time
     pause.end_time = base_time + timedelta(seconds=seconds)
 
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/focus/pause/delete', methods=['POST'])
@@ -698,7 +1026,7 @@ def delete_focus_pause():
     if not pause:
         return jsonify({'error': 'Focus pause not found'}), 404
     db.session.delete(pause)
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/focus/delete', methods=['POST'])
@@ -709,7 +1037,7 @@ def delete_focus_session():
     if not focus:
         return jsonify({'error': 'Focus session not found'}), 404
     db.session.delete(focus)
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 
@@ -726,7 +1054,7 @@ def delete_session():
         return jsonify({'error': 'Session not found'}), 404
     
     db.session.delete(session)
-    db.session.commit()
+    commit()
     
     return jsonify({'status': 'success'})
 
@@ -752,7 +1080,7 @@ def update_session_times():
         else:
             session.end_time = None
         
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/session/update_goal', methods=['POST'])
@@ -766,7 +1094,7 @@ def update_session_goal():
         return jsonify({'error': 'Session not found'}), 404
         
     session.goal = new_goal
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/session/update_status', methods=['POST'])
@@ -795,7 +1123,7 @@ def update_session_status():
         else:
             session.end_time = session.start_time + timedelta(hours=8) # 8 hours
 
-    db.session.commit()
+    commit()
     return jsonify({'status': 'success'})
 
 @app.route('/api/session/update_ooo_hours', methods=['POST'])
@@ -812,7 +1140,7 @@ def update_session_ooo_hours():
         h, m = map(int, hours_str.split(':'))
         session.start_time = datetime.combine(session.date, datetime.min.time()).replace(hour=9)
         session.end_time = session.start_time + timedelta(hours=h, minutes=m)
-        db.session.commit()
+        commit()
         return jsonify({'status': 'success'})
     except (ValueError, AttributeError):
         return jsonify({'error': 'Invalid format'}), 400
@@ -822,33 +1150,15 @@ def rollback_session():
     data = request.json
     session_id = data.get('session_id')
     
-    # Simple rollback for now - could be more robust
-    if session_id in SNAPSHOTS:
-        snap = SNAPSHOTS[session_id]
-        session = db.session.get(DailySession, session_id)
-        if session:
-            session.goal = snap['goal']
-            session.status = snap['status']
-            if snap['start_time']:
-                session.start_time = datetime.fromisoformat(snap['start_time'])
-            else:
-                session.start_time = None
-            if snap['end_time']:
-                session.end_time = datetime.fromisoformat(snap['end_time'])
-            else:
-                session.end_time = None
-            db.session.commit()
-    
-    return jsonify({'status': 'success'})
-    
-    if not session_id or session_id not in SNAPSHOTS:
-        return jsonify({'error': 'No snapshot found for this session'}), 404
-        
-    snapshot = SNAPSHOTS[session_id]
-    session_obj = db.session.get(DailySession, session_id)
-    
+    session_obj = db.session.get(DailySession, session_id) if session_id else None
     if not session_obj:
         return jsonify({'error': 'Session not found'}), 404
+
+    generation = snapshots.request_generation(session_id)
+    snapshot = snapshots.load(db.session, session_id, generation) if generation else None
+    if not snapshot:
+        # Nothing changed since the dashboard was opened
+        return jsonify({'status': 'success', 'restored': False})
         
     # Restore main fields
     session_obj.goal = snapshot['goal']
@@ -856,112 +1166,451 @@ def rollback_session():
     session_obj.start_time = datetime.fromisoformat(snapshot['start_time']) if snapshot['start_time'] else None
     session_obj.end_time = datetime.fromisoformat(snapshot['end_time']) if snapshot['end_time'] else None
     
-    # Restore tasks
-    # Delete current tasks
-    for task in list(session_obj.tasks):
-        db.session.delete(task)
-    # Re-add from snapshot
+    # Restore tasks in place, so focus sessions keep pointing at them
+    current_tasks = {task.id: task for task in session_obj.tasks}
     for t_snap in snapshot['tasks']:
-        new_task = Task(session_id=session_id, description=t_snap['description'], is_completed=t_snap['is_completed'])
-        # Restore tags
-        if 'tags' in t_snap:
-            for tag_name in t_snap['tags']:
-                tag_obj = Tag.query.filter_by(name=tag_name).first()
-                if not tag_obj:
-                    tag_obj = Tag(name=tag_name)
-                    db.session.add(tag_obj)
-                new_task.tags.append(tag_obj)
-        db.session.add(new_task)
+        task = current_tasks.pop(t_snap['id'], None)
+        if task is None:
+            task = db.session.get(Task, t_snap['id'])
+            if task is not None:
+                # Moved to another day since: bring it back rather than copy it
+                snapshots.before_change(db.session, {task.session_id})
+                task.session_id = session_id
+            else:
+                # Deleted since: recreate it under its old id
+                task = Task(id=t_snap['id'], session_id=session_id)
+                db.session.add(task)
+        task.description = t_snap['description']
+        task.is_completed = t_snap['is_completed']
+        task.order = t_snap['order']
+        task.tags = [registry.attach_tag(tag_name) for tag_name in t_snap['tags']]
+    # Added since
+    for task in current_tasks.values():
+        db.session.delete(task)
         
     # Restore pauses
-    # Delete current pauses
-    for pause in list(session_obj.pauses):
-        db.session.delete(pause)
-    # Re-add from snapshot
+    current_pauses = {pause.id: pause for pause in session_obj.pauses}
     for p_snap in snapshot['pauses']:
-        new_pause = Pause(session_id=session_id)
-        if p_snap['start_time']:
-            new_pause.start_time = datetime.fromisoformat(p_snap['start_time'])
-        if p_snap['end_time']:
-            new_pause.end_time = datetime.fromisoformat(p_snap['end_time'])
-        db.session.add(new_pause)
-        
-    db.session.commit()
-    
-    # Optional: remove snapshot after rollback? 
-    # Usually better to keep it in case they click it again before navigating away, 
-    # but they are redirected to / anyway.
-    del SNAPSHOTS[session_id]
-    
-    return jsonify({'status': 'success'})
+        pause = current_pauses.pop(p_snap['id'], None)
+        if pause is None:
+            pause = Pause(session_id=session_id)
+            if not db.session.get(Pause, p_snap['id']):
+                pause.id = p_snap['id']
+            db.session.add(pause)
+        pause.start_time = datetime.fromisoformat(p_snap['start_time']) if p_snap['start_time'] else None
+        pause.end_time = datetime.fromisoformat(p_snap['end_time']) if p_snap['end_time'] else None
+    for pause in current_pauses.values():
+        db.session.delete(pause)
+
+    db.session.flush()
+    # Restored: the next discard of this visit has nothing to undo
+    snapshots.discard(db.session, session_id)
+    commit()
+    return jsonify({'status': 'success', 'restored': True})
+
+BATCH_MAX_OPERATIONS = 200
+# Not batchable: they manage their own transaction or aren't mutations of the day
+BATCH_EXCLUDED = ('/api/batch', '/api/reports')
+# Answers to operations sent with an id are kept this long, to answer replays
+OPERATION_ID_TTL_SECONDS = 7 * 24 * 3600
+
+def applied_operations(operations):
+    """{operation id: stored result} for the operations of a batch that were already applied."""
+    ids = [op.get('id') for op in operations if isinstance(op, dict) and isinstance(op.get('id'), str)]
+    if not ids:
+        return {}
+    rows = db.session.scalars(select(AppliedOperation).where(AppliedOperation.id.in_(ids)))
+    return {row.id: {'status': row.status, 'body': json.loads(row.body) if row.body else None} for row in rows}
+
+def record_applied_operations(entries):
+    """Remember the results of [(operation id, result)], in the batch's transaction."""
+    now = datetime.now()
+    db.session.execute(delete(AppliedOperation).where(
+        AppliedOperation.created_at < now - timedelta(seconds=OPERATION_ID_TTL_SECONDS)
+    ))
+    db.session.execute(insert(AppliedOperation), [
+        {'id': op_id, 'status': result['status'], 'body': json.dumps(result['body']), 'created_at': now}
+        for op_id, result in entries
+    ])
+
+@app.route('/api/batch', methods=['POST'])
+def batch():
+    """Apply an ordered list of API calls in one transaction with one commit.
+
+    Body: {"operations": [{"path": "/api/task/toggle", "body": {...}, "id": "..."}, ...]}.
+    Each operation runs the regular POST endpoint. All or nothing: the first
+    operation answering with an error status rolls everything back.
+    Returns {"status": "success", "results": [{"status", "body"}, ...]}.
+
+    The optional operation id makes retries safe: the offline outbox sends
+    an operation again when it never got the answer, and an operation that
+    was already applied is skipped, its first result returned again.
+    """
+    operations = (request.get_json(silent=True) or {}).get('operations')
+    if not isinstance(operations, list) or not operations:
+        return jsonify({'error': 'operations must be a non-empty list'}), 400
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        return jsonify({'error': f'At most {BATCH_MAX_OPERATIONS} operations per batch'}), 400
+
+    headers = {'Cookie': request.headers.get('Cookie', '')}
+    applied = applied_operations(operations)
+    results = []
+    to_record = []
+    g.in_batch = True
+    try:
+        for index, operation in enumerate(operations):
+            path = operation.get('path') if isinstance(operation, dict) else None
+            if not isinstance(path, str) or not path.startswith('/api/') or path.startswith(BATCH_EXCLUDED):
+                db.session.rollback()
+                return jsonify({'error': f'Operation {index} is not batchable', 'index': index, 'results': results}), 400
+            op_id = operation.get('id')
+            if op_id is not None and (not isinstance(op_id, str) or not 0 < len(op_id) <= 64):
+                db.session.rollback()
+                return jsonify({'error': f'Operation {index} id must be a string of at most 64 characters',
+                                'index': index, 'results': results}), 400
+            if op_id in applied:
+                results.append(applied[op_id])
+                continue
+
+            # Runs the endpoint in this app context, so it shares g and the database session
+            with app.test_request_context(path, method='POST', json=operation.get('body') or {}, headers=headers):
+                try:
+                    response = app.make_response(app.dispatch_request())
+                except Exception as exc:
+                    db.session.rollback()
+                    # Aborts keep their HTTP status; anything else (database errors have a .code too) is a 500
+                    status = exc.code if isinstance(exc, HTTPException) else 500
+                    return jsonify({'error': f'Operation {index} failed', 'index': index,
+                                    'results': results + [{'status': status, 'body': None}]}), 400
+
+            results.append({'status': response.status_code, 'body': response.get_json(silent=True)})
+            if response.status_code >= 400:
+                db.session.rollback()
+                return jsonify({'error': f'Operation {index} failed', 'index': index, 'results': results}), 400
+            if op_id:
+                to_record.append((op_id, results[-1]))
+
+        if to_record:
+            try:
+                record_applied_operations(to_record)
+            except IntegrityError:
+                # Applied meanwhile by another sender (a page and the service worker replaying
+                # together): undo this copy, a retry gets the stored results
+                db.session.rollback()
+                return jsonify({'error': 'Operations were applied concurrently, retry'}), 503
+        db.session.commit()
+    finally:
+        g.in_batch = False
+
+    return jsonify({'status': 'success', 'results': results})
+
+METRICS_VIEWS = ('day', 'week', 'month', 'year')
+
+def parse_date_arg(value):
+    """Parse an optional YYYY-MM-DD query parameter. Raises ValueError on bad input."""
+    if not value:
+        return None
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+def view_window(view, anchor):
+    """Return the (start, end) dates covered by a Day/Week/Month/Year view around anchor."""
+    if view == 'day':
+        return anchor, anchor
+    if view == 'week':
+        week_start = anchor - timedelta(days=anchor.weekday())
+        return week_start, week_start + timedelta(days=6)
+    if view == 'month':
+        last_day = calendar.monthrange(anchor.year, anchor.month)[1]
+        return anchor.replace(day=1), anchor.replace(day=last_day)
+    return date(anchor.year, 1, 1), date(anchor.year, 12, 31)
+
+def parse_metrics_window(args):
+    """Resolve start/end/view/anchor query parameters into an inclusive date range.
+
+    Either bound may be None (open range). Raises ValueError on invalid input.
+    """
+    start_date = parse_date_arg(args.get('start'))
+    end_date = parse_date_arg(args.get('end'))
+    view = args.get('view')
+    if view:
+        if view not in METRICS_VIEWS:
+            raise ValueError(f"Unknown view: {view}")
+        anchor = parse_date_arg(args.get('anchor')) or start_date or datetime.now().date()
+        return view_window(view, anchor)
+    if start_date and end_date and end_date < start_date:
+        start_date, end_date = end_date, start_date
+    return start_date, end_date
+
+def metrics_sessions_query(start_date=None, end_date=None):
+    """Sessions in range with every relationship the metrics payload needs eager-loaded.
+
+    Loads in a fixed number of queries regardless of how many sessions match.
+    Focus pauses are not loaded: focus durations come from focus_durations().
+    """
+    query = DailySession.query.options(
+        selectinload(DailySession.pauses),
+        selectinload(DailySession.tasks).selectinload(Task.tags),
+        selectinload(DailySession.focus_sessions).selectinload(FocusSession.task).selectinload(Task.tags),
+    )
+    if start_date:
+        query = query.filter(DailySession.date >= start_date)
+    if end_date:
+        query = query.filter(DailySession.date <= end_date)
+    return query.order_by(DailySession.date.asc())
+
+def focus_durations(start_date=None, end_date=None, session_ids=None):
+    """focus session id -> worked minutes, for the sessions of a metrics payload."""
+    return Intervals.load(start_date, end_date, session_ids).focus_by_id()
+
+def serialize_focus_session(fs, duration):
+    """duration: worked minutes, pauses during the focus session subtracted."""
+    task = fs.task
+
+    # Calculate start and end hours for visualization
+    fs_start = 0
+    fs_end = 0
+    if fs.start_time and fs.end_time:
+        fs_start = fs.start_time.hour + fs.start_time.minute / 60
+        fs_end = fs.end_time.hour + fs.end_time.minute / 60
+
+    return {
+        'id': fs.id,
+        'task_id': fs.task_id,
+        'session_id': fs.session_id,
+        'tags': [t.name for t in task.tags] if task and task.tags else [],
+        'task_name': task.description if task else "Focus Session",
+        'duration': duration,
+        'start_hour': fs_start,
+        'end_hour': fs_end
+    }
+
+def serialize_metrics_session(s, durations):
+    return {
+        'id': s.id,
+        'date': s.date.isoformat(),
+        'status': s.status,
+        'start_time': s.start_time.isoformat() if s.start_time else None,
+        'end_time': s.end_time.isoformat() if s.end_time else None,
+        'pauses': [{
+            'id': p.id,
+            'start_time': p.start_time.isoformat() if p.start_time else None,
+            'end_time': p.end_time.isoformat() if p.end_time else None
+        } for p in s.pauses],
+        'focus_sessions': [serialize_focus_session(fs, durations[fs.id]) for fs in s.focus_sessions],
+        'tasks': [{
+            'id': task.id,
+            'description': task.description,
+            'is_completed': task.is_completed,
+            'tags': [tag.name for tag in task.tags] if task.tags else []
+        } for task in s.tasks]
+    }
+
+def metrics_payload_format():
+    """'json', 'columnar' or 'msgpack', from ?format= or else the Accept header."""
+    fmt = request.args.get('format')
+    if fmt:
+        return fmt
+    # Plain JSON first so */* keeps the original format
+    mimetypes = ['application/json', wire.COLUMNAR_JSON]
+    if wire.msgpack:
+        mimetypes.append(wire.MSGPACK)
+    best = request.accept_mimetypes.best_match(mimetypes, default='application/json')
+    return {wire.COLUMNAR_JSON: 'columnar', wire.MSGPACK: 'msgpack'}.get(best, 'json')
 
 @app.route('/api/metrics/data')
 def metrics_data():
-    sessions = DailySession.query.order_by(DailySession.date.asc()).all()
-    data = []
-    for s in sessions:
-        pauses_data = []
-        for p in s.pauses:
-            pauses_data.append({
-                'id': p.id,
-                'start_time': p.start_time.isoformat() if p.start_time else None,
-                'end_time': p.end_time.isoformat() if p.end_time else None
-            })
-        
-        focus_data = []
-        for fs in FocusSession.query.filter_by(session_id=s.id).all():
-            task = db.session.get(Task, fs.task_id) if fs.task_id else None
-            # Use first tag for metric breakdown for now
-            tag = task.tags[0].name if task and task.tags else None
-            
-            # Calculate duration in minutes
-            duration = 0
-            if fs.start_time and fs.end_time:
-                duration = (fs.end_time - fs.start_time).total_seconds() / 60
-                # Subtract pauses during this focus session
-                pause_mins = sum_focus_pause_minutes(fs.pauses)
-                duration = max(duration - pause_mins, 0)
-                
-            # Calculate start and end hours for visualization
-            fs_start = 0
-            fs_end = 0
-            if fs.start_time and fs.end_time:
-                fs_start = fs.start_time.hour + fs.start_time.minute / 60
-                fs_end = fs.end_time.hour + fs.end_time.minute / 60
-                
-            focus_data.append({
-                'id': fs.id,
-                'task_id': fs.task_id,
-                'session_id': s.id,
-                'tags': [t.name for t in task.tags] if task and task.tags else [],
-                'task_name': task.description if task else "Focus Session",
-                'duration': duration,
-                'start_hour': fs_start,
-                'end_hour': fs_end
-            })
-            
-        # Add task data with tags
-        tasks_data = []
-        for task in s.tasks:
-            task_tags = [tag.name for tag in task.tags] if task.tags else []
-            tasks_data.append({
-                'id': task.id,
-                'description': task.description,
-                'is_completed': task.is_completed,
-                'tags': task_tags
-            })
-            
-        data.append({
-            'id': s.id,
-            'date': s.date.isoformat(),
-            'status': s.status,
-            'start_time': s.start_time.isoformat() if s.start_time else None,
-            'end_time': s.end_time.isoformat() if s.end_time else None,
-            'pauses': pauses_data,
-            'focus_sessions': focus_data,
-            'tasks': tasks_data
+    """Metrics payload, optionally limited to ?start=&end= or ?view=&anchor=.
+
+    ?format=columnar (or Accept: application/vnd.letempsestcompte.columnar+json)
+    returns the columnar encoding from wire.py; format=msgpack the same as
+    MessagePack, when the msgpack package is installed.
+    """
+    try:
+        start_date, end_date = parse_metrics_window(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+
+    fmt = metrics_payload_format()
+    if fmt not in ('json', 'columnar', 'msgpack'):
+        return jsonify({'error': f'Unknown format: {fmt}'}), 400
+    if fmt == 'msgpack' and not wire.msgpack:
+        return jsonify({'error': 'MessagePack support requires the msgpack package'}), 406
+
+    def build():
+        # Read before the data so a change racing this request is replayed, not missed
+        version = current_version()
+        sessions = metrics_sessions_query(start_date, end_date).all()
+        durations = focus_durations(start_date, end_date)
+        if fmt == 'json':
+            response = jsonify([serialize_metrics_session(s, durations) for s in sessions])
+        elif fmt == 'columnar':
+            response = jsonify(wire.encode_columnar(sessions, durations))
+            response.mimetype = wire.COLUMNAR_JSON
+        else:
+            payload = wire.encode_columnar(sessions, durations)
+            with perf.span('serialize'):
+                response = make_response(wire.pack(payload))
+            response.mimetype = wire.MSGPACK
+        response.headers['X-Data-Version'] = str(version)
+        return response
+
+    response = conditional_response(METRICS_TABLES, build, fmt)
+    response.vary.add('Accept')
+    return response
+
+@app.route('/api/metrics/changes')
+def metrics_changes():
+    """Sessions changed since ?since=<version>, as full metrics payload entries.
+
+    Returns {'version', 'sessions', 'deleted'}; 'reset': true means the client
+    is too far behind and should reload /api/metrics/data instead.
+    """
+    try:
+        since = int(request.args['since'])
+    except (KeyError, ValueError):
+        return jsonify({'error': 'Invalid since version'}), 400
+
+    version, entries = changes_since(since)
+    if entries is None:
+        response = jsonify({'version': version, 'reset': True, 'sessions': [], 'deleted': []})
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    session_ids = set()
+    task_ids = set()
+    tag_ids = set()
+    for entity, entity_id, session_id, op in entries:
+        if entity == 'tag':
+            tag_ids.add(entity_id)
+            continue
+        if session_id is not None:
+            session_ids.add(session_id)
+        if entity == 'task':
+            task_ids.add(entity_id)
+
+    # Task descriptions and tag names are also copied into focus sessions of other days
+    if tag_ids:
+        tagged = db.session.query(Task.id, Task.session_id).join(Task.tags).filter(Tag.id.in_(tag_ids))
+        for task_id, session_id in tagged:
+            task_ids.add(task_id)
+            session_ids.add(session_id)
+    if task_ids:
+        session_ids.update(sid for (sid,) in db.session.query(FocusSession.session_id)
+                           .filter(FocusSession.task_id.in_(task_ids)))
+
+    sessions = metrics_sessions_query().filter(DailySession.id.in_(session_ids)).all() if session_ids else []
+    deleted = session_ids - {s.id for s in sessions}
+    durations = focus_durations(session_ids=session_ids) if sessions else {}
+    response = jsonify({
+        'version': version,
+        'sessions': [serialize_metrics_session(s, durations) for s in sessions],
+        'deleted': sorted(deleted)
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# Seconds between two looks at the change log (and keep-alive comments)
+EVENTS_POLL_SECONDS = 5
+
+@app.route('/api/events')
+def events():
+    """Server-Sent Events stream of committed changes.
+
+    Each 'change' event carries {'version', 'changes': [{entity, id, session_id, op}]}
+    and uses the version as its event id, so a reconnecting EventSource resumes
+    from Last-Event-ID. A 'reset' event means the client missed too much and
+    should reload. Without ?since= the stream starts at the current version.
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        version = int(since) if since else current_version()
+    except ValueError:
+        return jsonify({'error': 'Invalid since version'}), 400
+
+    def stream():
+        nonlocal version
+        yield 'retry: 5000\n\n'
+        while True:
+            latest, entries = changes_since(version)
+            # Don't hold a connection (and SQLite read lock) while idle
+            db.session.remove()
+            if entries is None:
+                yield f"id: {latest}\nevent: reset\ndata: {json.dumps({'version': latest})}\n\n"
+            elif entries:
+                data = json.dumps({'version': latest, 'changes': collapse(entries)})
+                yield f"id: {latest}\nevent: change\ndata: {data}\n\n"
+            else:
+                yield ': keep-alive\n\n'
+            version = latest
+            wait_for_changes(EVENTS_POLL_SECONDS)
+
+    response = app.response_class(stream_with_context(stream()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/metrics/rollups')
+def metrics_rollups():
+    """Pre-aggregated per-day minutes and per-tag breakdown, same range parameters as /api/metrics/data."""
+    try:
+        start_date, end_date = parse_metrics_window(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+
+    query = DailyRollup.query
+    tag_query = db.session.query(DailyTagRollup, Tag.name).outerjoin(Tag, DailyTagRollup.tag_id == Tag.id)
+    if start_date:
+        query = query.filter(DailyRollup.date >= start_date)
+        tag_query = tag_query.filter(DailyTagRollup.date >= start_date)
+    if end_date:
+        query = query.filter(DailyRollup.date <= end_date)
+        tag_query = tag_query.filter(DailyTagRollup.date <= end_date)
+
+    tags_by_session = {}
+    for tag_rollup, tag_name in tag_query:
+        tags_by_session.setdefault(tag_rollup.session_id, []).append({
+            'tag': tag_name,  # None for untagged
+            'focus_minutes': tag_rollup.focus_minutes,
+            'task_total': tag_rollup.task_total,
+            'task_completed': tag_rollup.task_completed
         })
-    return jsonify(data)
+
+    return jsonify([{
+        'session_id': r.session_id,
+        'date': r.date.isoformat(),
+        'status': r.status,
+        'work_minutes': r.work_minutes,
+        'pause_minutes': r.pause_minutes,
+        'total_minutes': r.total_minutes,
+        'focus_minutes': r.focus_minutes,
+        'task_total': r.task_total,
+        'task_completed': r.task_completed,
+        'tags': tags_by_session.get(r.session_id, [])
+    } for r in query.order_by(DailyRollup.date.asc())])
+
+@app.route('/api/metrics/summary')
+def metrics_summary():
+    """Bars, totals, averages and tag breakdowns of one ?view=&anchor= window (see summaries.py).
+
+    ?tasks=1 adds each tag's task list, for the breakdown popups.
+    """
+    view = request.args.get('view')
+    if view not in METRICS_VIEWS:
+        return jsonify({'error': 'A view (day, week, month or year) is required'}), 400
+    try:
+        start_date, end_date = parse_metrics_window(request.args)
+    except ValueError:
+        return jsonify({'error': 'Invalid date range'}), 400
+    include_tasks = request.args.get('tasks') == '1'
+
+    now = datetime.now().replace(second=0, microsecond=0)
+    # A window containing today changes with the clock (running day, today's bar)
+    current = now.isoformat() if start_date <= now.date() <= end_date else now.date().isoformat()
+    return conditional_response(
+        METRICS_TABLES + ('super_tag',),
+        lambda: jsonify(summaries.build_summary(view, start_date, end_date, now, include_tasks)),
+        view, start_date, int(include_tasks), current
+    )
 
 def format_minutes(total_minutes):
     if total_minutes is None:
@@ -971,20 +1620,6 @@ def format_minutes(total_minutes):
     minutes = total_minutes % 60
     return f"{hours}:{minutes:02d}"
 
-def sum_pause_minutes(pauses):
-    total = 0
-    for pause in pauses:
-        if pause.start_time and pause.end_time:
-            total += int((pause.end_time - pause.start_time).total_seconds() / 60)
-    return total
-
-def sum_focus_pause_minutes(pauses):
-    total = 0
-    for pause in pauses:
-        if pause.start_time and pause.end_time:
-            total += int((pause.end_time - pause.start_time).total_seconds() / 60)
-    return total
-
 def format_seconds(total_seconds):
     if total_seconds is None:
         return "--:--:--"
@@ -1202,28 +1837,45 @@ def reports():
                            default_end=default_end.isoformat(),
                            reporter_name=reporter_name)
 
-@app.route('/reports/pdf', methods=['POST'])
-def reports_pdf():
-    report_type = request.form.get('report_type')
-    start_str = request.form.get('date_start')
-    end_str = request.form.get('date_end')
-    reporter_name = request.form.get('reporter_name', 'Felix Walger')
-
+def parse_report_form(form):
+    """Report parameters from the reports form, or None if the dates are missing or invalid."""
+    start_str = form.get('date_start')
+    end_str = form.get('date_end')
     if not start_str or not end_str:
-        return redirect(url_for('reports'))
+        return None
 
     try:
         start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
         end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
     except ValueError:
-        return redirect(url_for('reports'))
+        return None
 
     if end_date < start_date:
         start_date, end_date = end_date, start_date
 
-    sessions = DailySession.query.filter(
+    return {
+        'report_type': form.get('report_type'),
+        'start_date': start_date,
+        'end_date': end_date,
+        'reporter_name': form.get('reporter_name', 'Felix Walger'),
+        'lang': get_locale()
+    }
+
+def build_report_pdf(report_type, start_date, end_date, reporter_name, lang, progress=None):
+    """Render a task or time report. Returns (pdf_bytes, filename).
+
+    progress, if given, is called with the completed fraction (0 to 1).
+    """
+    if progress is None:
+        progress = lambda fraction: None
+
+    sessions = DailySession.query.options(
+        selectinload(DailySession.tasks),
+    ).filter(
         DailySession.date.between(start_date, end_date)
     ).order_by(DailySession.date.asc()).all()
+    # Collecting rows is most of the work before the render
+    session_count = max(len(sessions), 1)
 
     pdf = FPDF()
     pdf.set_auto_page_break(auto=True, margin=15)
@@ -1236,8 +1888,7 @@ def reports_pdf():
     pdf.cell(0, 8, reporter_name, new_x=XPos.LMARGIN, new_y=YPos.NEXT)
     pdf.ln(2)
 
-    lang = get_locale()
-    trans = TRANSLATIONS.get(lang, TRANSLATIONS['en'])
+    trans = i18n.catalog(lang)
 
     if report_type == "tasks":
         pdf.set_font("Helvetica", style="B", size=16)
@@ -1249,12 +1900,12 @@ def reports_pdf():
         pdf.set_text_color(0, 0, 0)
 
         # Prepare SuperTag Map
-        all_supertags = db.session.query(SuperTag).all()
-        st_map = {st.color: {"name": st.name, "color": st.color} for st in all_supertags}
+        st_map = {st.color: {"name": st.name, "color": st.color} for st in registry.supertags()}
         
         weeks = {}
 
-        for session in sessions:
+        for i, session in enumerate(sessions):
+            progress(0.7 * i / session_count)
             iso_year, iso_week, _ = session.date.isocalendar()
             week_key = (iso_year, iso_week)
             
@@ -1330,9 +1981,9 @@ def reports_pdf():
                 "supertags": st_list
             })
 
+        progress(0.7)
         add_task_report_table(pdf, report_rows, trans)
 
-        filename = f"tasks_{start_date.isoformat()}_{end_date.isoformat()}.pdf"
 
     else:
         pdf.set_font("Helvetica", style="B", size=16)
@@ -1345,22 +1996,17 @@ def reports_pdf():
         pdf.set_text_color(0, 0, 0)
 
         rows = []
-        weekly_totals = {}
+        # Minutes of every day and week of the range, computed at once from the intervals
+        intervals = Intervals.load(start_date, end_date)
+        figures = {f.id: f for f in intervals.sessions()}
+        weekly_totals = {monday.isocalendar()[:2]: totals for monday, totals in intervals.per_week().items()}
 
-        for session in sessions:
-            iso_year, iso_week, _ = session.date.isocalendar()
-            weekly_totals.setdefault((iso_year, iso_week), {"work": 0, "pause": 0, "total": 0})
+        for i, session in enumerate(sessions):
+            progress(0.7 * i / session_count)
+            work_minutes, pause_minutes, total_minutes = (figures[session.id].work, figures[session.id].pause,
+                                                          figures[session.id].total)
 
             if session.status != "work":
-                if not session.start_time or not session.end_time:
-                    work_minutes = 0
-                    total_minutes = 0
-                else:
-                    total_minutes = int((session.end_time - session.start_time).total_seconds() / 60)
-                    work_minutes = total_minutes
-                
-                pause_minutes = 0
-                
                 # Dynamic Note for PDF
                 if session.status == "sick":
                     note = trans.get('sick', 'Sick')
@@ -1372,21 +2018,10 @@ def reports_pdf():
                     note = trans.get('project', 'Project')
                 else:
                     note = trans.get('other', 'Other')
+            elif not session.start_time or not session.end_time:
+                note = trans['unfinished']
             else:
-                if not session.start_time or not session.end_time:
-                    work_minutes = 0
-                    pause_minutes = 0
-                    total_minutes = 0
-                    note = trans['unfinished']
-                else:
-                    total_minutes = int((session.end_time - session.start_time).total_seconds() / 60)
-                    pause_minutes = sum_pause_minutes(session.pauses)
-                    work_minutes = max(total_minutes - pause_minutes, 0)
-                    note = trans['work']
-
-            weekly_totals[(iso_year, iso_week)]["work"] += work_minutes
-            weekly_totals[(iso_year, iso_week)]["pause"] += pause_minutes
-            weekly_totals[(iso_year, iso_week)]["total"] += total_minutes
+                note = trans['work']
 
             day_name = trans['days'][session.date.strftime('%a')]
             date_display = f"{day_name} {session.date.strftime('%d.%m.%Y')}"
@@ -1437,13 +2072,101 @@ def reports_pdf():
                 "total": format_minutes(totals["total"])
             })
 
+        progress(0.7)
         add_time_report_table(pdf, detailed_rows, trans)
-        filename = f"time_{start_date.isoformat()}_{end_date.isoformat()}.pdf"
 
-    pdf_bytes = pdf.output()
-    pdf_stream = io.BytesIO(pdf_bytes if isinstance(pdf_bytes, (bytes, bytearray)) else pdf_bytes.encode("latin-1"))
-    pdf_stream.seek(0)
-    return send_file(pdf_stream, mimetype='application/pdf', as_attachment=True, download_name=filename)
+    with perf.span('serialize'):
+        pdf_bytes = pdf.output()
+    progress(1)
+    pdf_bytes = bytes(pdf_bytes) if isinstance(pdf_bytes, (bytes, bytearray)) else pdf_bytes.encode("latin-1")
+    return pdf_bytes, report_filename(report_type, start_date, end_date)
+
+def report_filename(report_type, start_date, end_date):
+    prefix = "tasks" if report_type == "tasks" else "time"
+    return f"{prefix}_{start_date.isoformat()}_{end_date.isoformat()}.pdf"
+
+REPORT_CACHE = ReportCache(os.path.join(app.instance_path, 'report_cache'))
+
+def report_fingerprint(report_type, start_date, end_date):
+    """Changes whenever data shown by this report changes."""
+    fingerprint = range_fingerprint(start_date, end_date)
+    if report_type == "tasks":
+        # Tag names, colors and supertag groups are shared by every range
+        versions, _ = table_versions(('tag', 'super_tag'))
+        fingerprint += '-' + '-'.join(str(v) for v in versions)
+    return fingerprint
+
+def cached_report_pdf(report_type, start_date, end_date, reporter_name, lang, progress=None):
+    """build_report_pdf() through the report cache. Returns (pdf_bytes, filename)."""
+    params = {
+        'report_type': report_type,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'reporter_name': reporter_name,
+        'lang': lang
+    }
+    key = ReportCache.key(params, report_fingerprint(report_type, start_date, end_date))
+    pdf_bytes = REPORT_CACHE.get(key)
+    if pdf_bytes is not None:
+        return pdf_bytes, report_filename(report_type, start_date, end_date)
+
+    started = time.perf_counter()
+    pdf_bytes, filename = build_report_pdf(report_type, start_date, end_date, reporter_name, lang, progress)
+    monitoring.observe_pdf(report_type, time.perf_counter() - started, len(pdf_bytes))
+    REPORT_CACHE.put(key, pdf_bytes)
+    return pdf_bytes, filename
+
+@app.route('/reports/pdf', methods=['POST'])
+def reports_pdf():
+    """Synchronous render, kept for the form without JavaScript."""
+    params = parse_report_form(request.form)
+    if not params:
+        return redirect(url_for('reports'))
+
+    pdf_bytes, filename = cached_report_pdf(**params)
+    return send_file(io.BytesIO(pdf_bytes), mimetype='application/pdf', as_attachment=True, download_name=filename)
+
+def run_report_job(progress, **params):
+    # Worker threads have no application context of their own
+    with app.app_context():
+        try:
+            return cached_report_pdf(progress=progress, **params)
+        finally:
+            db.session.remove()
+
+REPORT_JOBS = JobQueue(os.path.join(app.instance_path, 'report_jobs'), workers=2, ttl=3600)
+
+@app.route('/api/reports', methods=['POST'])
+def submit_report():
+    """Queue a report render. Takes the reports form fields; returns the job id (202)."""
+    params = parse_report_form(request.form if request.form else (request.get_json(silent=True) or {}))
+    if not params:
+        return jsonify({'error': 'Invalid date range'}), 400
+
+    job_id = REPORT_JOBS.submit(run_report_job, **params)
+    return jsonify({
+        'job_id': job_id,
+        'status_url': url_for('report_status', job_id=job_id),
+        'download_url': url_for('report_download', job_id=job_id)
+    }), 202
+
+@app.route('/api/reports/<job_id>')
+def report_status(job_id):
+    job = REPORT_JOBS.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(job)
+
+@app.route('/api/reports/<job_id>/download')
+def report_download(job_id):
+    job = REPORT_JOBS.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] != 'done':
+        return jsonify({'error': 'Report is not ready', 'status': job['status']}), 409
+    return send_file(REPORT_JOBS.artifact_path(job_id), mimetype='application/pdf',
+                     as_attachment=True, download_name=job['filename'])
+
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,161 @@
+"""Fingerprinted, precompressed static assets.
+
+    flask --app app build-assets
+
+copies every .js and .css file of static/ to static/dist/<name>.<hash>.<ext>,
+the hash covering the content, along with a gzip variant and, when the
+brotli package is installed, a brotli one. static/dist/manifest.json maps
+each source name to its built file. serve.py runs the build before
+starting the workers.
+
+Templates link assets with asset_url(), which returns /assets/<built file>
+when the manifest lists the asset, and the plain /static/ URL otherwise:
+before the first build, and in debug mode so edits show up without
+rebuilding. /assets/ answers with the smallest variant the browser accepts
+and lets it cache the file for a year, since its name changes with its
+content. Files of previous builds are kept for STALE_SECONDS after the
+build that replaced them (dist/superseded.json records when), so pages
+rendered before a deploy still find theirs. Page ETags include
+build_version(), a digest of the manifest and templates, so a deploy
+never answers 304 for a page that links the old files.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+
+from flask import abort, current_app, request, send_from_directory, url_for
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+EXTENSIONS = ('.js', '.css')
+DIST = 'dist'
+MANIFEST = 'manifest.json'
+# Built file -> time the build that replaced it ran
+SUPERSEDED = 'superseded.json'
+STALE_SECONDS = 7 * 24 * 3600
+# Content-Encoding -> file suffix, best first
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+def _compress(data):
+    variants = {'gzip': gzip.compress(data, 9, mtime=0)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data, quality=11)
+    # Tiny files can grow when compressed
+    return {encoding: body for encoding, body in variants.items() if len(body) < len(data)}
+
+def build(static_folder):
+    """Build every asset of static_folder into its dist/ directory. Returns the manifest."""
+    dist = os.path.join(static_folder, DIST)
+    os.makedirs(dist, exist_ok=True)
+    manifest = {}
+    for name in asset_names(static_folder):
+        stem, ext = os.path.splitext(name)
+        with open(os.path.join(static_folder, name), 'rb') as f:
+            data = f.read()
+        built = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        variants = _compress(data)
+        for suffix, body in [('', data), *((s, variants[e]) for e, s in ENCODINGS if e in variants)]:
+            with open(os.path.join(dist, built + suffix), 'wb') as f:
+                f.write(body)
+        manifest[name] = {'file': built, 'encodings': [e for e, _ in ENCODINGS if e in variants]}
+
+    # Write the manifest last and atomically: it is what points pages at the new files
+    path = os.path.join(dist, MANIFEST)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+    _remove_stale(dist, {entry['file'] + suffix for entry in manifest.values() for suffix in ('', '.gz', '.br')})
+    return manifest
+
+def _remove_stale(dist, current):
+    """Delete the files of previous builds STALE_SECONDS after the build that replaced them."""
+    path = os.path.join(dist, SUPERSEDED)
+    try:
+        with open(path) as f:
+            superseded = json.load(f)
+    except (OSError, ValueError):
+        superseded = {}
+    now = time.time()
+    kept = {}
+    for name in os.listdir(dist):
+        if name in (MANIFEST, SUPERSEDED) or name in current or name.endswith('.tmp'):
+            continue
+        # Aged from the first build that no longer lists it, not from when it was written
+        since = superseded.get(name, now)
+        if since < now - STALE_SECONDS:
+            os.remove(os.path.join(dist, name))
+        else:
+            kept[name] = since
+    with open(path + '.tmp', 'w') as f:
+        json.dump(kept, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+def load_manifest(static_folder):
+    try:
+        with open(os.path.join(static_folder, DIST, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def asset_names(static_folder):
+    return sorted(name for name in os.listdir(static_folder) if name.endswith(EXTENSIONS))
+
+def asset_url(name):
+    """URL of a static script or stylesheet: its built file, unless there is none or in debug mode."""
+    entry = current_app.extensions['assets'].get(name)
+    if entry is None or current_app.debug:
+        return url_for('static', filename=name)
+    return url_for('asset', filename=entry['file'])
+
+def _build_version(app, manifest):
+    """Digest of the manifest and of the templates: changes with every deploy that changes a page."""
+    digest = hashlib.sha256(json.dumps(manifest, sort_keys=True).encode())
+    templates = os.path.join(app.root_path, app.template_folder)
+    for name in sorted(os.listdir(templates)):
+        if not os.path.isfile(os.path.join(templates, name)):
+            continue
+        with open(os.path.join(templates, name), 'rb') as f:
+            digest.update(name.encode() + f.read())
+    return digest.hexdigest()[:12]
+
+def build_version():
+    """Version of the current build, for the ETags of rendered pages."""
+    return current_app.extensions['assets_version']
+
+def init_app(app):
+    manifest = app.extensions['assets'] = load_manifest(app.static_folder)
+    app.extensions['assets_version'] = _build_version(app, manifest)
+    # Built name -> encodings available, for the files of this manifest
+    built = {entry['file']: entry['encodings'] for entry in manifest.values()}
+    dist = os.path.join(app.static_folder, DIST)
+    app.add_template_global(asset_url)
+
+    @app.route('/assets/<filename>')
+    def asset(filename):
+        encodings = built.get(filename)
+        if encodings is None:
+            # A previous build, still on disk: served uncompressed
+            if not filename.endswith(EXTENSIONS):
+                abort(404)
+            encodings = []
+        encoding = next((e for e in encodings if request.accept_encodings[e]), None)
+        suffix = dict(ENCODINGS)[encoding] if encoding else ''
+        mimetype = 'text/css' if filename.endswith('.css') else 'application/javascript'
+        response = send_from_directory(dist, filename + suffix, mimetype=mimetype)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+        return response
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Fingerprint and precompress static/*.js and *.css into static/dist."""
+        for name, entry in build(app.static_folder).items():
+            print(f"{name} -> {entry['file']} ({', '.join(entry['encodings']) or 'uncompressed'})")
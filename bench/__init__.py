@@ -0,0 +1 @@
+"""Synthetic data (datagen) and endpoint benchmarks (run)."""
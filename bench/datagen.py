@@ -0,0 +1,153 @@
+"""Fill the database with years of realistic, reproducible synthetic data.
+
+    DATABASE_URL=sqlite:////tmp/bench.db python -m bench.datagen --days 1460
+
+Weekdays are work days (with the odd sick or vacation day), weekends are
+mostly skipped. Each work day gets a goal, arrival and departure times, one
+to three pauses, a handful of tasks carrying zero to three tags, and focus
+sessions on those tasks with focus pauses. Tags share a small palette of
+colors, each color named by a supertag. The last day has a running focus
+session.
+
+Rows are written with bulk inserts and the rollups rebuilt at the end; the
+change log starts empty, like a freshly migrated database.
+"""
+import argparse
+import os
+import random
+from datetime import date, datetime, time, timedelta
+
+TAG_NAMES = [
+    'backend', 'frontend', 'meeting', 'review', 'docs', 'support', 'ops', 'design',
+    'research', 'hiring', 'planning', 'bugfix', 'release', 'security', 'data', 'mobile',
+    'infra', 'training', 'admin', 'email', 'calls', 'reporting', 'testing', 'refactor',
+]
+PALETTE = {
+    '#EF4444': 'Urgent', '#F59E0B': 'Meetings', '#10B981': 'Build', '#3B82F6': 'Product',
+    '#8B5CF6': 'People', '#EC4899': 'Growth', '#64748B': 'Admin', '#38bdf8': 'Misc',
+}
+VERBS = ['Fix', 'Write', 'Review', 'Plan', 'Refactor', 'Ship', 'Investigate', 'Prepare', 'Update', 'Test']
+OBJECTS = ['login flow', 'weekly report', 'API docs', 'onboarding', 'billing page', 'search index',
+           'release notes', 'dashboard charts', 'CI pipeline', 'customer ticket', 'roadmap', 'slides']
+GOALS = ['Ship the release', 'Clear the review queue', 'Deep work on the API', 'Plan next sprint',
+         'Close support tickets', 'Finish the migration', 'Write documentation', 'Prototype the redesign']
+
+def _at(day, hour, minute=0):
+    return datetime.combine(day, time()) + timedelta(hours=hour, minutes=minute)
+
+def generate(days, seed=0, end=None):
+    """Rows for every table, as {table_name: [row dict]}, covering `days` days ending at `end`."""
+    rng = random.Random(seed)
+    end = end or date.today()
+    rows = {name: [] for name in ('tag', 'super_tag', 'daily_session', 'task', 'task_tags',
+                                  'pause', 'focus_session', 'focus_pause', 'user_profile')}
+    colors = list(PALETTE)
+    for i, name in enumerate(TAG_NAMES, start=1):
+        rows['tag'].append({'id': i, 'name': name, 'color': colors[i % len(colors)]})
+    for i, (color, name) in enumerate(PALETTE.items(), start=1):
+        rows['super_tag'].append({'id': i, 'color': color, 'name': name})
+    rows['user_profile'].append({'id': 1, 'first_name': 'Alex', 'last_name': 'Martin', 'birthday': date(1990, 5, 17)})
+
+    ids = {'session': 0, 'task': 0, 'pause': 0, 'focus': 0, 'focus_pause': 0}
+    def next_id(kind):
+        ids[kind] += 1
+        return ids[kind]
+
+    start = end - timedelta(days=days - 1)
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        weekend = day.weekday() >= 5
+        if weekend and rng.random() > 0.1:
+            continue
+        roll = rng.random()
+        status = 'sick' if roll < 0.02 else 'vacation' if roll < 0.08 else 'work'
+        arrive = _at(day, 8, rng.randint(0, 75))
+        leave = arrive + timedelta(hours=rng.uniform(7, 9.5))
+        session_id = next_id('session')
+        rows['daily_session'].append({
+            'id': session_id, 'date': day, 'goal': rng.choice(GOALS), 'status': status,
+            'start_time': arrive, 'end_time': leave,
+        })
+        if status != 'work':
+            continue
+
+        lunch = _at(day, 12, rng.randint(0, 60))
+        pauses = [(lunch, lunch + timedelta(minutes=rng.randint(30, 60)))]
+        for _ in range(rng.randint(0, 2)):
+            at = arrive + timedelta(minutes=rng.randint(60, int((leave - arrive).total_seconds() / 60) - 30))
+            pauses.append((at, at + timedelta(minutes=rng.randint(5, 20))))
+        for pause_start, pause_end in sorted(pauses):
+            rows['pause'].append({'id': next_id('pause'), 'session_id': session_id,
+                                  'start_time': pause_start, 'end_time': pause_end})
+
+        task_ids = []
+        for order in range(rng.randint(3, 10)):
+            task_id = next_id('task')
+            task_ids.append(task_id)
+            rows['task'].append({
+                'id': task_id, 'session_id': session_id, 'order': order,
+                'description': f"{rng.choice(VERBS)} {rng.choice(OBJECTS)}",
+                'is_completed': rng.random() < 0.7,
+            })
+            for tag_id in rng.sample(range(1, len(TAG_NAMES) + 1), rng.choice((0, 1, 1, 2, 2, 3))):
+                rows['task_tags'].append({'task_id': task_id, 'tag_id': tag_id})
+
+        cursor = arrive + timedelta(minutes=rng.randint(0, 30))
+        for _ in range(rng.randint(1, 6)):
+            length = timedelta(minutes=rng.choice((25, 50, 75)))
+            if cursor + length > leave:
+                break
+            focus_id = next_id('focus')
+            rows['focus_session'].append({
+                'id': focus_id, 'session_id': session_id, 'task_id': rng.choice(task_ids),
+                'start_time': cursor, 'end_time': cursor + length,
+                'pomodoro_mode': rng.choice((None, '50/10', '75/15')), 'note': None,
+            })
+            for _ in range(rng.choice((0, 0, 1, 2))):
+                at = cursor + timedelta(minutes=rng.randint(5, int(length.total_seconds() / 60) - 10))
+                rows['focus_pause'].append({'id': next_id('focus_pause'), 'focus_session_id': focus_id,
+                                            'start_time': at, 'end_time': at + timedelta(minutes=rng.randint(2, 8))})
+            cursor += length + timedelta(minutes=rng.randint(5, 40))
+
+    # Something in progress on the last work day
+    if rows['focus_session']:
+        last = rows['focus_session'][-1]
+        last['end_time'] = None
+    return rows
+
+def populate(days, seed=0, end=None):
+    """Replace the contents of the app database with generate(). Returns row counts per table."""
+    from sqlalchemy import delete, insert
+
+    import migrations
+    from models import db
+    from rollups import rebuild_rollups
+
+    migrations.upgrade()
+    rows = generate(days, seed, end)
+    tables = db.metadata.tables
+    for table in reversed(db.metadata.sorted_tables):
+        if table.name != 'schema_version':
+            db.session.execute(delete(table))
+    for name, table_rows in rows.items():
+        for i in range(0, len(table_rows), 5000):
+            db.session.execute(insert(tables[name]), table_rows[i:i + 5000])
+    db.session.commit()
+    rebuild_rollups()
+    return {name: len(table_rows) for name, table_rows in rows.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill the app database (DATABASE_URL) with synthetic data.")
+    parser.add_argument('--days', type=int, default=365 * 3)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    if 'DATABASE_URL' not in os.environ:
+        parser.error("set DATABASE_URL: this replaces the whole database")
+
+    from app import app
+    with app.app_context():
+        counts = populate(args.days, args.seed)
+    print(', '.join(f"{count} {name}" for name, count in counts.items()))
+
+if __name__ == '__main__':
+    main()
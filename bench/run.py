@@ -0,0 +1,184 @@
+"""Endpoint benchmarks at several data sizes, compared against a stored baseline.
+
+    python -m bench.run [--sizes 90,365,1460] [--repeat 5] [--save-baseline]
+
+Each size runs in its own process on a fresh synthetic database (see
+datagen.py) in a temporary directory. Every endpoint is requested once to
+warm up, then `repeat` times for latency (median and worst), then once
+more under tracemalloc for the peak Python memory of the request. The
+number of SQL statements of that last request is recorded too. PDF reports
+are rendered cold: the report cache is emptied before each request.
+
+Results are compared with bench/baseline.json (--baseline to change it):
+a latency or memory growth beyond --tolerance, or any extra query, is a
+regression and makes the run exit with status 1. --save-baseline writes
+the current results as the new baseline instead. Baselines depend on the
+machine, so none is committed: record one with --save-baseline on the
+machine that runs the comparisons (e.g. before a change), then run again
+without it. Without a baseline the results are only printed.
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+DEFAULT_SIZES = (90, 365, 1460)
+
+def endpoints(first_task_id, start, end):
+    """(name, method, path, form data) of the benchmarked requests."""
+    report = {'date_start': start.isoformat(), 'date_end': end.isoformat(), 'reporter_name': 'Bench'}
+    return [
+        ('index', 'GET', '/', None),
+        ('metrics_data', 'GET', '/api/metrics/data', None),
+        ('metrics_data_columnar', 'GET', '/api/metrics/data?format=columnar', None),
+        ('metrics_summary_year', 'GET', f'/api/metrics/summary?view=year&anchor={end.isoformat()}', None),
+        ('profile', 'GET', '/profile', None),
+        ('focus_task', 'GET', f'/focus/task/{first_task_id}', None),
+        ('report_tasks', 'POST', '/reports/pdf', {**report, 'report_type': 'tasks'}),
+        ('report_time', 'POST', '/reports/pdf', {**report, 'report_type': 'time'}),
+    ]
+
+def measure_size(days, repeat, seed):
+    """Run in a child process with DATABASE_URL already set. Returns {endpoint: metrics}."""
+    from sqlalchemy import event, func, select
+
+    import app as app_module
+    from app import app
+    from bench.datagen import populate
+    from models import db, DailySession, Task
+    from report_cache import ReportCache
+
+    report_dir = tempfile.mkdtemp(prefix='bench-reports-')
+    app_module.REPORT_CACHE = ReportCache(report_dir)
+    with app.app_context():
+        populate(days, seed)
+        # The newest task, as if opened from today's dashboard
+        first_task_id = db.session.scalar(select(func.max(Task.id)))
+        start, end = db.session.execute(select(func.min(DailySession.date), func.max(DailySession.date))).one()
+
+    queries = [0]
+    def count_query(*args):
+        queries[0] += 1
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', count_query)
+
+    client = app.test_client()
+    def request(method, path, data):
+        if path == '/reports/pdf':
+            shutil.rmtree(report_dir, ignore_errors=True)
+            os.makedirs(report_dir)
+        response = client.open(path, method=method, data=data)
+        if response.status_code != 200:
+            raise RuntimeError(f"{method} {path}: HTTP {response.status_code}")
+        return len(response.get_data())
+
+    results = {}
+    for name, method, path, data in endpoints(first_task_id, start, end):
+        request(method, path, data)
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            size = request(method, path, data)
+            timings.append((time.perf_counter() - started) * 1000)
+
+        queries[0] = 0
+        tracemalloc.start()
+        request(method, path, data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        results[name] = {
+            'median_ms': round(statistics.median(timings), 2),
+            'max_ms': round(max(timings), 2),
+            'queries': queries[0],
+            'peak_kb': round(peak / 1024),
+            'bytes': size,
+        }
+    shutil.rmtree(report_dir, ignore_errors=True)
+    return results
+
+def run_size(days, repeat, seed):
+    """measure_size() in a fresh process with its own temporary database."""
+    with tempfile.TemporaryDirectory(prefix='bench-') as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{os.path.join(directory, 'bench.db')}")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        output = subprocess.run(
+            [sys.executable, '-m', 'bench.run', '--child', str(days), '--repeat', str(repeat), '--seed', str(seed)],
+            cwd=root, env=env, check=True, capture_output=True, text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def compare(results, baseline, tolerance):
+    """Lines describing regressions of results against baseline."""
+    regressions = []
+    for size, endpoints_results in results.items():
+        for name, current in endpoints_results.items():
+            previous = baseline.get(size, {}).get(name)
+            if not previous:
+                continue
+            if current['median_ms'] > previous['median_ms'] * (1 + tolerance):
+                regressions.append(f"{name} @ {size} days: median {previous['median_ms']} -> {current['median_ms']} ms")
+            if current['queries'] > previous['queries']:
+                regressions.append(f"{name} @ {size} days: queries {previous['queries']} -> {current['queries']}")
+            if current['peak_kb'] > previous['peak_kb'] * (1 + tolerance):
+                regressions.append(f"{name} @ {size} days: peak memory {previous['peak_kb']} -> {current['peak_kb']} KiB")
+    return regressions
+
+def print_table(results, baseline):
+    print(f"{'endpoint':<24}{'days':>6}{'median ms':>11}{'max ms':>9}{'queries':>9}{'peak KiB':>10}{'bytes':>10}{'vs base':>9}")
+    for size, endpoints_results in results.items():
+        for name, r in endpoints_results.items():
+            previous = baseline.get(size, {}).get(name)
+            change = f"{(r['median_ms'] / previous['median_ms'] - 1) * 100:+.0f}%" if previous else ''
+            print(f"{name:<24}{size:>6}{r['median_ms']:>11}{r['max_ms']:>9}{r['queries']:>9}"
+                  f"{r['peak_kb']:>10}{r['bytes']:>10}{change:>9}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the main endpoints on synthetic data.")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES), help="days of data, comma separated")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed latency/memory growth (0.25 = 25%%)")
+    parser.add_argument('--child', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_size(args.child, args.repeat, args.seed)))
+        return
+
+    results = {}
+    for days in (int(s) for s in args.sizes.split(',')):
+        print(f"Benchmarking {days} days of data...", file=sys.stderr)
+        results[str(days)] = run_size(days, args.repeat, args.seed)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+        print(f"Saved baseline to {args.baseline}")
+        return
+    if not baseline:
+        print(f"No baseline at {args.baseline}: record one with --save-baseline", file=sys.stderr)
+        return
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESSION {line}")
+    if regressions:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,208 @@
+"""Change log backing delta sync of the metrics data set.
+
+Every flush records which sessions, tasks, pauses, focus sessions and tags
+were created, updated or deleted. The ChangeLog autoincrement id is the data
+version: a client holding version N asks for everything logged after N.
+
+Each flush also bumps a TableVersion counter for every table it wrote to,
+which read endpoints turn into ETag / Last-Modified validators.
+
+Committed changes wake up the /api/events streams of this process; streams
+in other processes notice them on their next poll.
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+
+from sqlalchemy import event, delete, func, inspect, insert, select, update
+
+from models import db, DailySession, Task, Pause, FocusSession, FocusPause, Tag, ChangeLog, TableVersion
+
+# Entries older than this are pruned; clients further behind get a full reload
+RETENTION_DAYS = 30
+PRUNE_EVERY = 500
+# Past this many entries a full reload is cheaper than a delta
+MAX_DELTA_ENTRIES = 5000
+
+ENTITIES = {
+    DailySession: 'session',
+    Task: 'task',
+    Pause: 'pause',
+    FocusSession: 'focus_session',
+    Tag: 'tag',
+}
+
+_flushes_since_prune = 0
+_committed = threading.Condition()
+
+def table_versions(tables):
+    """(versions, last_modified) for the given table names; unseen tables count as version 0."""
+    rows = {row.name: row for row in db.session.execute(
+        select(TableVersion).where(TableVersion.name.in_(tables))
+    ).scalars()}
+    versions = [rows[name].version if name in rows else 0 for name in tables]
+    stamps = [row.updated_at for row in rows.values()]
+    last_modified = max(stamps).replace(tzinfo=timezone.utc) if stamps else None
+    return versions, last_modified
+
+def bump_tables(session, tables):
+    """Mark tables as changed for writes the ORM does not see (bulk UPDATE/DELETE)."""
+    session.info.setdefault('changed_tables', set()).update(tables)
+
+def wait_for_changes(timeout):
+    """Block until a transaction logging changes commits in this process, or timeout."""
+    with _committed:
+        _committed.wait(timeout)
+
+def collapse(entries):
+    """Keep the latest op per row, as dicts ready for JSON."""
+    latest = {}
+    for entity, entity_id, session_id, op in entries:
+        latest.pop((entity, entity_id), None)
+        latest[(entity, entity_id)] = {'entity': entity, 'id': entity_id, 'session_id': session_id, 'op': op}
+    return list(latest.values())
+
+def current_version():
+    return db.session.scalar(select(func.max(ChangeLog.id))) or 0
+
+def record_changes(session, entity, rows, op='upsert'):
+    """Log changes made outside the ORM unit of work (bulk UPDATE/DELETE).
+
+    `rows` are (entity_id, session_id) pairs. Call write_pending() afterwards
+    if the transaction may not flush any ORM object.
+    """
+    pending = session.info.setdefault('changes', {})
+    for entity_id, session_id in rows:
+        pending[(entity, entity_id)] = (op, session_id)
+
+def changes_since(version):
+    """Log entries after `version` as (entity, entity_id, session_id, op) tuples.
+
+    Returns (current_version, entries), with entries None when the client is
+    too far behind (pruned log or too many entries) and must reload everything.
+    """
+    latest = current_version()
+    if version >= latest:
+        return latest, []
+    oldest, count = db.session.execute(
+        select(func.min(ChangeLog.id), func.count(ChangeLog.id)).where(ChangeLog.id > version)
+    ).one()
+    if version < 0 or oldest > version + 1 or count > MAX_DELTA_ENTRIES:
+        return latest, None
+
+    entries = db.session.execute(
+        select(ChangeLog.entity, ChangeLog.entity_id, ChangeLog.session_id, ChangeLog.op)
+        .where(ChangeLog.id > version, ChangeLog.id <= latest)
+        .order_by(ChangeLog.id)
+    ).all()
+    return latest, entries
+
+def prune_changes(session, days=RETENTION_DAYS):
+    cutoff = datetime.now() - timedelta(days=days)
+    # Always keep the newest entry so the version never goes backwards
+    newest = session.scalar(select(func.max(ChangeLog.id)))
+    session.execute(delete(ChangeLog).where(ChangeLog.created_at < cutoff, ChangeLog.id != newest))
+
+def _pending(session):
+    return session.info.setdefault('changes', {}), session.info.setdefault('changed_focus_pauses', set())
+
+def _track(pending, focus_pauses, obj, op):
+    if isinstance(obj, FocusPause):
+        # Focus pauses only show up through their focus session's duration
+        focus_pauses.add(obj.focus_session_id)
+        return
+    entity = ENTITIES.get(type(obj))
+    if entity is None:
+        return
+    if entity == 'session':
+        session_id = obj.id
+    elif entity == 'tag':
+        session_id = None
+    else:
+        session_id = obj.session_id
+    key = (entity, obj.id)
+    # A delete wins over an update of the same row within one flush
+    if pending.get(key, ('',))[0] != 'delete':
+        pending[key] = (op, session_id)
+    if entity in ('task', 'pause', 'focus_session') and op == 'upsert':
+        # Moved to another day: the day it left changed too
+        for old_session_id in inspect(obj).attrs.session_id.history.deleted or ():
+            if old_session_id is not None:
+                pending.setdefault(('session', old_session_id), ('upsert', old_session_id))
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_deleted(session, flush_context, instances):
+    pending, focus_pauses = _pending(session)
+    for obj in session.deleted:
+        _track(pending, focus_pauses, obj, 'delete')
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed(session, flush_context):
+    pending, focus_pauses = _pending(session)
+    tables = session.info.setdefault('changed_tables', set())
+    for obj in chain(session.new, session.dirty):
+        _track(pending, focus_pauses, obj, 'upsert')
+        tables.add(obj.__tablename__)
+    # Rows deleted by cascade (e.g. the tasks of a deleted session)
+    for obj in session.deleted:
+        _track(pending, focus_pauses, obj, 'delete')
+        tables.add(obj.__tablename__)
+    tables.discard(TableVersion.__tablename__)
+
+def _bump_versions(session):
+    tables = session.info.get('changed_tables')
+    if not tables:
+        return
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for name in sorted(tables):
+        updated = session.execute(
+            update(TableVersion).where(TableVersion.name == name)
+            .values(version=TableVersion.version + 1, updated_at=now)
+        ).rowcount
+        if not updated:
+            session.execute(insert(TableVersion).values(name=name, version=1, updated_at=now))
+    tables.clear()
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _write_log(session, flush_context):
+    write_pending(session)
+
+def write_pending(session):
+    """Write queued table bumps and change log entries now."""
+    global _flushes_since_prune
+    _bump_versions(session)
+    pending, focus_pauses = _pending(session)
+    if focus_pauses:
+        for focus_id, session_id in session.execute(
+            select(FocusSession.id, FocusSession.session_id).where(FocusSession.id.in_(focus_pauses))
+        ):
+            pending.setdefault(('focus_session', focus_id), ('upsert', session_id))
+        focus_pauses.clear()
+    if not pending:
+        return
+
+    now = datetime.now()
+    session.execute(insert(ChangeLog), [
+        {'entity': entity, 'entity_id': entity_id, 'session_id': session_id, 'op': op, 'created_at': now}
+        for (entity, entity_id), (op, session_id) in pending.items()
+    ])
+    pending.clear()
+    session.info['notify_commit'] = True
+
+    _flushes_since_prune += 1
+    if _flushes_since_prune >= PRUNE_EVERY:
+        _flushes_since_prune = 0
+        prune_changes(session)
+
+@event.listens_for(db.session, 'after_commit')
+def _notify_streams(session):
+    if session.info.pop('notify_commit', False):
+        with _committed:
+            _committed.notify_all()
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop('notify_commit', None)
+    session.info.pop('changes', None)
+    session.info.pop('changed_focus_pauses', None)
+    session.info.pop('changed_tables', None)
@@ -0,0 +1,44 @@
+"""Per-locale translation catalogs and their browser bundles.
+
+Each catalog is the locale's dictionary from translations.py on top of the
+English one, so a key missing from a locale falls back to English. The
+browser gets its catalog as a small script, /i18n/<lang>.<hash>.js, built
+once at startup. The hash covers the content, so the URL changes whenever
+a translation does and the bundle can be cached forever.
+"""
+import hashlib
+import json
+
+from translations import TRANSLATIONS
+
+DEFAULT_LOCALE = 'en'
+FALLBACKS = {}  # locale -> locale used for its missing keys, DEFAULT_LOCALE if absent
+
+def _build_catalog(lang):
+    chain = []
+    while lang and lang not in chain:
+        chain.append(lang)
+        lang = FALLBACKS.get(lang, DEFAULT_LOCALE) if lang != DEFAULT_LOCALE else None
+    catalog = {}
+    for name in reversed(chain):
+        catalog.update(TRANSLATIONS.get(name, {}))
+    return catalog
+
+CATALOGS = {lang: _build_catalog(lang) for lang in TRANSLATIONS}
+
+def _build_bundle(catalog):
+    body = f"window.i18n = {json.dumps(catalog, ensure_ascii=False, sort_keys=True)};\n".encode()
+    return hashlib.sha256(body).hexdigest()[:12], body
+
+BUNDLES = {lang: _build_bundle(catalog) for lang, catalog in CATALOGS.items()}
+
+def resolve_locale(lang):
+    return lang if lang in CATALOGS else DEFAULT_LOCALE
+
+def catalog(lang):
+    """Translations for lang, with fallbacks filled in."""
+    return CATALOGS[resolve_locale(lang)]
+
+def bundle_filename(lang):
+    lang = resolve_locale(lang)
+    return f"{lang}.{BUNDLES[lang][0]}.js"
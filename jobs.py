@@ -0,0 +1,107 @@
+"""Background jobs that produce a downloadable file (PDF reports).
+
+Jobs run on a small thread pool so long renders don't hold a request thread.
+Each job's state is a JSON file next to its artifact in the job directory,
+so any worker process can answer status and download requests. Finished
+jobs (and their files) are removed after `ttl` seconds.
+"""
+import json
+import os
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+class JobQueue:
+    def __init__(self, directory, workers=2, ttl=3600):
+        self.directory = directory
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job')
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def _state_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.json")
+
+    def artifact_path(self, job_id):
+        return os.path.join(self.directory, f"{job_id}.bin")
+
+    def _write(self, job_id, **changes):
+        with self._lock:
+            state = self._read(job_id) or {}
+            state.update(changes)
+            tmp_path = self._state_path(job_id) + '.tmp'
+            with open(tmp_path, 'w') as f:
+                json.dump(state, f)
+            # Atomic, so readers never see a half-written file
+            os.replace(tmp_path, self._state_path(job_id))
+        return state
+
+    def _read(self, job_id):
+        try:
+            with open(self._state_path(job_id)) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def get(self, job_id):
+        """State dict of a job, or None if it doesn't exist (or expired)."""
+        if not JOB_ID_RE.match(job_id or ''):
+            return None
+        return self._read(job_id)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue fn(progress, *args, **kwargs) -> (bytes, filename). Returns the job id.
+
+        fn may call progress(fraction) with a value between 0 and 1.
+        """
+        self.cleanup()
+        job_id = uuid.uuid4().hex
+        self._write(job_id, id=job_id, status='queued', progress=0, filename=None,
+                    error=None, created_at=time.time(), finished_at=None)
+        self._executor.submit(self._run, job_id, fn, args, kwargs)
+        return job_id
+
+    def _run(self, job_id, fn, args, kwargs):
+        self._write(job_id, status='running')
+        last_reported = [0]
+        def progress(fraction):
+            # Only rewrite the state file on visible steps
+            fraction = round(min(max(fraction, 0), 1), 2)
+            if fraction - last_reported[0] >= 0.05:
+                last_reported[0] = fraction
+                self._write(job_id, progress=fraction)
+        try:
+            data, filename = fn(progress, *args, **kwargs)
+            with open(self.artifact_path(job_id), 'wb') as f:
+                f.write(data)
+        except Exception as exc:
+            self._write(job_id, status='failed', error=str(exc), finished_at=time.time())
+            return
+        self._write(job_id, status='done', progress=1, filename=filename, finished_at=time.time())
+
+    def cleanup(self):
+        """Delete finished jobs older than the TTL, and their files."""
+        now = time.time()
+        for name in os.listdir(self.directory):
+            job_id, ext = os.path.splitext(name)
+            if ext != '.json':
+                continue
+            state = self._read(job_id)
+            if not state:
+                continue
+            if state.get('finished_at'):
+                expired = now - state['finished_at'] >= self.ttl
+            else:
+                # Queued or running in a process that has since stopped
+                expired = now - state.get('created_at', now) >= 4 * self.ttl
+            if not expired:
+                continue
+            for path in (self.artifact_path(job_id), self._state_path(job_id)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
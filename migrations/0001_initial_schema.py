@@ -0,0 +1,9 @@
+"""Create the tables that don't exist yet.
+
+A new database gets the whole current schema here, so the following
+migrations find nothing left to do on it.
+"""
+from models import db
+
+def upgrade():
+    db.create_all()
@@ -0,0 +1,5 @@
+"""Add DailySession.status (work, sick, vacation...) to databases that predate it."""
+from migrations import add_column
+
+def upgrade():
+    add_column('daily_session', 'status', "VARCHAR(20) NOT NULL DEFAULT 'work'")
@@ -0,0 +1,5 @@
+"""Add DailyRollup.revision, which fingerprints days for the report cache."""
+from migrations import add_column
+
+def upgrade():
+    add_column('daily_rollup', 'revision', "INTEGER NOT NULL DEFAULT 0")
@@ -0,0 +1,5 @@
+"""Create the secondary indexes declared on the models (see sqlite_profile.py)."""
+from sqlite_profile import ensure_indexes
+
+def upgrade():
+    ensure_indexes()
@@ -0,0 +1,5 @@
+"""Compute the daily rollups of sessions recorded before rollups existed."""
+from rollups import ensure_rollups
+
+def upgrade():
+    ensure_rollups()
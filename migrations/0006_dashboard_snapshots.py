@@ -0,0 +1,5 @@
+"""Store dashboard snapshots in a table shared by all worker processes."""
+from models import db, DashboardSnapshot
+
+def upgrade():
+    DashboardSnapshot.__table__.create(db.engine, checkfirst=True)
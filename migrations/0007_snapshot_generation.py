@@ -0,0 +1,9 @@
+"""Key dashboard snapshots by visit generation; snapshots taken on page view are dropped."""
+from sqlalchemy import delete
+
+from migrations import add_column
+from models import db, DashboardSnapshot
+
+def upgrade():
+    add_column('dashboard_snapshot', 'generation', "VARCHAR(32) NOT NULL DEFAULT ''")
+    db.session.execute(delete(DashboardSnapshot.__table__).where(DashboardSnapshot.__table__.c.generation == ''))
@@ -0,0 +1,5 @@
+"""Remember client operation ids, so writes replayed by the offline outbox apply once."""
+from models import db, AppliedOperation
+
+def upgrade():
+    AppliedOperation.__table__.create(db.engine, checkfirst=True)
@@ -0,0 +1,69 @@
+"""Versioned schema migrations.
+
+Each `NNNN_description.py` module in this package defines `upgrade()`,
+which runs inside an app context and may use `db.session`. Migrations are
+applied in order by `flask migrate` (and by `python app.py` for local use);
+every applied one is recorded in the schema_version table. App startup only
+compares the recorded version with the latest one.
+
+Databases created before this runner existed start at version 0, so the
+first migrations check what is already there instead of assuming.
+"""
+import importlib
+import os
+import re
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+
+from models import db, SchemaVersion
+
+MIGRATION_RE = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+def available():
+    """[(version, name)] of every migration module, in order."""
+    directory = os.path.dirname(__file__)
+    found = []
+    for filename in os.listdir(directory):
+        match = MIGRATION_RE.match(filename)
+        if match:
+            found.append((int(match.group(1)), f"{match.group(1)}_{match.group(2)}"))
+    return sorted(found)
+
+def latest_version():
+    migrations = available()
+    return migrations[-1][0] if migrations else 0
+
+def applied_version():
+    """Highest applied migration, 0 for a new or pre-migration database."""
+    try:
+        return db.session.scalar(select(func.max(SchemaVersion.version))) or 0
+    except OperationalError:
+        # No schema_version table yet
+        db.session.rollback()
+        return 0
+
+def upgrade():
+    """Apply the pending migrations, each in its own transaction. Returns their names."""
+    SchemaVersion.__table__.create(db.engine, checkfirst=True)
+    current = applied_version()
+    applied = []
+    for version, name in available():
+        if version <= current:
+            continue
+        module = importlib.import_module(f"{__name__}.{name}")
+        try:
+            module.upgrade()
+            db.session.add(SchemaVersion(version=version, name=name))
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        applied.append(name)
+    return applied
+
+def add_column(table, column, definition):
+    """ALTER TABLE ... ADD COLUMN unless the column already exists."""
+    columns = [row[1] for row in db.session.execute(text(f"PRAGMA table_info({table})")).all()]
+    if column not in columns:
+        db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {definition}"))
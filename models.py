@@ -4,6 +4,8 @@ from datetime import datetime
 db = SQLAlchemy()
 
 class DailySession(db.Model):
+    # Date lookups, ranges and the history cursor (date, id)
+    __table_args__ = (db.Index('ix_daily_session_date_id', 'date', 'id'),)
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, default=datetime.now)
     goal = db.Column(db.String(200), nullable=False)
@@ -13,10 +15,14 @@ class DailySession(db.Model):
 
     tasks = db.relationship('Task', backref='session', lazy=True, cascade='all, delete-orphan', order_by='Task.order')
     pauses = db.relationship('Pause', backref='session', lazy=True, cascade='all, delete-orphan', order_by='Pause.start_time')
+    # Read-only: focus sessions are managed through their own endpoints
+    focus_sessions = db.relationship('FocusSession', lazy=True, viewonly=True, order_by='FocusSession.id')
 
 task_tags = db.Table('task_tags',
     db.Column('task_id', db.Integer, db.ForeignKey('task.id'), primary_key=True),
-    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True)
+    db.Column('tag_id', db.Integer, db.ForeignKey('tag.id'), primary_key=True),
+    # The primary key covers task -> tags; this covers tag -> tasks
+    db.Index('ix_task_tags_tag_id', 'tag_id')
 )
 
 class Tag(db.Model):
@@ -30,6 +36,7 @@ class SuperTag(db.Model):
     name = db.Column(db.String(50), nullable=False)
 
 class Task(db.Model):
+    __table_args__ = (db.Index('ix_task_session_order', 'session_id', 'order'),)
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('daily_session.id'), nullable=False)
     description = db.Column(db.String(200), nullable=False)
@@ -42,12 +49,19 @@ class Task(db.Model):
         backref=db.backref('tasks', lazy=True))
 
 class Pause(db.Model):
+    __table_args__ = (db.Index('ix_pause_session_start', 'session_id', 'start_time'),)
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('daily_session.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=True)
     end_time = db.Column(db.DateTime, nullable=True)
 
 class FocusSession(db.Model):
+    __table_args__ = (
+        db.Index('ix_focus_session_session_id', 'session_id', 'id'),
+        db.Index('ix_focus_session_task_start', 'task_id', 'start_time'),
+        # Only running sessions, so it stays tiny
+        db.Index('ix_focus_session_open', 'session_id', 'task_id', sqlite_where=db.text('end_time IS NULL')),
+    )
     id = db.Column(db.Integer, primary_key=True)
     session_id = db.Column(db.Integer, db.ForeignKey('daily_session.id'), nullable=False)
     task_id = db.Column(db.Integer, db.ForeignKey('task.id'), nullable=False)
@@ -57,8 +71,13 @@ class FocusSession(db.Model):
     note = db.Column(db.String(200), nullable=True)
 
     pauses = db.relationship('FocusPause', backref='focus_session', lazy=True, cascade='all, delete-orphan', order_by='FocusPause.start_time')
+    task = db.relationship('Task', lazy=True, viewonly=True)
 
 class FocusPause(db.Model):
+    __table_args__ = (
+        db.Index('ix_focus_pause_session_start', 'focus_session_id', 'start_time'),
+        db.Index('ix_focus_pause_open', 'focus_session_id', sqlite_where=db.text('end_time IS NULL')),
+    )
     id = db.Column(db.Integer, primary_key=True)
     focus_session_id = db.Column(db.Integer, db.ForeignKey('focus_session.id'), nullable=False)
     start_time = db.Column(db.DateTime, nullable=True)
@@ -69,3 +88,71 @@ class UserProfile(db.Model):
     first_name = db.Column(db.String(100), nullable=True)
     last_name = db.Column(db.String(100), nullable=True)
     birthday = db.Column(db.Date, nullable=True)
+
+class DailyRollup(db.Model):
+    """Pre-aggregated minutes and task counts for one DailySession (maintained by rollups.py)."""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('daily_session.id'), unique=True, nullable=False)
+    date = db.Column(db.Date, nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default="work")
+    work_minutes = db.Column(db.Integer, nullable=False, default=0)
+    pause_minutes = db.Column(db.Integer, nullable=False, default=0)
+    total_minutes = db.Column(db.Integer, nullable=False, default=0)
+    focus_minutes = db.Column(db.Float, nullable=False, default=0)
+    task_total = db.Column(db.Integer, nullable=False, default=0)
+    task_completed = db.Column(db.Integer, nullable=False, default=0)
+    # Bumped on every recompute; fingerprints the day for the report cache
+    revision = db.Column(db.Integer, nullable=False, default=0)
+
+class DailyTagRollup(db.Model):
+    """Per-tag share of a day's focus minutes and task counts. tag_id None means untagged."""
+    id = db.Column(db.Integer, primary_key=True)
+    session_id = db.Column(db.Integer, db.ForeignKey('daily_session.id'), nullable=False, index=True)
+    date = db.Column(db.Date, nullable=False, index=True)
+    tag_id = db.Column(db.Integer, db.ForeignKey('tag.id'), nullable=True)
+    # Focus time is split equally between a task's tags ("Time Breakdown")
+    focus_minutes = db.Column(db.Float, nullable=False, default=0)
+    # Each task counts once for every one of its tags ("Task Breakdown")
+    task_total = db.Column(db.Integer, nullable=False, default=0)
+    task_completed = db.Column(db.Integer, nullable=False, default=0)
+
+class ChangeLog(db.Model):
+    """One created/updated/deleted row. The autoincrement id doubles as the data version."""
+    __table_args__ = (
+        db.Index('ix_change_log_created_at', 'created_at'),
+        {'sqlite_autoincrement': True},
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False) # session, task, pause, focus_session, tag
+    entity_id = db.Column(db.Integer, nullable=False)
+    session_id = db.Column(db.Integer, nullable=True) # Owning DailySession, when there is one
+    op = db.Column(db.String(10), nullable=False) # upsert or delete
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+class TableVersion(db.Model):
+    """Change counter per table, bumped by every flush that writes to it. Backs the HTTP validators."""
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, nullable=False) # UTC
+
+class SchemaVersion(db.Model):
+    """One row per applied migration (see migrations/). The highest version is the schema version."""
+    __tablename__ = 'schema_version'
+    version = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    applied_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+class DashboardSnapshot(db.Model):
+    """State of a day before the first change made from its dashboard, for "discard changes" (see snapshots.py)."""
+    session_id = db.Column(db.Integer, primary_key=True)
+    generation = db.Column(db.String(32), nullable=False, default='') # Token of the dashboard visit
+    data = db.Column(db.Text, nullable=False) # JSON
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
+
+class AppliedOperation(db.Model):
+    """Answer to a /api/batch operation sent with a client id, so an operation replayed by the offline outbox applies once."""
+    __table_args__ = (db.Index('ix_applied_operation_created_at', 'created_at'),)
+    id = db.Column(db.String(64), primary_key=True) # Chosen by the client's outbox
+    status = db.Column(db.Integer, nullable=False)
+    body = db.Column(db.Text, nullable=True) # JSON, as returned the first time
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.now)
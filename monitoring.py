@@ -0,0 +1,159 @@
+"""Prometheus metrics, kept in process and served as text by /metrics.
+
+Counters and histograms follow the Prometheus text exposition format
+(version 0.0.4) without needing the prometheus_client package. Values are
+per process: under several gunicorn workers every series carries a
+`worker` label with the process id, so each worker's series stays
+monotonic whichever worker answers the scrape.
+
+Gauges that describe the database (running focus sessions, SQLite file
+and WAL sizes) are computed when scraped.
+"""
+import bisect
+import os
+import threading
+import time
+
+from flask import Response, g, request
+from sqlalchemy import event, func, select
+
+PREFIX = 'letempsestcompte'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1)
+PDF_SECONDS_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+PDF_BYTES_BUCKETS = (10e3, 50e3, 100e3, 250e3, 500e3, 1e6, 5e6)
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+def _number(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name, self.help, self.labelnames = f"{PREFIX}_{name}", help, tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def expose(self, extra):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = dict(self._values)
+        for key, value in sorted(values.items()):
+            lines.append(f"{self.name}{_labels([*zip(self.labelnames, key), *extra])} {_number(value)}")
+        return lines
+
+class Histogram:
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name, self.help, self.labelnames = f"{PREFIX}_{name}", help, tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._values = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.setdefault(key, [0] * (len(self.buckets) + 2))
+            if index < len(self.buckets):
+                entry[index] += 1
+            entry[-2] += value
+            entry[-1] += 1
+
+    def expose(self, extra):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            values = {key: list(entry) for key, entry in self._values.items()}
+        for key, entry in sorted(values.items()):
+            labels = [*zip(self.labelnames, key), *extra]
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_labels([*labels, ('le', _number(bound))])} {cumulative}")
+            lines.append(f"{self.name}_bucket{_labels([*labels, ('le', '+Inf')])} {entry[-1]}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(entry[-2])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {entry[-1]}")
+        return lines
+
+def _gauge(name, help, value, extra):
+    full_name = f"{PREFIX}_{name}"
+    return [f"# HELP {full_name} {help}", f"# TYPE {full_name} gauge", f"{full_name}{_labels(extra)} {_number(value)}"]
+
+REQUEST_SECONDS = Histogram('http_request_duration_seconds', "Time to produce a response, by Flask endpoint.",
+                            LATENCY_BUCKETS, ('endpoint', 'method'))
+REQUESTS = Counter('http_requests_total', "Responses by Flask endpoint and status code.", ('endpoint', 'status'))
+QUERY_SECONDS = Histogram('db_query_duration_seconds', "SQL statement execution time.", QUERY_BUCKETS)
+PDF_SECONDS = Histogram('pdf_generation_duration_seconds', "Time to render a PDF report (cache misses only).",
+                        PDF_SECONDS_BUCKETS, ('report_type',))
+PDF_BYTES = Histogram('pdf_size_bytes', "Size of rendered PDF reports.", PDF_BYTES_BUCKETS, ('report_type',))
+
+def observe_pdf(report_type, seconds, size):
+    report_type = report_type if report_type == 'tasks' else 'time'
+    PDF_SECONDS.observe(seconds, report_type=report_type)
+    PDF_BYTES.observe(size, report_type=report_type)
+
+def _sqlite_sizes(engine):
+    path = engine.url.database if engine.dialect.name == 'sqlite' else None
+    if not path or path == ':memory:':
+        return None
+    sizes = []
+    for file_path in (path, f"{path}-wal"):
+        try:
+            sizes.append(os.path.getsize(file_path))
+        except OSError:
+            sizes.append(0)
+    return sizes
+
+def init_app(app, db):
+    from models import FocusSession
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('monitoring_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        QUERY_SECONDS.observe(time.perf_counter() - conn.info['monitoring_started'].pop())
+
+    @app.before_request
+    def _start_request():
+        g.monitoring_started = time.perf_counter()
+
+    @app.after_request
+    def _count_request(response):
+        started = g.pop('monitoring_started', None)
+        # Unrouted paths share one label so scanners can't grow the series count
+        endpoint = request.endpoint or 'unmatched'
+        if started is not None:
+            REQUEST_SECONDS.observe(time.perf_counter() - started, endpoint=endpoint, method=request.method)
+        REQUESTS.inc(endpoint=endpoint, status=str(response.status_code))
+        return response
+
+    @app.route('/metrics')
+    def prometheus_metrics():
+        extra = [('worker', os.getpid())]
+        lines = []
+        for metric in (REQUEST_SECONDS, REQUESTS, QUERY_SECONDS, PDF_SECONDS, PDF_BYTES):
+            lines.extend(metric.expose(extra))
+        running = db.session.scalar(select(func.count(FocusSession.id)).where(FocusSession.end_time.is_(None)))
+        lines.extend(_gauge('active_focus_sessions', "Focus sessions currently running.", running, extra))
+        sizes = _sqlite_sizes(engine)
+        if sizes:
+            lines.extend(_gauge('sqlite_file_bytes', "Size of the SQLite database file.", sizes[0], extra))
+            lines.extend(_gauge('sqlite_wal_bytes', "Size of the SQLite write-ahead log.", sizes[1], extra))
+        return Response('\n'.join(lines) + '\n', content_type=CONTENT_TYPE)
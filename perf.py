@@ -0,0 +1,155 @@
+"""Opt-in per-request profiling (PERF_PROFILING=1).
+
+For every request this records the number of SQL statements and their
+total time, the slowest statement, template render time, serialization
+time (JSON responses, MessagePack, PDF output) and the response size. Each
+response carries them in a Server-Timing header, which browser dev tools
+show next to the request, and /debug/perf lists rolling percentiles per
+endpoint over the last WINDOW requests of this process.
+
+When profiling is off, nothing is hooked and span() costs one attribute
+lookup.
+"""
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+from flask import g, has_request_context, jsonify, render_template, request, template_rendered, before_render_template
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import event
+
+WINDOW = 500
+LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_lock = threading.Lock()
+enabled = False
+
+def _current():
+    return g.get('perf') if has_request_context() else None
+
+@contextmanager
+def span(name):
+    """Add the time spent in the block to the current request's `name` timing."""
+    perf = _current() if enabled else None
+    if perf is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        perf[name] += time.perf_counter() - started
+
+class TimedJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj, **kwargs):
+        with span('serialize'):
+            return super().dumps(obj, **kwargs)
+
+def percentile(values, fraction):
+    if not values:
+        return 0
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+def summary():
+    """Per endpoint: request count and percentiles over the rolling window."""
+    with _lock:
+        samples = {endpoint: list(entries) for endpoint, entries in _samples.items()}
+    rows = []
+    for endpoint, entries in sorted(samples.items()):
+        def column(key):
+            return [entry[key] for entry in entries]
+        slowest = max(entries, key=lambda entry: entry['slowest_ms'])
+        rows.append({
+            'endpoint': endpoint,
+            'count': len(entries),
+            'total_ms': {p: round(percentile(column('total_ms'), p / 100), 1) for p in (50, 95, 99)},
+            'queries': {p: percentile(column('queries'), p / 100) for p in (50, 95)},
+            'sql_ms_p95': round(percentile(column('sql_ms'), 0.95), 1),
+            'render_ms_p95': round(percentile(column('render_ms'), 0.95), 1),
+            'serialize_ms_p95': round(percentile(column('serialize_ms'), 0.95), 1),
+            'bytes_p50': percentile([b for b in column('bytes') if b is not None], 0.5),
+            'slowest_ms': round(slowest['slowest_ms'], 1),
+            'slowest_sql': slowest['slowest_sql'],
+        })
+    return rows
+
+def init_app(app, db):
+    global enabled
+    enabled = True
+    app.json = TimedJSONProvider(app)
+
+    @app.before_request
+    def _start_request():
+        g.perf = defaultdict(float, started=time.perf_counter(), queries=0, slowest=0.0, slowest_sql='')
+
+    @before_render_template.connect_via(app)
+    def _start_render(sender, template, context, **extra):
+        perf = _current()
+        if perf is not None:
+            perf['render_started'] = time.perf_counter()
+
+    @template_rendered.connect_via(app)
+    def _end_render(sender, template, context, **extra):
+        perf = _current()
+        if perf is not None and perf.get('render_started'):
+            perf['render'] += time.perf_counter() - perf.pop('render_started')
+
+    with app.app_context():
+        engine = db.engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _start_query(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('perf_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def _end_query(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['perf_started'].pop()
+        # Report jobs and other threads have no request to charge
+        perf = _current()
+        if perf is None:
+            return
+        perf['queries'] += 1
+        perf['sql'] += elapsed
+        if elapsed > perf['slowest']:
+            perf['slowest'] = elapsed
+            perf['slowest_sql'] = ' '.join(statement.split())[:300]
+
+    @app.after_request
+    def _finish_request(response):
+        perf = g.pop('perf', None)
+        if perf is None:
+            return response
+        total = time.perf_counter() - perf['started']
+        size = None if response.is_streamed else response.calculate_content_length()
+        response.headers.add('Server-Timing', ', '.join([
+            f'db;dur={perf["sql"] * 1000:.1f};desc="{perf["queries"]} queries"',
+            f'render;dur={perf["render"] * 1000:.1f}',
+            f'serialize;dur={perf["serialize"] * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ]))
+        if request.endpoint and request.endpoint != 'debug_perf':
+            with _lock:
+                _samples[request.endpoint].append({
+                    'total_ms': total * 1000,
+                    'queries': perf['queries'],
+                    'sql_ms': perf['sql'] * 1000,
+                    'render_ms': perf['render'] * 1000,
+                    'serialize_ms': perf['serialize'] * 1000,
+                    'bytes': size,
+                    'slowest_ms': perf['slowest'] * 1000,
+                    'slowest_sql': perf['slowest_sql'],
+                })
+        return response
+
+    @app.route('/debug/perf')
+    def debug_perf():
+        # Statements can contain data: only answer on this machine
+        if request.remote_addr not in LOCAL_ADDRESSES:
+            return jsonify({'error': 'Only available locally'}), 403
+        rows = summary()
+        if request.args.get('format') == 'json':
+            return jsonify(rows)
+        return render_template('debug_perf.html', rows=rows, window=WINDOW)
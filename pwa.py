@@ -0,0 +1,59 @@
+"""Installable, offline-capable app: web app manifest and service worker.
+
+The service worker (templates/sw.js) is served from the site root so its
+scope covers every page. It precaches the app shell: the scripts and
+stylesheets of the current asset build, every translation bundle and the
+icons. The cache is named after a digest of the shell and of the worker
+itself, so a deploy installs a new worker, which drops the old cache.
+Pages and /api/metrics/data and /summary answers are cached as they are fetched and
+served from the cache when the server can't be reached.
+
+Writes don't go through the worker's fetch handler: pages queue them in
+the IndexedDB outbox (static/outbox.js) and the worker only replays that
+outbox on background sync.
+"""
+import hashlib
+import json
+import os
+
+from flask import jsonify, render_template, url_for
+
+import assets
+import i18n
+
+ICONS = (('icon-192.png', '192x192'), ('icon-512.png', '512x512'))
+
+def init_app(app):
+    with open(os.path.join(app.root_path, app.template_folder, 'sw.js'), 'rb') as f:
+        worker_source = f.read()
+
+    @app.route('/sw.js')
+    def service_worker():
+        shell = [assets.asset_url(name) for name in assets.asset_names(app.static_folder)]
+        shell += [url_for('i18n_bundle', filename=i18n.bundle_filename(lang)) for lang in i18n.BUNDLES]
+        shell += [url_for('static', filename=name) for name in ('favicon.svg', *(icon for icon, _ in ICONS))]
+        version = hashlib.sha256(json.dumps(shell).encode() + worker_source).hexdigest()[:12]
+        response = app.make_response(render_template(
+            'sw.js', version=version, shell=shell, outbox_url=assets.asset_url('outbox.js')
+        ))
+        response.mimetype = 'application/javascript'
+        # Browsers check for a new worker on navigation; never answer from a cache
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+
+    @app.route('/manifest.webmanifest')
+    def web_manifest():
+        t = i18n.catalog(i18n.DEFAULT_LOCALE)
+        response = jsonify({
+            'name': t['app_name'],
+            'short_name': t['app_name'],
+            'start_url': '/',
+            'scope': '/',
+            'display': 'standalone',
+            'background_color': '#0f172a',
+            'theme_color': '#0f172a',
+            'icons': [{'src': url_for('static', filename=icon), 'sizes': sizes, 'type': 'image/png'}
+                      for icon, sizes in ICONS],
+        })
+        response.mimetype = 'application/manifest+json'
+        return response
@@ -0,0 +1,141 @@
+"""In-process registry of tags (by name) and supertags (by color).
+
+Tags are looked up on every task write and for every report, but change
+rarely. The registry loads both tables once and is kept up to date from the
+session: rows written by a transaction are applied when it commits, and
+dropped if it rolls back. Writes made by other worker processes are noticed
+through the table versions, checked at most every CHECK_SECONDS.
+
+Entries are plain TagInfo / SuperTagInfo tuples, safe to share between
+threads; attach_tag() turns one into a session-bound Tag without a query.
+"""
+import threading
+import time
+from collections import namedtuple
+from itertools import chain
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import make_transient_to_detached
+
+from models import db, Tag, SuperTag
+from changes import table_versions
+
+CHECK_SECONDS = 5
+
+TagInfo = namedtuple('TagInfo', 'id name color')
+SuperTagInfo = namedtuple('SuperTagInfo', 'id color name')
+
+_lock = threading.Lock()
+_tags = None          # name -> TagInfo
+_supertags = None     # color -> SuperTagInfo
+_versions = None
+_checked_at = 0
+
+def _load():
+    global _tags, _supertags, _versions, _checked_at
+    versions, _ = table_versions(('tag', 'super_tag'))
+    tags = {t.name: TagInfo(t.id, t.name, t.color) for t in db.session.execute(select(Tag)).scalars()}
+    supertags = {st.color: SuperTagInfo(st.id, st.color, st.name)
+                 for st in db.session.execute(select(SuperTag)).scalars()}
+    with _lock:
+        _tags, _supertags, _versions = tags, supertags, versions
+        _checked_at = time.monotonic()
+
+def _current():
+    """(tags, supertags) maps, reloading if empty or changed by another process."""
+    global _checked_at
+    if _tags is None:
+        _load()
+    elif time.monotonic() - _checked_at >= CHECK_SECONDS:
+        versions, _ = table_versions(('tag', 'super_tag'))
+        if versions != _versions:
+            _load()
+        else:
+            _checked_at = time.monotonic()
+    return _tags, _supertags
+
+def tags():
+    """All tags, ordered by id."""
+    return sorted(_current()[0].values(), key=lambda t: t.id)
+
+def supertags():
+    """All supertags, ordered by id."""
+    return sorted(_current()[1].values(), key=lambda st: st.id)
+
+def tag_by_name(name):
+    return _current()[0].get(name)
+
+def supertag_by_color(color):
+    return _current()[1].get(color)
+
+def attach_tag(name):
+    """The Tag named `name` in the current session, created if it doesn't exist."""
+    info = tag_by_name(name)
+    if info is not None and ('tag', info.id) in _pending(db.session):
+        info = None  # renamed or deleted by this transaction
+    if info is None:
+        # May have been added earlier in this transaction (a batch, a rollback) and not be
+        # committed yet: autoflush finds it
+        tag = db.session.execute(select(Tag).filter_by(name=name)).scalar_one_or_none()
+        if tag is None:
+            tag = Tag(name=name)
+            db.session.add(tag)
+        return tag
+    tag = Tag(id=info.id, name=info.name, color=info.color)
+    make_transient_to_detached(tag)
+    return db.session.merge(tag, load=False)
+
+def attach_supertag(color):
+    """The SuperTag of `color` in the current session, or None."""
+    info = supertag_by_color(color)
+    if info is None:
+        return None
+    super_tag = SuperTag(id=info.id, color=info.color, name=info.name)
+    make_transient_to_detached(super_tag)
+    return db.session.merge(super_tag, load=False)
+
+def _pending(session):
+    return session.info.setdefault('registry_writes', {})
+
+@event.listens_for(db.session, 'after_flush')
+def _collect(session, flush_context):
+    pending = _pending(session)
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, Tag):
+            pending[('tag', obj.id)] = TagInfo(obj.id, obj.name, obj.color)
+        elif isinstance(obj, SuperTag):
+            pending[('super_tag', obj.id)] = SuperTagInfo(obj.id, obj.color, obj.name)
+    for obj in session.deleted:
+        if isinstance(obj, Tag):
+            pending[('tag', obj.id)] = None
+        elif isinstance(obj, SuperTag):
+            pending[('super_tag', obj.id)] = None
+
+@event.listens_for(db.session, 'after_commit')
+def _write_through(session):
+    global _tags, _supertags, _versions
+    pending = session.info.pop('registry_writes', None)
+    if not pending:
+        return
+    with _lock:
+        if _tags is None:
+            return
+        tags, supertags = dict(_tags), dict(_supertags)
+        for (kind, row_id), info in pending.items():
+            # Drop the row under its old key (renames, deletes) before re-adding it
+            if kind == 'tag':
+                tags = {name: t for name, t in tags.items() if t.id != row_id}
+                if info:
+                    tags[info.name] = info
+            else:
+                supertags = {color: st for color, st in supertags.items() if st.id != row_id}
+                if info:
+                    supertags[info.color] = info
+        # Swapped, not mutated: readers keep whichever maps they already fetched
+        _tags, _supertags = tags, supertags
+        # Our own commit bumped the table versions; the next check reloads once
+        _versions = None
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop('registry_writes', None)
@@ -0,0 +1,211 @@
+"""Per-day rollups of work, pause and focus minutes.
+
+Any flush that touches a DailySession or one of its children (task, pause,
+focus session, focus pause) marks that session dirty, and its DailyRollup /
+DailyTagRollup rows are recomputed before the transaction commits. Metrics
+and reports can then read one row per day instead of re-scanning intervals.
+"""
+import hashlib
+from itertools import chain
+
+from sqlalchemy import event, delete, func, inspect, select, update
+from sqlalchemy.orm import selectinload
+
+from models import db, DailySession, Task, Pause, FocusSession, FocusPause, DailyRollup, DailyTagRollup
+
+REBUILD_CHUNK = 500
+
+def sum_pause_minutes(pauses):
+    total = 0
+    for pause in pauses:
+        if pause.start_time and pause.end_time:
+            total += int((pause.end_time - pause.start_time).total_seconds() / 60)
+    return total
+
+def sum_focus_pause_minutes(pauses):
+    total = 0
+    for pause in pauses:
+        if pause.start_time and pause.end_time:
+            total += int((pause.end_time - pause.start_time).total_seconds() / 60)
+    return total
+
+def focus_minutes(fs):
+    """Worked minutes of a finished focus session (0 while it is still running)."""
+    if not fs.start_time or not fs.end_time:
+        return 0
+    duration = (fs.end_time - fs.start_time).total_seconds() / 60
+    return max(duration - sum_focus_pause_minutes(fs.pauses), 0)
+
+def session_minutes(session):
+    """(work, pause, total) minutes for a session, as shown in the time report."""
+    if not session.start_time or not session.end_time:
+        return 0, 0, 0
+    total_minutes = int((session.end_time - session.start_time).total_seconds() / 60)
+    if session.status != "work":
+        return total_minutes, 0, total_minutes
+    pause_minutes = sum_pause_minutes(session.pauses)
+    return max(total_minutes - pause_minutes, 0), pause_minutes, total_minutes
+
+def compute_tag_rollups(session):
+    """Map tag_id (None for untagged) -> focus minutes and task counts for one session."""
+    per_tag = {}
+
+    def bucket(tag_id):
+        return per_tag.setdefault(tag_id, {'focus_minutes': 0, 'task_total': 0, 'task_completed': 0})
+
+    for fs in session.focus_sessions:
+        minutes = focus_minutes(fs)
+        if not minutes:
+            continue
+        tag_ids = [tag.id for tag in fs.task.tags] if fs.task and fs.task.tags else [None]
+        for tag_id in tag_ids:
+            bucket(tag_id)['focus_minutes'] += minutes / len(tag_ids)
+
+    for task in session.tasks:
+        tag_ids = [tag.id for tag in task.tags] if task.tags else [None]
+        for tag_id in tag_ids:
+            entry = bucket(tag_id)
+            entry['task_total'] += 1
+            if task.is_completed:
+                entry['task_completed'] += 1
+    return per_tag
+
+def refresh_rollups(session, session_ids):
+    """Recompute the rollup rows of the given DailySession ids inside `session`."""
+    session_ids = {sid for sid in session_ids if sid is not None}
+    if not session_ids:
+        return
+
+    sessions = session.execute(
+        select(DailySession)
+        .where(DailySession.id.in_(session_ids))
+        .options(
+            selectinload(DailySession.pauses),
+            selectinload(DailySession.tasks).selectinload(Task.tags),
+            selectinload(DailySession.focus_sessions).selectinload(FocusSession.pauses),
+            selectinload(DailySession.focus_sessions).selectinload(FocusSession.task).selectinload(Task.tags),
+        )
+        .execution_options(populate_existing=True)
+    ).scalars().all()
+    existing = {
+        r.session_id: r for r in session.execute(
+            select(DailyRollup).where(DailyRollup.session_id.in_(session_ids))
+        ).scalars()
+    }
+    session.execute(delete(DailyTagRollup).where(DailyTagRollup.session_id.in_(session_ids)))
+
+    for s in sessions:
+        rollup = existing.pop(s.id, None)
+        if rollup is None:
+            rollup = DailyRollup(session_id=s.id)
+            session.add(rollup)
+        work, pause, total = session_minutes(s)
+        rollup.date = s.date
+        rollup.status = s.status
+        rollup.work_minutes = work
+        rollup.pause_minutes = pause
+        rollup.total_minutes = total
+        rollup.focus_minutes = sum(focus_minutes(fs) for fs in s.focus_sessions)
+        rollup.task_total = len(s.tasks)
+        rollup.task_completed = sum(1 for t in s.tasks if t.is_completed)
+        rollup.revision = (rollup.revision or 0) + 1
+        for tag_id, values in compute_tag_rollups(s).items():
+            session.add(DailyTagRollup(session_id=s.id, date=s.date, tag_id=tag_id, **values))
+
+    # Sessions that no longer exist
+    for rollup in existing.values():
+        session.delete(rollup)
+
+def rebuild_rollups():
+    """Recompute every rollup from the raw tables. Returns the number of sessions processed."""
+    session_ids = db.session.execute(select(DailySession.id).order_by(DailySession.id)).scalars().all()
+    db.session.execute(delete(DailyTagRollup))
+    db.session.execute(delete(DailyRollup).where(DailyRollup.session_id.notin_(session_ids)))
+    for i in range(0, len(session_ids), REBUILD_CHUNK):
+        refresh_rollups(db.session, session_ids[i:i + REBUILD_CHUNK])
+        db.session.flush()
+    db.session.commit()
+    return len(session_ids)
+
+def ensure_rollups():
+    """Backfill rollups for databases created before they existed."""
+    sessions = db.session.scalar(select(func.count(DailySession.id)))
+    rollups = db.session.scalar(select(func.count(DailyRollup.id)))
+    if sessions != rollups:
+        rebuild_rollups()
+
+def range_fingerprint(start_date, end_date):
+    """Digest of the rollup revisions of every session in the range.
+
+    Changes whenever a session in the range is added, removed, recomputed or
+    has its tasks reordered, and only then.
+    """
+    rows = db.session.execute(
+        select(DailyRollup.session_id, DailyRollup.revision)
+        .where(DailyRollup.date.between(start_date, end_date))
+        .order_by(DailyRollup.session_id)
+    ).all()
+    return hashlib.sha256(';'.join(f"{sid}:{rev}" for sid, rev in rows).encode()).hexdigest()
+
+def bump_revisions(session, session_ids):
+    """Change the fingerprint of days whose figures stay the same but whose reports don't (task order)."""
+    session.execute(
+        update(DailyRollup).where(DailyRollup.session_id.in_(session_ids))
+        .values(revision=func.coalesce(DailyRollup.revision, 0) + 1)
+        .execution_options(synchronize_session=False)
+    )
+
+def mark_sessions_dirty(session, session_ids):
+    """Queue rollup refreshes for changes the ORM does not see (bulk UPDATE/DELETE)."""
+    session.info.setdefault('rollup_sessions', set()).update(session_ids)
+
+def _pending(session):
+    return session.info.setdefault('rollup_sessions', set()), session.info.setdefault('rollup_focus', set())
+
+@event.listens_for(db.session, 'before_flush')
+def _collect_deleted(session, flush_context, instances):
+    # Deleted rows must be read before the DELETE is emitted
+    session_ids, focus_ids = _pending(session)
+    for obj in session.deleted:
+        if isinstance(obj, DailySession):
+            session_ids.add(obj.id)
+        elif isinstance(obj, (Task, Pause, FocusSession)):
+            session_ids.add(obj.session_id)
+        elif isinstance(obj, FocusPause):
+            focus_ids.add(obj.focus_session_id)
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changed(session, flush_context):
+    # New rows only have their ids and foreign keys once flushed
+    session_ids, focus_ids = _pending(session)
+    for obj in chain(session.new, session.dirty):
+        if isinstance(obj, DailySession):
+            session_ids.add(obj.id)
+        elif isinstance(obj, (Task, Pause, FocusSession)):
+            session_ids.add(obj.session_id)
+            # A task moved to another day also changes the day it left
+            session_ids.update(inspect(obj).attrs.session_id.history.deleted or ())
+        elif isinstance(obj, FocusPause):
+            focus_ids.add(obj.focus_session_id)
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _apply_pending(session, flush_context):
+    apply_pending(session)
+
+def apply_pending(session):
+    """Refresh the rollups of sessions queued so far, without waiting for a flush."""
+    session_ids, focus_ids = _pending(session)
+    if focus_ids:
+        session_ids.update(session.execute(
+            select(FocusSession.session_id).where(FocusSession.id.in_(focus_ids))
+        ).scalars())
+    pending = set(session_ids)
+    session_ids.clear()
+    focus_ids.clear()
+    # Changes made here are picked up by the next flush of the same commit
+    refresh_rollups(session, pending)
+
+@event.listens_for(db.session, 'after_soft_rollback')
+def _discard_pending(session, previous_transaction):
+    session.info.pop('rollup_sessions', None)
+    session.info.pop('rollup_focus', None)
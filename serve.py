@@ -0,0 +1,68 @@
+"""Production entry point, as opposed to the debug server of `python app.py`.
+
+    python serve.py [--bind 127.0.0.1:5000] [--workers N] [--threads N]
+
+Uses gunicorn (Linux/macOS) when it is installed: N worker processes with
+a pool of threads each, so the long-lived /api/events streams don't tie up
+a whole worker. Otherwise falls back to waitress, which also runs on
+Windows but in a single process, so only --threads applies.
+
+Run `flask --app app migrate` first: workers only check the schema version.
+Static assets are fingerprinted and compressed (assets.py) before starting.
+"""
+import argparse
+import importlib.util
+import os
+
+def default_workers():
+    return min(2 * (os.cpu_count() or 1) + 1, 8)
+
+def run_gunicorn(bind, workers, threads):
+    from gunicorn.app.base import BaseApplication
+
+    class Server(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', bind)
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+
+        def load(self):
+            # Imported in each worker, so none of them shares a database connection
+            from app import app
+            return app
+
+    Server().run()
+
+def run_waitress(bind, threads):
+    from waitress import serve
+    from app import app
+    serve(app, listen=bind, threads=threads)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--bind', default=os.environ.get('BIND', '127.0.0.1:5000'))
+    parser.add_argument('--workers', type=int, default=int(os.environ.get('WORKERS', default_workers())))
+    parser.add_argument('--threads', type=int, default=int(os.environ.get('THREADS', 8)))
+    parser.add_argument('--server', choices=('auto', 'gunicorn', 'waitress'), default='auto')
+    args = parser.parse_args()
+
+    import assets
+    assets.build(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static'))
+
+    server = args.server
+    if server == 'auto':
+        if importlib.util.find_spec('gunicorn') and os.name != 'nt':
+            server = 'gunicorn'
+        elif importlib.util.find_spec('waitress'):
+            server = 'waitress'
+        else:
+            parser.error("install gunicorn (Linux/macOS) or waitress to serve in production")
+
+    if server == 'gunicorn':
+        run_gunicorn(args.bind, args.workers, args.threads)
+    else:
+        run_waitress(args.bind, args.threads)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Copy-on-write dashboard snapshots, shared by every worker process.
+
+Opening a dashboard only hands out a new generation token for the day, in a
+cookie; nothing is copied yet. The first write to that day carrying the
+token (a flush touching the session, its tasks or its pauses, or a bulk
+statement reported through before_change()) saves the day's last committed
+state under the token. Later writes of the same generation find it and
+skip. /api/session/rollback restores the snapshot of the caller's
+generation, so discarding right after opening a page is a no-op.
+
+Snapshots are saved in the transaction of the write that triggered them,
+and read from a separate connection, which only sees committed data:
+the state before the current request, whenever in the request it runs.
+They expire after TTL_SECONDS, and only the MAX_SNAPSHOTS most recent are
+kept.
+"""
+import json
+import uuid
+from datetime import datetime, timedelta
+
+from flask import has_request_context, request
+from sqlalchemy import delete, event, select
+
+from models import db, DailySession, Task, Pause, DashboardSnapshot, task_tags, Tag
+
+TTL_SECONDS = 12 * 3600
+MAX_SNAPSHOTS = 500
+COOKIE_PREFIX = 'snapshot_'
+
+snapshot_table = DashboardSnapshot.__table__
+
+def new_generation():
+    return uuid.uuid4().hex
+
+def cookie_name(session_id):
+    return f"{COOKIE_PREFIX}{session_id}"
+
+def request_generation(session_id):
+    """Generation token the current request carries for a session, or None."""
+    if not has_request_context():
+        return None
+    return request.cookies.get(cookie_name(session_id))
+
+def _committed_state(session_id):
+    """The session as last committed, in the snapshot format."""
+    with db.engine.connect() as conn:
+        row = conn.execute(
+            select(DailySession.goal, DailySession.status, DailySession.start_time, DailySession.end_time)
+            .where(DailySession.id == session_id)
+        ).one_or_none()
+        if row is None:
+            return None
+        tasks = conn.execute(
+            select(Task.id, Task.description, Task.is_completed, Task.order)
+            .where(Task.session_id == session_id).order_by(Task.order, Task.id)
+        ).all()
+        tag_names = {}
+        for task_id, name in conn.execute(
+            select(task_tags.c.task_id, Tag.name).join(Tag, Tag.id == task_tags.c.tag_id)
+            .where(task_tags.c.task_id.in_([t.id for t in tasks]))
+        ):
+            tag_names.setdefault(task_id, []).append(name)
+        pauses = conn.execute(
+            select(Pause.id, Pause.start_time, Pause.end_time)
+            .where(Pause.session_id == session_id).order_by(Pause.start_time, Pause.id)
+        ).all()
+
+    def iso(value):
+        return value.isoformat() if value else None
+    return {
+        'goal': row.goal,
+        'status': row.status,
+        'start_time': iso(row.start_time),
+        'end_time': iso(row.end_time),
+        'tasks': [{'id': t.id, 'description': t.description, 'is_completed': t.is_completed,
+                   'order': t.order, 'tags': tag_names.get(t.id, [])} for t in tasks],
+        'pauses': [{'id': p.id, 'start_time': iso(p.start_time), 'end_time': iso(p.end_time)} for p in pauses],
+    }
+
+def before_change(session, session_ids):
+    """Snapshot the given days if this is the first write of the request's generation."""
+    for session_id in session_ids:
+        generation = request_generation(session_id)
+        if not generation:
+            continue
+        stored = session.execute(
+            select(snapshot_table.c.generation).where(snapshot_table.c.session_id == session_id)
+        ).scalar()
+        if stored == generation:
+            continue
+        data = _committed_state(session_id)
+        if data is None:
+            # Created by this request, nothing to go back to
+            continue
+        now = datetime.now()
+        session.execute(delete(snapshot_table).where(snapshot_table.c.session_id == session_id))
+        session.execute(snapshot_table.insert().values(
+            session_id=session_id, generation=generation, data=json.dumps(data), created_at=now
+        ))
+        _evict(session, now)
+
+def load(session, session_id, generation):
+    """The snapshot saved for this generation, or None if there is none or it expired."""
+    cutoff = datetime.now() - timedelta(seconds=TTL_SECONDS)
+    data = session.execute(select(snapshot_table.c.data).where(
+        snapshot_table.c.session_id == session_id,
+        snapshot_table.c.generation == generation,
+        snapshot_table.c.created_at >= cutoff,
+    )).scalar()
+    return json.loads(data) if data is not None else None
+
+def discard(session, session_id):
+    session.execute(delete(snapshot_table).where(snapshot_table.c.session_id == session_id))
+
+def _evict(session, now):
+    session.execute(delete(snapshot_table).where(
+        snapshot_table.c.created_at < now - timedelta(seconds=TTL_SECONDS)
+    ))
+    # Beyond the size bound, drop the oldest
+    keep = select(snapshot_table.c.session_id).order_by(snapshot_table.c.created_at.desc()).limit(MAX_SNAPSHOTS)
+    session.execute(delete(snapshot_table).where(snapshot_table.c.session_id.not_in(keep)))
+
+def _owner(obj):
+    if isinstance(obj, DailySession):
+        return obj.id
+    if isinstance(obj, (Task, Pause)):
+        return obj.session_id if obj.session_id is not None else getattr(obj.session, 'id', None)
+    return None
+
+@event.listens_for(db.session, 'before_flush')
+def _snapshot_before_flush(session, flush_context, instances):
+    if not has_request_context() or not any(name.startswith(COOKIE_PREFIX) for name in request.cookies):
+        return
+    session_ids = {_owner(obj) for obj in (*session.new, *session.dirty, *session.deleted)}
+    session_ids.discard(None)
+    before_change(session, session_ids)
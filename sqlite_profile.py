@@ -0,0 +1,86 @@
+"""SQLite tuning: connection pragmas, secondary indexes and a query plan check.
+
+PRAGMAS_PROFILES are applied to every new connection. "performance" (the
+default) switches to WAL so readers never block the writer, relaxes fsyncs
+to synchronous=NORMAL (still safe against corruption, a power cut may lose
+the last commits) and gives each connection a larger page cache and a
+memory map. "durable" keeps WAL but fsyncs every commit; "none" leaves
+SQLite's defaults.
+
+The indexes themselves are declared on the models; ensure_indexes() adds
+the ones an older database is missing, and check_query_plans() runs the hot
+queries through EXPLAIN QUERY PLAN to confirm they use them.
+"""
+from sqlalchemy import event, inspect, text
+
+from models import db
+
+PRAGMAS_PROFILES = {
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -32000,         # KiB, i.e. 32 MB per connection
+        'mmap_size': 268435456,       # 256 MB
+        'busy_timeout': 5000,         # ms to wait for the write lock
+        'temp_store': 'MEMORY',
+    },
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'busy_timeout': 5000,
+    },
+    'none': {},
+}
+
+# (label, SQL) of the queries behind the index, dashboard, focus and report pages
+HOT_QUERIES = [
+    ('session by date', "SELECT id FROM daily_session WHERE date = '2024-01-01'"),
+    ('session range', "SELECT id FROM daily_session WHERE date BETWEEN '2024-01-01' AND '2024-01-31' ORDER BY date"),
+    ('history page', "SELECT id FROM daily_session WHERE date < '2024-01-31' ORDER BY date DESC, id DESC LIMIT 51"),
+    ('tasks of sessions', 'SELECT id FROM task WHERE session_id IN (1, 2) ORDER BY session_id, "order"'),
+    ('pauses of sessions', "SELECT id FROM pause WHERE session_id IN (1, 2) ORDER BY session_id, start_time"),
+    ('focus sessions of sessions', "SELECT id FROM focus_session WHERE session_id IN (1, 2) ORDER BY session_id, id"),
+    ('focus sessions of task', "SELECT id FROM focus_session WHERE task_id = 1 ORDER BY start_time DESC"),
+    ('active focus session', "SELECT id FROM focus_session WHERE session_id = 1 AND task_id = 1 AND end_time IS NULL"),
+    ('focus pauses', "SELECT id FROM focus_pause WHERE focus_session_id IN (1, 2) ORDER BY focus_session_id, start_time"),
+    ('open focus pause', "SELECT id FROM focus_pause WHERE focus_session_id = 1 AND end_time IS NULL"),
+    ('tag by name', "SELECT id FROM tag WHERE name = 'x'"),
+    ('tasks of tag', "SELECT task_id FROM task_tags WHERE tag_id IN (1, 2)"),
+    ('change log pruning', "SELECT id FROM change_log WHERE created_at < '2024-01-01'"),
+]
+
+def install_pragmas(engine, pragmas):
+    """Run `PRAGMA name = value` for each pragma on every new connection of engine."""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def _apply(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name} = {value}")
+        cursor.close()
+
+def ensure_indexes():
+    """Create the model indexes missing from an existing database. Returns their names."""
+    inspector = inspect(db.engine)
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.engine)
+                created.append(index.name)
+    return created
+
+def check_query_plans():
+    """[(label, plan, uses_index)] for HOT_QUERIES. A full table scan counts as a miss."""
+    results = []
+    for label, sql in HOT_QUERIES:
+        rows = db.session.execute(text(f"EXPLAIN QUERY PLAN {sql}")).all()
+        plan = '; '.join(row[-1] for row in rows)
+        scans = [row[-1] for row in rows if row[-1].startswith('SCAN') and 'INDEX' not in row[-1]]
+        results.append((label, plan, not scans))
+    return results
@@ -0,0 +1,398 @@
+let timerInterval = null;
+// Pause state, changed locally when a pause is toggled offline
+let paused = ACTIVE_PAUSE;
+let pausedSeconds = ACTIVE_PAUSE_SECONDS;
+let pausedAt = ACTIVE_PAUSE ? Date.now() : null;
+const activeStart = ACTIVE_START_ISO ? new Date(ACTIVE_START_ISO) : null;
+
+function parsePomodoro(value) {
+    if (!value || value === 'off') return null;
+    const parts = value.split('/');
+    if (parts.length !== 2) return null;
+    const work = parseInt(parts[0], 10);
+    const rest = parseInt(parts[1], 10);
+    if (isNaN(work) || isNaN(rest)) return null;
+    return { work, rest };
+}
+
+function updateTimerDisplay(totalSeconds) {
+    const hours = Math.floor(totalSeconds / 3600);
+    const minutes = Math.floor((totalSeconds % 3600) / 60);
+    const seconds = totalSeconds % 60;
+    document.getElementById('timerDisplay').textContent =
+        `${hours.toString().padStart(2, '0')}:${minutes.toString().padStart(2, '0')}:${seconds.toString().padStart(2, '0')}`;
+
+    // Update Progress Bar
+    const progressCircle = document.getElementById('timerProgress');
+    const circumference = 2 * Math.PI * 46; // r=46
+
+    if (ACTIVE_POMODORO) {
+        const config = parsePomodoro(ACTIVE_POMODORO);
+        if (config) {
+            const targetSeconds = config.work * 60;
+            const percentage = Math.min(totalSeconds / targetSeconds, 1);
+            const offset = circumference - (percentage * circumference);
+            progressCircle.style.strokeDasharray = circumference;
+            progressCircle.style.strokeDashoffset = offset;
+
+            // Change color if over time?
+            if (totalSeconds >= targetSeconds) {
+                progressCircle.style.stroke = 'var(--success)';
+            } else {
+                progressCircle.style.stroke = 'var(--accent)';
+            }
+        }
+    } else {
+        // If no pomodoro, maybe just a slow circular pulse or 1-hour wrap
+        const percentage = (totalSeconds % 3600) / 3600;
+        const offset = circumference - (percentage * circumference);
+        progressCircle.style.strokeDasharray = circumference;
+        progressCircle.style.strokeDashoffset = offset;
+        progressCircle.style.stroke = 'var(--accent)';
+    }
+}
+
+function stopTimer() {
+    if (timerInterval) {
+        clearInterval(timerInterval);
+        timerInterval = null;
+    }
+}
+
+function requestNotificationPermission() {
+    if (!('Notification' in window)) return;
+    if (Notification.permission === 'default') {
+        Notification.requestPermission();
+    }
+}
+
+function notifyUser(title, body) {
+    if ('Notification' in window && Notification.permission === 'granted') {
+        new Notification(title, { body });
+    } else {
+        alert(body);
+    }
+}
+
+function getPausedSeconds() {
+    if (!paused || !pausedAt) return pausedSeconds;
+    return pausedSeconds + Math.floor((Date.now() - pausedAt) / 1000);
+}
+
+function startLiveCounter() {
+    if (!activeStart) {
+        updateTimerDisplay(0);
+        return;
+    }
+    stopTimer();
+    timerInterval = setInterval(() => {
+        const elapsed = Math.max(0, Math.floor((Date.now() - activeStart) / 1000) - getPausedSeconds());
+        updateTimerDisplay(elapsed);
+        // Pomodoro break notification
+        if (ACTIVE_POMODORO) {
+            const config = parsePomodoro(ACTIVE_POMODORO);
+            if (config && elapsed === (config.work * 60)) {
+                notifyUser('Pomodoro', `Break time: ${config.rest} min`);
+            }
+        }
+    }, 1000);
+}
+
+async function startFocus() {
+    const pomodoro = document.getElementById('pomodoroSelect').value;
+    const note = document.getElementById('focusNote').value.trim();
+    // Needs the server's id for the timer, so not queued offline
+    await flushBatch();
+    const res = await fetch('/api/focus/start', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+            session_id: SESSION_ID,
+            task_id: TASK_ID,
+            pomodoro_mode: pomodoro !== 'off' ? pomodoro : null,
+            note: note || null
+        })
+    });
+    if (res.ok) {
+        window.location.reload();
+    } else {
+        const data = await res.json();
+        alert(data.error || 'Failed to start focus');
+    }
+}
+
+async function stopFocus() {
+    if (!ACTIVE_FOCUS_ID) return;
+    // `at`: replayed later from the outbox, the stop keeps the time it was clicked
+    const res = await batchPost('/api/focus/stop', { focus_session_id: ACTIVE_FOCUS_ID, at: new Date().toISOString() }, { immediate: true });
+    if (res.queued) {
+        stopTimer();
+        document.body.classList.remove('focus-active');
+        document.getElementById('pauseBtn').disabled = true;
+    } else if (res.ok) {
+        stopTimer();
+        window.location.reload();
+    } else {
+        alert('Failed to stop focus');
+    }
+}
+
+async function togglePause() {
+    if (!ACTIVE_FOCUS_ID) return;
+    const endpoint = paused ? '/api/focus/pause/end' : '/api/focus/pause/start';
+    const res = await batchPost(endpoint, { focus_session_id: ACTIVE_FOCUS_ID, at: new Date().toISOString() }, { immediate: true });
+    if (res.queued) {
+        // Offline: keep the timer right locally
+        pausedSeconds = getPausedSeconds();
+        paused = !paused;
+        pausedAt = paused ? Date.now() : null;
+        document.getElementById('pauseBtn').textContent = i18n[paused ? 'resume_focus' : 'pause_focus'];
+    } else if (res.ok) {
+        window.location.reload();
+    } else {
+        alert('Failed to toggle pause');
+    }
+}
+
+function initFocusUi() {
+    requestNotificationPermission();
+    if (ACTIVE_POMODORO) {
+        document.getElementById('pomodoroSelect').value = ACTIVE_POMODORO;
+    }
+    if (ACTIVE_NOTE) {
+        document.getElementById('focusNote').value = ACTIVE_NOTE;
+    }
+    if (ACTIVE_PAUSE) {
+        document.getElementById('pauseBtn').textContent = i18n['resume_focus'];
+    }
+    if (ACTIVE_FOCUS_ID) {
+        document.body.classList.add('focus-active');
+        document.getElementById('startBtn').style.display = 'none';
+    }
+    if (ACTIVE_POMODORO) {
+        const config = parsePomodoro(ACTIVE_POMODORO);
+        if (config) {
+            document.getElementById('timerLabel').textContent = `${config.work} min`;
+        }
+    }
+    startLiveCounter();
+}
+
+function normalizeTimeInput(value) {
+    if (!value) return null;
+    const trimmed = value.trim();
+    const onlyHours = trimmed.match(/^([01]?\d|2[0-3])$/);
+    if (onlyHours) {
+        const h = onlyHours[1].padStart(2, '0');
+        return `${h}:00`;
+    }
+    const withColon = trimmed.match(/^([01]?\d|2[0-3]):([0-5]?\d)$/);
+    if (withColon) {
+        const h = withColon[1].padStart(2, '0');
+        const m = withColon[2].padStart(2, '0');
+        return `${h}:${m}`;
+    }
+    return null;
+}
+
+function normalizeDurationInput(value) {
+    if (!value) return null;
+    const trimmed = value.trim();
+    const minutesOnly = trimmed.match(/^\d+$/);
+    if (minutesOnly) {
+        const m = minutesOnly[0].padStart(2, '0');
+        return `00:${m}:00`;
+    }
+    const mmss = trimmed.match(/^(\d{1,2}):([0-5]?\d)$/);
+    if (mmss) {
+        const m = mmss[1].padStart(2, '0');
+        const s = mmss[2].padStart(2, '0');
+        return `00:${m}:${s}`;
+    }
+    const hhmmss = trimmed.match(/^(\d{1,2}):([0-5]?\d):([0-5]?\d)$/);
+    if (hhmmss) {
+        const h = hhmmss[1].padStart(2, '0');
+        const m = hhmmss[2].padStart(2, '0');
+        const s = hhmmss[3].padStart(2, '0');
+        return `${h}:${m}:${s}`;
+    }
+    return null;
+}
+
+async function saveFocusPauseTotal(row) {
+    const focusId = row.getAttribute('data-focus-id');
+    const input = row.querySelector('.focus-pause-total');
+    const duration = normalizeDurationInput(input.value);
+    if (duration) input.value = duration;
+
+    const res = await batchPost('/api/focus/pause_total', {
+        focus_session_id: focusId,
+        duration: duration
+    });
+
+    if (res.ok) {
+        localWrites.set(String(focusId), Date.now());
+        // Visual feedback
+        const originalColor = input.style.color;
+        input.style.color = 'var(--success)';
+        setTimeout(() => {
+            input.style.color = originalColor;
+        }, 500);
+    } else {
+        const data = await res.json();
+        alert((data && data.error) || 'Failed to save');
+    }
+}
+
+async function saveFocusRow(row) {
+    const focusId = row.getAttribute('data-focus-id');
+    const inputs = row.querySelectorAll('input, select');
+    const rowDate = row.getAttribute('data-date');
+
+    const startInput = row.querySelector('.focus-start-input');
+    const endInput = row.querySelector('.focus-end-input');
+    const noteInput = row.querySelector('.focus-note-input');
+    const pomodoroSelect = row.querySelector('.focus-pomodoro-select');
+
+    const startTime = normalizeTimeInput(startInput.value);
+    const endTime = normalizeTimeInput(endInput.value);
+    const note = noteInput.value;
+    const pomodoro = pomodoroSelect.value;
+
+    if (startTime) startInput.value = startTime;
+    if (endTime) endInput.value = endTime;
+
+    const res = await batchPost('/api/focus/update', {
+        focus_session_id: focusId,
+        start_date: rowDate,
+        start_time: startTime,
+        end_date: rowDate,
+        end_time: endTime,
+        note,
+        pomodoro_mode: pomodoro
+    });
+
+    if (res.ok) {
+        localWrites.set(String(focusId), Date.now());
+        // Visual feedback for inputs
+        [startInput, endInput, noteInput].forEach(input => {
+            const originalColor = input.style.color;
+            input.style.color = 'var(--success)';
+            setTimeout(() => input.style.color = originalColor, 500);
+        });
+    } else {
+        const data = await res.json();
+        alert((data && data.error) || 'Failed to save');
+    }
+}
+
+async function deleteFocusRow(focusId) {
+    if (!confirm(i18n['confirm_delete'])) return;
+    const res = await batchPost('/api/focus/delete', { focus_session_id: focusId }, { immediate: true });
+    if (res.ok) {
+        const element = document.querySelector(`.focus-entry[data-focus-id="${focusId}"]`);
+        if (element) {
+            element.style.opacity = '0';
+            element.style.transform = 'translateY(10px)';
+            setTimeout(() => element.remove(), 300);
+        }
+    } else {
+        alert('Failed to delete');
+    }
+}
+
+// Live updates pushed through /api/events (see subscribeChanges in script.js)
+const localWrites = new Map(); // focus id -> time this page last saved it
+
+function onDataChanged(event) {
+    if (event.reset) return reloadWhenIdle();
+    for (const change of event.changes) {
+        if (change.entity === 'task' && change.id === TASK_ID && change.op === 'delete') {
+            window.location.href = '/';
+            return;
+        }
+        if (change.entity !== 'focus_session' || change.session_id !== SESSION_ID) continue;
+
+        const element = document.querySelector(`.focus-entry[data-focus-id="${change.id}"]`);
+        if (change.op === 'delete') {
+            if (element) element.remove();
+            if (change.id === ACTIVE_FOCUS_ID) return reloadWhenIdle();
+            continue;
+        }
+        // Echo of this page's own autosave
+        if (element && change.id !== ACTIVE_FOCUS_ID && Date.now() - (localWrites.get(String(change.id)) || 0) < 5000) continue;
+        // Started, paused or stopped elsewhere, or edited in another tab
+        return reloadWhenIdle();
+    }
+}
+
+function wireAutoSave() {
+    document.querySelectorAll('.focus-entry').forEach(row => {
+        const inputs = row.querySelectorAll('.focus-start-input, .focus-end-input, .focus-note-input');
+        const select = row.querySelector('.focus-pomodoro-select');
+        const pauseInput = row.querySelector('.focus-pause-total');
+
+        inputs.forEach(input => {
+            input.addEventListener('blur', () => saveFocusRow(row));
+        });
+        if (select) {
+            select.addEventListener('change', () => saveFocusRow(row));
+        }
+        if (pauseInput) {
+            pauseInput.addEventListener('blur', () => saveFocusPauseTotal(row));
+        }
+    });
+}
+
+function setupTimeInputs() {
+    document.querySelectorAll('.time-input').forEach(input => {
+        input.addEventListener('input', function (e) {
+            const isDuration = input.classList.contains('focus-pause-total');
+            let val = e.target.value.replace(/\D/g, '');
+            const maxDigits = isDuration ? 6 : 4;
+            if (val.length > maxDigits) val = val.slice(0, maxDigits);
+
+            let formatted = '';
+            if (val.length > 0) {
+                // Hours (or MM in MM:SS)
+                formatted = val.slice(0, 2);
+                if (!isDuration && parseInt(formatted) > 23) formatted = "23";
+
+                if (val.length > 2) {
+                    // Minutes (or SS in MM:SS)
+                    let m = val.slice(2, 4);
+                    if (parseInt(m) > 59) m = "59";
+                    formatted += ":" + m;
+
+                    if (isDuration && val.length > 4) {
+                        // Seconds
+                        let s = val.slice(4, 6);
+                        if (parseInt(s) > 59) s = "59";
+                        formatted += ":" + s;
+                    }
+                } else if (val.length === 2 && e.inputType !== 'deleteContentBackward') {
+                    formatted += ":";
+                }
+            }
+            e.target.value = formatted;
+        });
+
+        input.addEventListener('keydown', function (e) {
+            if (e.key === 'Backspace' && e.target.value.endsWith(':')) {
+                e.preventDefault();
+                e.target.value = e.target.value.slice(0, -2);
+            }
+        });
+
+        // Trigger change on enter
+        input.addEventListener('keypress', function (e) {
+            if (e.key === 'Enter') {
+                e.target.blur();
+            }
+        });
+    });
+}
+
+initFocusUi();
+wireAutoSave();
+setupTimeInputs();
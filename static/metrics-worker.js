@@ -0,0 +1,215 @@
+// Session cache of the metrics page, kept off the main thread. Started by
+// metrics.js, which talks to it through metricsEngine.call(type, args):
+//
+//   load {start, end}            fetch a date window of /api/metrics/data (columnar) unless cached
+//   sync                         apply /api/metrics/changes; {changed} or {reset} when the cache must be rebuilt
+//   reset                        forget everything
+//   overlay {dates, tagColors, untagged}
+//                                focus sessions of the given days as chart points, plus the
+//                                striped fill of each new multi-tag color set as an ImageBitmap
+//
+// Each message carries an id; the answer is {id, result} or {id, error}.
+// Sessions are indexed by id and by day, so building the overlay of a view
+// only looks at the days it shows. Bars and totals come from
+// /api/metrics/summary and are not computed here.
+
+const sessionsById = new Map();
+const sessionIdsByDate = new Map();
+const loadedWindows = new Set();
+// Server data version the cache is consistent with (X-Data-Version)
+let dataVersion = null;
+// Color sets whose stripes were already sent; the page keeps the patterns
+const sentPatterns = new Set();
+
+// Epoch seconds of a naive server datetime back to its "YYYY-MM-DDTHH:MM:SS" wall-clock string
+function fromEpoch(seconds) {
+    if (seconds === null) return null;
+    return new Date(seconds * 1000).toISOString().slice(0, 19);
+}
+
+function hourOfEpoch(seconds) {
+    const d = new Date(seconds * 1000);
+    return d.getUTCHours() + d.getUTCMinutes() / 60;
+}
+
+// Rebuild the per-session objects of /api/metrics/data from its columnar encoding (wire.py)
+function decodeColumnar(payload) {
+    const byId = new Map();
+    const s = payload.sessions;
+    const sessions = s.id.map((id, i) => {
+        const entry = {
+            id,
+            date: fromEpoch(s.date[i]).slice(0, 10),
+            focus_sessions: []
+        };
+        byId.set(id, entry);
+        return entry;
+    });
+
+    // Tasks referenced by focus sessions may belong to days outside the payload
+    const tasksById = new Map();
+    const t = payload.tasks;
+    t.id.forEach((id, i) => {
+        tasksById.set(id, { description: t.description[i], tags: t.tags[i].map(index => payload.tags[index]) });
+    });
+
+    const f = payload.focus;
+    f.id.forEach((id, i) => {
+        const task = tasksById.get(f.task[i]);
+        const finished = f.start[i] !== null && f.end[i] !== null;
+        byId.get(f.session[i]).focus_sessions.push({
+            id,
+            task_id: f.task[i],
+            tags: task ? [...task.tags] : [],
+            task_name: task ? task.description : 'Focus Session',
+            start_hour: finished ? hourOfEpoch(f.start[i]) : 0,
+            end_hour: finished ? hourOfEpoch(f.end[i]) : 0
+        });
+    });
+    return sessions;
+}
+
+function index(entry) {
+    unindex(entry.id);
+    sessionsById.set(entry.id, entry);
+    if (!sessionIdsByDate.has(entry.date)) sessionIdsByDate.set(entry.date, []);
+    sessionIdsByDate.get(entry.date).push(entry.id);
+}
+
+function unindex(id) {
+    const entry = sessionsById.get(id);
+    if (!entry) return;
+    sessionsById.delete(id);
+    const ids = sessionIdsByDate.get(entry.date).filter(other => other !== id);
+    if (ids.length) sessionIdsByDate.set(entry.date, ids);
+    else sessionIdsByDate.delete(entry.date);
+}
+
+function isDateLoaded(dateStr) {
+    for (const key of loadedWindows) {
+        const [start, end] = key.split('|');
+        if (dateStr >= start && dateStr <= end) return true;
+    }
+    return false;
+}
+
+async function load({ start, end }) {
+    const key = `${start}|${end}`;
+    if (loadedWindows.has(key)) return { loaded: true };
+    const res = await fetch(`/api/metrics/data?start=${start}&end=${end}&format=columnar`);
+    if (!res.ok) return { loaded: false };
+    const version = parseInt(res.headers.get('X-Data-Version'), 10);
+    const sessions = decodeColumnar(await res.json());
+    // Keep the oldest version so the next sync also covers the older windows
+    if (!isNaN(version) && (dataVersion === null || version < dataVersion)) dataVersion = version;
+    // Drop stale entries in the window (e.g. deleted sessions) before merging
+    for (const [date, ids] of [...sessionIdsByDate]) {
+        if (date >= start && date <= end) ids.forEach(unindex);
+    }
+    sessions.forEach(index);
+    loadedWindows.add(key);
+    return { loaded: true };
+}
+
+// /api/metrics/changes sends the plain JSON entries of /api/metrics/data
+function fromPayload(entry) {
+    return {
+        id: entry.id,
+        date: entry.date,
+        focus_sessions: entry.focus_sessions.map(fs => ({
+            id: fs.id,
+            task_id: fs.task_id,
+            tags: fs.tags,
+            task_name: fs.task_name,
+            start_hour: fs.start_hour,
+            end_hour: fs.end_hour
+        }))
+    };
+}
+
+async function sync() {
+    if (dataVersion === null) return { reset: true };
+    const res = await fetch(`/api/metrics/changes?since=${dataVersion}`);
+    if (!res.ok) return { changed: false };
+    const delta = await res.json();
+    if (delta.reset) return { reset: true };
+    if (delta.version === dataVersion) return { changed: false };
+
+    delta.deleted.forEach(unindex);
+    delta.sessions.forEach(entry => {
+        if (sessionsById.has(entry.id) || isDateLoaded(entry.date)) index(fromPayload(entry));
+    });
+    dataVersion = delta.version;
+    return { changed: true };
+}
+
+function reset() {
+    sessionsById.clear();
+    sessionIdsByDate.clear();
+    loadedWindows.clear();
+    dataVersion = null;
+    return {};
+}
+
+// Equal diagonal stripes of each color
+function drawStripes(colors) {
+    const stripeCount = colors.length;
+    const stripeSize = 10;
+    const size = stripeSize * stripeCount * 2;
+    const canvas = new OffscreenCanvas(size, size);
+    const ctx = canvas.getContext('2d');
+    for (let i = -stripeCount * 2; i < stripeCount * 2; i++) {
+        ctx.fillStyle = colors[Math.abs(i) % stripeCount];
+        ctx.beginPath();
+        ctx.moveTo(i * stripeSize, 0);
+        ctx.lineTo((i + 1) * stripeSize, 0);
+        ctx.lineTo((i + 1) * stripeSize + size, size);
+        ctx.lineTo(i * stripeSize + size, size);
+        ctx.closePath();
+        ctx.fill();
+    }
+    return canvas.transferToImageBitmap();
+}
+
+function overlay({ dates, tagColors, untagged }) {
+    const points = [];
+    const patterns = {};
+    dates.forEach((date, i) => {
+        const ids = date && sessionIdsByDate.get(date);
+        if (!ids) return;
+        // One bar per day: its first session, as in the summary
+        const session = sessionsById.get(Math.min(...ids));
+        session.focus_sessions.forEach(fs => {
+            const tags = fs.tags.length > 0 ? fs.tags : [untagged];
+            const colors = tags.map(tag => tagColors[tag] || '#38bdf8');
+            const key = colors.join(',');
+            if (colors.length > 1 && !sentPatterns.has(key) && typeof OffscreenCanvas !== 'undefined') {
+                patterns[key] = drawStripes(colors);
+                sentPatterns.add(key);
+            }
+            points.push({
+                index: i,
+                y: [fs.start_hour, fs.end_hour],
+                task_id: fs.task_id,
+                task_name: fs.task_name,
+                tags,
+                id: fs.id,
+                colors
+            });
+        });
+    });
+    return { points, patterns };
+}
+
+const handlers = { load, sync, reset, overlay };
+
+self.onmessage = async ({ data }) => {
+    const { id, type, ...args } = data;
+    try {
+        const result = await handlers[type](args);
+        // The stripe bitmaps are handed over, not copied
+        self.postMessage({ id, result }, result.patterns ? Object.values(result.patterns) : []);
+    } catch (e) {
+        self.postMessage({ id, error: String(e && e.message || e) });
+    }
+};
@@ -0,0 +1,1331 @@
+function updateSession(id) {
+    window.location.href = `/dashboard/${id}?edit=true`;
+}
+
+async function updateSuperTagName(color, name) {
+    const res = await fetch('/api/supertag/update_name', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ color: color, name: name })
+    });
+    if (!res.ok) alert("Failed to update supertag name");
+    else tagRegistry = null;
+}
+
+// Tag colors and supertag names, fetched once and shared by every chart until tags change
+let tagRegistry = null;
+function loadTagRegistry() {
+    if (!tagRegistry) {
+        tagRegistry = Promise.all([
+            fetch('/api/tags').then(res => res.json()),
+            fetch('/api/supertags').then(res => res.json())
+        ]).catch(err => {
+            tagRegistry = null;
+            throw err;
+        });
+    }
+    return tagRegistry;
+}
+
+async function deleteSession(id) {
+    if (!confirm(i18n['confirm_delete'])) return;
+
+    const res = await fetch('/api/session/delete', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ session_id: id })
+    });
+
+    if (res.ok) {
+        window.location.reload();
+    } else {
+        alert(i18n['failed_delete']);
+    }
+}
+
+async function updateTime(sessionId, type, timeStr) {
+    // Find the date for this session from the row
+    // We can find the Date cell in the same row, or pass it. 
+    // Better: use the original full ISO string from data attribute to get the YYYY-MM-DD
+    // Actually, we can just grab the date from the backend data if we had it, but here in DOM...
+
+    // Let's use the row. The first cell is the date.
+    // But getting the row is slightly messy.
+    // EASIER: Store the full Date (YYYY-MM-DD) in a data attribute on the input or cell.
+
+    const inputEl = event.target;
+    const dateStr = inputEl.getAttribute('data-date'); // YYYY-MM-DD
+
+    if (!dateStr || !timeStr) return;
+
+    // Construct local DateTime string: "YYYY-MM-DDTHH:MM:00"
+    const dateTimeStr = `${dateStr}T${timeStr}:00`;
+    const dateObj = new Date(dateTimeStr); // Local date object
+    const isoStr = dateObj.toISOString();
+
+    const payload = { session_id: sessionId };
+    if (type === 'start') payload.start_time = isoStr;
+    if (type === 'end') payload.end_time = isoStr;
+
+    const res = await fetch('/api/session/update_times', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(payload)
+    });
+
+    if (res.ok) {
+        // Ideally refresh chart data without full reload, but reload ensures consistency
+        // Let's settle for silent success or visual feedback?
+        // Full reload might interrupt if user is editing multiple.
+        // Let's re-fetch data for chart silently.
+        syncChanges();
+        // Visual feedback
+        const originalColor = inputEl.style.color;
+        inputEl.style.color = 'var(--success)';
+        setTimeout(() => inputEl.style.color = originalColor, 1000);
+    } else {
+        alert(i18n['failed_update']);
+    }
+}
+
+let chartInstance = null;
+let tagChartTimeInstance = null;
+let tagChartTasksInstance = null;
+let currentViewDate = new Date();
+let currentViewType = localStorage.getItem('metricsViewType') || 'week';
+let showFocusSessions = localStorage.getItem('showFocusSessions') === 'true';
+
+function formatDateLocal(date) {
+    if (!date) return null;
+    const y = date.getFullYear();
+    const m = String(date.getMonth() + 1).padStart(2, '0');
+    const d = String(date.getDate()).padStart(2, '0');
+    return `${y}-${m}-${d}`;
+}
+
+function toggleFocusDisplay() {
+    showFocusSessions = document.getElementById('showFocusToggle').checked;
+    localStorage.setItem('showFocusSessions', showFocusSessions);
+    renderCurrentView();
+}
+
+function formatHour(val) {
+    if (val === null) return '';
+    const h = Math.floor(val);
+    const m = Math.round((val - h) * 60);
+    return `${h.toString().padStart(2, '0')}:${m.toString().padStart(2, '0')}`;
+}
+
+let renderGeneration = 0;
+
+// The session cache and the focus overlay live in a Web Worker (static/metrics-worker.js)
+// so loading and indexing a window never blocks scrolling or the hover popups
+const metricsEngine = (() => {
+    const worker = new Worker(METRICS_WORKER_URL);
+    const pending = new Map();
+    let nextId = 0;
+    worker.onmessage = ({ data }) => {
+        const call = pending.get(data.id);
+        pending.delete(data.id);
+        if (data.error) call.reject(new Error(data.error));
+        else call.resolve(data.result);
+    };
+    function call(type, args = {}) {
+        return new Promise((resolve, reject) => {
+            const id = ++nextId;
+            pending.set(id, { resolve, reject });
+            worker.postMessage({ id, type, ...args });
+        });
+    }
+    return { call };
+})();
+
+// Patch the cache with what changed since it was loaded instead of reloading everything
+let syncInFlight = null;
+async function syncChanges() {
+    if (syncInFlight) return syncInFlight;
+    syncInFlight = (async () => {
+        const result = await metricsEngine.call('sync');
+        if (result.reset) return initMetrics();
+        if (result.changed) renderCurrentView();
+    })();
+    try {
+        await syncInFlight;
+    } finally {
+        syncInFlight = null;
+    }
+}
+
+// Pushed by /api/events (see subscribeChanges in script.js)
+function onDataChanged(event) {
+    if (event.reset || event.changes.some(change => change.entity === 'tag')) tagRegistry = null;
+    if (event.reset) return initMetrics();
+    syncChanges();
+}
+
+// Periodic tick from script.js: redraw days still in progress
+function onAutoRefresh() {
+    renderCurrentView();
+}
+
+document.addEventListener('visibilitychange', () => {
+    if (document.visibilityState === 'visible') syncChanges();
+});
+
+function getViewRange() {
+    const d = currentViewDate;
+    if (currentViewType === 'day') {
+        const day = formatDateLocal(d);
+        return { start: day, end: day };
+    }
+    if (currentViewType === 'week') {
+        const startOfWeek = getStartOfWeek(d);
+        const endOfWeek = new Date(startOfWeek);
+        endOfWeek.setDate(endOfWeek.getDate() + 6);
+        return { start: formatDateLocal(startOfWeek), end: formatDateLocal(endOfWeek) };
+    }
+    if (currentViewType === 'month') {
+        return {
+            start: formatDateLocal(new Date(d.getFullYear(), d.getMonth(), 1)),
+            end: formatDateLocal(new Date(d.getFullYear(), d.getMonth() + 1, 0))
+        };
+    }
+    return { start: `${d.getFullYear()}-01-01`, end: `${d.getFullYear()}-12-31` };
+}
+
+async function initMetrics() {
+    // (Re)load from scratch: forget every cached window
+    await metricsEngine.call('reset');
+
+    // Initialize toggle state
+    const toggle = document.getElementById('showFocusToggle');
+    if (toggle) {
+        toggle.checked = showFocusSessions;
+    }
+
+    switchView(currentViewType);
+}
+
+// Helper: Get Monday of the current week
+function getStartOfWeek(date) {
+    const d = new Date(date);
+    const day = d.getDay();
+    const diff = d.getDate() - day + (day === 0 ? -6 : 1); // adjust when day is sunday
+    return new Date(d.setDate(diff));
+}
+
+function switchView(type) {
+    currentViewType = type;
+    localStorage.setItem('metricsViewType', type);
+
+    // Highlight active button
+    const controls = document.getElementById('viewControls');
+    if (controls) {
+        controls.querySelectorAll('button').forEach(btn => {
+            if (btn.getAttribute('data-view') === type) {
+                btn.style.backgroundColor = 'var(--accent)';
+                btn.style.borderColor = 'var(--accent)';
+                btn.style.color = '#fff';
+            } else {
+                btn.style.backgroundColor = '';
+                btn.style.borderColor = '';
+                btn.style.color = '';
+            }
+        });
+    }
+
+    currentViewDate = currentViewDate || new Date();
+    // Removed: currentViewDate = new Date(); (Preserve date for drill-down)
+    renderCurrentView();
+}
+
+function getWeekNumber(d) {
+    d = new Date(Date.UTC(d.getFullYear(), d.getMonth(), d.getDate()));
+    d.setUTCDate(d.getUTCDate() + 4 - (d.getUTCDay() || 7));
+    var yearStart = new Date(Date.UTC(d.getUTCFullYear(), 0, 1));
+    var weekNo = Math.ceil((((d - yearStart) / 86400000) + 1) / 7);
+    return weekNo;
+}
+
+function goToToday() {
+    currentViewDate = new Date();
+    renderCurrentView();
+}
+
+function navigate(offset) {
+    const d = new Date(currentViewDate);
+    if (currentViewType === 'day') {
+        d.setDate(d.getDate() + offset);
+    } else if (currentViewType === 'week') {
+        d.setDate(d.getDate() + (offset * 7));
+    } else if (currentViewType === 'month') {
+        d.setMonth(d.getMonth() + offset);
+    } else if (currentViewType === 'year') {
+        d.setFullYear(d.getFullYear() + offset);
+    }
+    currentViewDate = d;
+    renderCurrentView();
+}
+
+function updateLabel(start, end, singleLabel = null) {
+    const labelEl = document.getElementById('periodLabel');
+    const opts = { year: 'numeric', month: 'short', day: 'numeric' };
+    if (singleLabel) {
+        labelEl.innerText = singleLabel;
+    } else {
+        labelEl.innerText = `${start.toLocaleDateString(currentLang, opts)} - ${end.toLocaleDateString(currentLang, opts)}`;
+    }
+}
+
+// Bars, totals and tag breakdowns of the current view, aggregated by the server (summaries.py)
+async function loadSummary() {
+    const anchor = formatDateLocal(currentViewDate);
+    try {
+        const res = await fetch(`/api/metrics/summary?view=${currentViewType}&anchor=${anchor}&tasks=1`);
+        return res.ok ? await res.json() : null;
+    } catch (e) {
+        return null;
+    }
+}
+
+// "YYYY-MM-DD" as a local date
+function parseDateLocal(dateStr) {
+    const [y, m, d] = dateStr.split('-').map(Number);
+    return new Date(y, m - 1, d);
+}
+
+// Striped fills of multi-tag focus sessions, drawn by the worker, by color list
+const focusPatterns = new Map();
+
+// Focus sessions of the bars' days as chart points, colored by tag
+async function loadFocusOverlay(bars) {
+    let points, patterns;
+    try {
+        const [tags] = await loadTagRegistry();
+        const tagColors = {};
+        tags.forEach(t => tagColors[t.name] = t.color);
+        tagColors[i18n['untagged']] = '#94a3b8';
+
+        ({ points, patterns } = await metricsEngine.call('overlay', {
+            dates: bars.map(bar => bar.date),
+            tagColors,
+            untagged: i18n['untagged']
+        }));
+    } catch (err) {
+        console.error('Failed to load focus sessions', err);
+        return [];
+    }
+    const ctx = document.getElementById('metricsChart').getContext('2d');
+    Object.entries(patterns).forEach(([key, bitmap]) => focusPatterns.set(key, ctx.createPattern(bitmap, 'repeat')));
+    points.forEach(point => {
+        // Without OffscreenCanvas in the worker there is no pattern: first tag's color
+        point.backgroundColor = point.colors.length > 1
+            ? focusPatterns.get(point.colors.join(',')) || point.colors[0]
+            : point.colors[0];
+    });
+    return points;
+}
+
+async function renderCurrentView() {
+    const generation = ++renderGeneration;
+    // The sessions only back the focus overlay of day bars; month bars have none
+    const withFocus = showFocusSessions && currentViewType !== 'year';
+    const [summary] = await Promise.all([
+        loadSummary(),
+        withFocus ? metricsEngine.call('load', getViewRange()).catch(() => null) : null
+    ]);
+    // A newer navigation started while we were fetching
+    if (generation !== renderGeneration || !summary) return;
+    const bars = summary.bars;
+    const focusPoints = withFocus ? await loadFocusOverlay(bars) : [];
+    if (generation !== renderGeneration) return;
+
+    const days = bars.map(bar => parseDateLocal(bar.date));
+    let chartLabels;
+
+    if (currentViewType === 'day') {
+        const day = days[0];
+        const dayName = day.toLocaleDateString(currentLang, { weekday: 'long' });
+        updateLabel(null, null, `${dayName} ${day.getDate()} ${day.toLocaleDateString(currentLang, { month: 'short', year: 'numeric' })}`);
+        chartLabels = [`${dayName} ${day.getDate()}`];
+    } else if (currentViewType === 'week') {
+        updateLabel(days[0], days[days.length - 1]);
+        chartLabels = days.map(d => `${d.toLocaleDateString(currentLang, { weekday: 'short' })} ${d.getDate()}`);
+    } else if (currentViewType === 'month') {
+        updateLabel(null, null, days[0].toLocaleDateString(currentLang, { month: 'long', year: 'numeric' }));
+        chartLabels = days.map(d => d.getDate().toString());
+    } else {
+        updateLabel(null, null, days[0].getFullYear().toString());
+        chartLabels = days.map(d => i18n['full_months'][d.getMonth()]);
+    }
+
+    const todayIndex = bars.findIndex(bar => bar.today);
+    const chartIds = bars.map(bar => bar.session_id);
+    const sessionDates = bars.map(bar => bar.session_id ? bar.date : null);
+    // Month averages and empty days use the 'work' color
+    const dayStatuses = bars.map(bar => bar.status || 'work');
+
+    // Transpose the per-bar segments into one dataset per segment index
+    const maxSegs = Math.max(1, ...bars.map(bar => bar.segments.length));
+    const chartDatasetsData = [];
+    for (let i = 0; i < maxSegs; i++) {
+        chartDatasetsData.push(bars.map(bar => bar.segments[i] || null));
+    }
+
+    renderChart(chartLabels, chartDatasetsData, chartIds, todayIndex === -1 ? null : todayIndex, dayStatuses, sessionDates, focusPoints);
+    renderStats(summary);
+}
+
+function renderStats(summary) {
+    const totalWork = summary.totals.work_minutes / 60;
+    const h = Math.floor(totalWork);
+    const m = Math.round((totalWork - h) * 60);
+    document.getElementById('totalHours').innerText = `${h}h ${m.toString().padStart(2, '0')}min`;
+
+    renderTagBreakdown(summary.groups);
+}
+
+function renderTagBreakdown(groups) {
+    // Server groups (summaries.py) in the shape the charts and popups use, keyed by color
+    const colorGroups = {};
+    groups.forEach(g => {
+        colorGroups[g.color] = {
+            color: g.color,
+            name: g.name,
+            timeMins: g.minutes,
+            completed: g.task_completed,
+            total: g.task_total,
+            subtags: g.tags.map(t => ({
+                tag: t.tag === null ? i18n['untagged'] : t.tag,
+                timeMins: t.minutes,
+                taskData: { completed: t.task_completed, total: t.task_total, tasks: t.tasks || [] }
+            }))
+        };
+    });
+
+    // Sort groups for Charts
+    const sortedTimeGroups = Object.values(colorGroups)
+        .filter(g => g.timeMins > 0)
+        .sort((a, b) => b.timeMins - a.timeMins);
+
+    const timeLabels = sortedTimeGroups.map(g => g.name);
+    const timeValues = sortedTimeGroups.map(g => g.timeMins / 60);
+    const timeColors = sortedTimeGroups.map(g => g.color);
+    const totalTimeMins = sortedTimeGroups.reduce((sum, g) => sum + g.timeMins, 0);
+
+    const sortedTaskGroups = Object.values(colorGroups)
+        .filter(g => g.total > 0)
+        .sort((a, b) => b.total - a.total);
+
+    const taskLabels = sortedTaskGroups.map(g => g.name);
+    const taskValues = sortedTaskGroups.map(g => g.total);
+    const taskColors = sortedTaskGroups.map(g => g.color);
+    const totalTasks = sortedTaskGroups.reduce((sum, g) => sum + g.total, 0);
+
+    // Create a lookup map for task tooltips by Supertag Name
+    const supertagTaskData = {};
+    sortedTaskGroups.forEach(g => {
+        supertagTaskData[g.name] = { completed: g.completed, total: g.total };
+    });
+
+    // Render Charts with Supertag Data
+    renderCharts(timeLabels, timeValues, timeColors, totalTimeMins, taskLabels, taskValues, taskColors, totalTasks, supertagTaskData, colorGroups);
+
+    // Render tag summary badges (grouped by color)
+    const tagSummary = document.getElementById('tagSummary');
+    tagSummary.innerHTML = '';
+
+    const sortedGroups = Object.values(colorGroups).sort((a, b) => b.timeMins - a.timeMins);
+
+    sortedGroups.forEach((group, index) => {
+        const hours = Math.floor(group.timeMins / 60);
+        const minutes = Math.round(group.timeMins % 60);
+        const completionRate = group.total > 0 ? (group.completed / group.total * 100) : 0;
+        const color = group.color;
+
+        const pill = document.createElement('div');
+        pill.className = 'super-pill';
+        pill.style.borderColor = `${color}40`;
+        pill.style.backgroundColor = `${color}08`;
+
+        pill.onclick = (e) => {
+            if (e.target.classList.contains('supertag-name')) return;
+
+            // Show detailed fixed popup
+            showSupertagDetails(group);
+        };
+
+        // Add hover behavior
+        pill.onmouseenter = (e) => {
+            const tasks = [];
+            group.subtags.forEach(st => {
+                if (st.taskData && st.taskData.tasks) {
+                    tasks.push(...st.taskData.tasks);
+                }
+            });
+            showTagTasksPopup(group.name, tasks, e);
+        };
+        pill.onmousemove = (e) => updateTagTasksPopupPosition(e);
+        pill.onmouseleave = () => hideTagTasksPopup();
+
+        const subpillsHtml = group.subtags && group.subtags.length > 0 ? `
+            <div class="subpill-container">
+                ${group.subtags.map(st => `
+                    <div class="subpill" title="${st.tag}">${st.tag}</div>
+                `).join('')}
+            </div>
+        ` : '';
+
+        pill.innerHTML = `
+            <div class="super-pill-header">
+                <div style="display: flex; flex-direction: column; gap: 0.1rem; flex: 1; min-width: 0;">
+                    <div class="supertag-name" contenteditable="true" 
+                         style="color: ${color};" 
+                         onblur="updateSuperTagName('${color}', this.innerText)"
+                         onclick="event.stopPropagation()"
+                         title="Click to edit Supertag name">${group.name}</div>
+                    <div style="font-size: 0.7rem; color: var(--text-secondary);">${hours}h ${minutes}m</div>
+                </div>
+                <div style="text-align: right;">
+                    <div style="font-size: 0.75rem; font-weight: 600; color: ${color};">${Math.round(completionRate)}%</div>
+                    <div style="font-size: 0.65rem; color: var(--text-secondary);">${Math.round(group.completed * 10) / 10}/${Math.round(group.total * 10) / 10}</div>
+                </div>
+            </div>
+            <div style="width: 100%; height: 2px; background: rgba(255,255,255,0.05); border-radius: 1px; overflow: hidden; margin-top: 0.5rem;">
+                <div style="width: ${completionRate}%; height: 100%; background: ${color}; transition: width 0.3s ease;"></div>
+            </div>
+            ${subpillsHtml}
+        `;
+
+        tagSummary.appendChild(pill);
+    });
+}
+
+// Helper to separate chart rendering from data grouping
+function renderCharts(timeLabels, timeValues, timeColors, totalTimeMins, taskLabels, taskValues, taskColors, totalTasks, tagTaskData, colorGroups) {
+    // Handle conditional layout for breakdown charts BEFORE rendering
+    const circleContainer = document.getElementById('circularChartsContainer');
+    const timeContainer = document.getElementById('timeBreakdownContainer');
+    const taskContainer = document.getElementById('taskBreakdownContainer');
+
+    if (circleContainer && timeContainer && taskContainer) {
+        if (showFocusSessions) {
+            timeContainer.style.display = 'flex';
+            timeContainer.style.height = '250px';
+            taskContainer.style.height = '250px';
+            circleContainer.style.justifyContent = 'flex-start';
+        } else {
+            timeContainer.style.display = 'none';
+            taskContainer.style.height = '520px';
+            circleContainer.style.justifyContent = 'center';
+        }
+    }
+
+    // Render time-based doughnut chart
+    const ctxTime = document.getElementById('tagChartTime').getContext('2d');
+    const canvasTime = document.getElementById('tagChartTime');
+    const emptyStateTime = document.getElementById('tagChartTimeEmpty');
+
+    if (tagChartTimeInstance) tagChartTimeInstance.destroy();
+
+    if (timeLabels.length > 0) {
+        canvasTime.style.display = 'block';
+        emptyStateTime.style.display = 'none';
+        tagChartTimeInstance = new Chart(ctxTime, {
+            type: 'doughnut',
+            data: {
+                labels: timeLabels,
+                datasets: [{
+                    data: timeValues,
+                    backgroundColor: timeColors,
+                    borderWidth: 2,
+                    borderColor: '#1e293b'
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: true,
+                onClick: (e, elements) => {
+                    if (elements && elements.length > 0) {
+                        const index = elements[0].index;
+                        const supertagName = timeLabels[index];
+                        const group = Object.values(colorGroups).find(g => g.name === supertagName);
+                        if (group) showSupertagDetails(group);
+                    }
+                },
+                onHover: (event, elements) => {
+                    event.native.target.style.cursor = elements.length > 0 ? 'pointer' : 'default';
+                },
+                plugins: {
+                    legend: { display: false },
+                    tooltip: {
+                        callbacks: {
+                            label: function (context) {
+                                const hours = Math.floor(context.parsed);
+                                const mins = Math.round((context.parsed - hours) * 60);
+                                const percentage = totalTimeMins > 0 ? ((context.parsed * 60 / totalTimeMins) * 100).toFixed(1) : 0;
+                                return `${context.label}: ${hours}h ${mins}min (${percentage}%)`;
+                            }
+                        }
+                    }
+                }
+            },
+            plugins: [{
+                id: 'datalabels',
+                afterDatasetsDraw: function (chart) {
+                    const ctx = chart.ctx;
+                    chart.data.datasets.forEach((dataset, i) => {
+                        const meta = chart.getDatasetMeta(i);
+                        meta.data.forEach((element, index) => {
+                            const data = dataset.data[index];
+                            const percentage = totalTimeMins > 0 ? ((data * 60 / totalTimeMins) * 100).toFixed(1) : 0;
+                            if (percentage > 5) {
+                                const position = element.tooltipPosition();
+                                ctx.font = 'bold 12px Inter';
+                                ctx.fillStyle = '#fff';
+                                ctx.textAlign = 'center';
+                                ctx.fillText(percentage + '%', position.x, position.y);
+                            }
+                        });
+                    });
+                }
+            }]
+        });
+    } else {
+        canvasTime.style.display = 'none';
+        emptyStateTime.style.display = 'flex';
+    }
+
+    // Render task-based doughnut chart
+    const ctxTasks = document.getElementById('tagChartTasks').getContext('2d');
+    const canvasTasks = document.getElementById('tagChartTasks');
+    const emptyStateTasks = document.getElementById('tagChartTasksEmpty');
+
+    if (tagChartTasksInstance) tagChartTasksInstance.destroy();
+
+    if (taskLabels.length > 0) {
+        canvasTasks.style.display = 'block';
+        emptyStateTasks.style.display = 'none';
+        tagChartTasksInstance = new Chart(ctxTasks, {
+            type: 'doughnut',
+            data: {
+                labels: taskLabels,
+                datasets: [{
+                    data: taskValues,
+                    backgroundColor: taskColors,
+                    borderWidth: 2,
+                    borderColor: '#1e293b'
+                }]
+            },
+            options: {
+                responsive: true,
+                maintainAspectRatio: true,
+                onClick: (e, elements) => {
+                    if (elements && elements.length > 0) {
+                        const index = elements[0].index;
+                        const supertagName = taskLabels[index];
+                        const group = Object.values(colorGroups).find(g => g.name === supertagName);
+                        if (group) showSupertagDetails(group);
+                    }
+                },
+                onHover: (event, elements) => {
+                    event.native.target.style.cursor = elements.length > 0 ? 'pointer' : 'default';
+                },
+                plugins: {
+                    legend: { display: false },
+                    tooltip: {
+                        callbacks: {
+                            label: function (context) {
+                                const supertagName = context.label;
+                                const groupData = tagTaskData[supertagName];
+                                const percentage = totalTasks > 0 ? ((context.parsed / totalTasks) * 100).toFixed(1) : 0;
+                                if (groupData) {
+                                    return `${supertagName}: ${groupData.completed}/${context.parsed} tasks (${percentage}%)`;
+                                }
+                                return `${supertagName}: ${context.parsed} tasks (${percentage}%)`;
+                            }
+                        }
+                    }
+                }
+            },
+            plugins: [{
+                id: 'datalabels',
+                afterDatasetsDraw: function (chart) {
+                    const ctx = chart.ctx;
+                    chart.data.datasets.forEach((dataset, i) => {
+                        const meta = chart.getDatasetMeta(i);
+                        meta.data.forEach((element, index) => {
+                            const data = dataset.data[index];
+                            const percentage = totalTasks > 0 ? ((data / totalTasks) * 100).toFixed(1) : 0;
+                            if (percentage > 5) {
+                                const position = element.tooltipPosition();
+                                ctx.font = 'bold 12px Inter';
+                                ctx.fillStyle = '#fff';
+                                ctx.textAlign = 'center';
+                                ctx.fillText(percentage + '%', position.x, position.y);
+                            }
+                        });
+                    });
+                }
+            }]
+        });
+    } else {
+        canvasTasks.style.display = 'none';
+        emptyStateTasks.style.display = 'flex';
+    }
+}
+
+function renderChart(labels, datasetsData, sessionIds, todayIndex, dayStatuses, sessionDates, focusPoints) {
+    const ctx = document.getElementById('metricsChart').getContext('2d');
+
+    if (chartInstance) {
+        chartInstance.destroy();
+    }
+
+    const colors = {
+        'work': '#38bdf8',
+        'vacation': '#fb923c',    // Orange
+        'sick': '#a78bfa',        // Violet
+        'conference': '#10b981', // Emerald
+        'project': '#f59e0b',    // Amber
+        'other': '#64748b'       // Slate
+    };
+
+    // Create base datasets
+    const datasets = datasetsData.map((data, idx) => ({
+        label: i18n['working_time'],
+        data: data,
+        backgroundColor: showFocusSessions ?
+            dayStatuses.map(s => (s === 'work' || !s) ? 'rgba(148, 163, 184, 0.15)' : (colors[s] || colors['work'])) :
+            (dayStatuses ? dayStatuses.map(s => colors[s] || colors['work']) : '#38bdf8'),
+        borderRadius: 8,
+        borderSkipped: false,
+        grouped: !showFocusSessions,
+        order: showFocusSessions ? 2 : 1,
+        borderWidth: (context) => {
+            const d = sessionDates && sessionDates[context.dataIndex];
+            return BIRTHDAY_MD && d && d.substring(5, 10) === BIRTHDAY_MD ? 2 : 0;
+        },
+        borderColor: (context) => {
+            const d = sessionDates && sessionDates[context.dataIndex];
+            return BIRTHDAY_MD && d && d.substring(5, 10) === BIRTHDAY_MD ? '#F59E0B' : 'transparent'; // Gold/Amber
+        }
+    }));
+
+    // Focus sessions, prepared by loadFocusOverlay()
+    if (showFocusSessions && focusPoints && focusPoints.length > 0) {
+        datasets.push({
+            label: i18n['focus'],
+            data: focusPoints.map(point => ({
+                x: labels[point.index], // Match x-axis label
+                y: point.y,
+                task_id: point.task_id,
+                task_name: point.task_name,
+                tags: point.tags,
+                id: point.id
+            })),
+            backgroundColor: focusPoints.map(point => point.backgroundColor),
+            borderRadius: 6,
+            borderSkipped: false,
+            type: 'bar',
+            grouped: false, // Ensure overlap
+            order: 0
+        });
+    }
+
+    chartInstance = new Chart(ctx, {
+        type: 'bar',
+        data: {
+            labels: labels,
+            datasets: datasets
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            indexAxis: 'x',
+            onClick: (e, elements) => {
+                if (elements && elements.length > 0) {
+                    const index = elements[0].index;
+
+                    // Year View: Click to drill down to Month
+                    if (currentViewType === 'year') {
+                        const monthIndex = index;
+                        const year = currentViewDate.getFullYear();
+                        currentViewDate = new Date(year, monthIndex, 1);
+                        switchView('month');
+                        return;
+                    }
+
+                    // Normal session click logic
+                    const datasetIndex = elements[0].datasetIndex;
+                    const dataset = datasets[datasetIndex];
+
+                    // Check if focus session
+                    if (dataset.label === i18n['focus']) {
+                        // elements[0].element.$context.raw is the actual data object clicked
+                        const raw = elements[0].element.$context.raw;
+                        if (raw && raw.task_id) {
+                            window.location.href = `/focus/task/${raw.task_id}`;
+                            return;
+                        }
+                    }
+
+                    const id = sessionIds[index];
+                    if (id) {
+                        window.location.href = `/dashboard/${id}?edit=true`;
+                    }
+                } else {
+                    // Week Bar Click (Month View)
+                    if (currentViewType === 'month' && chartInstance.weekZones) {
+                        const { x, y } = e;
+                        const zone = chartInstance.weekZones.find(z =>
+                            x >= z.x && x <= z.x + z.w && y >= z.y && y <= z.y + z.h
+                        );
+
+                        if (zone) {
+                            const year = currentViewDate.getFullYear();
+                            const month = currentViewDate.getMonth();
+                            currentViewDate = new Date(year, month, zone.startDay);
+                            switchView('week');
+                        }
+                    }
+                }
+            },
+            onHover: (event, chartElement) => {
+                const target = event.native.target;
+                let tooltipEl = document.getElementById('week-chart-tooltip');
+                if (!tooltipEl) {
+                    tooltipEl = document.createElement('div');
+                    tooltipEl.id = 'week-chart-tooltip';
+                    Object.assign(tooltipEl.style, {
+                        position: 'fixed',
+                        background: 'rgba(30, 41, 59, 0.95)',
+                        color: '#f8fafc',
+                        borderRadius: '4px',
+                        padding: '6px 12px',
+                        fontFamily: 'Inter, sans-serif',
+                        fontSize: '12px',
+                        pointerEvents: 'none',
+                        zIndex: '9999',
+                        display: 'none',
+                        transform: 'translate(-50%, -120%)',
+                        boxShadow: '0 4px 6px -1px rgba(0, 0, 0, 0.2)'
+                    });
+                    document.body.appendChild(tooltipEl);
+                }
+                tooltipEl.style.display = 'none';
+
+                if (chartElement.length > 0) {
+                    target.style.cursor = 'pointer';
+                    return;
+                }
+
+                if (currentViewType === 'month' && chartInstance.weekZones) {
+                    const { x, y } = event;
+                    const zone = chartInstance.weekZones.find(z =>
+                        x >= z.x && x <= z.x + z.w && y >= z.y && y <= z.y + z.h
+                    );
+                    if (zone) {
+                        target.style.cursor = 'pointer';
+                        tooltipEl.innerHTML = `<strong>Week ${zone.week}</strong>`;
+                        tooltipEl.style.display = 'block';
+                        tooltipEl.style.left = event.native.clientX + 'px';
+                        tooltipEl.style.top = event.native.clientY + 'px';
+                        return;
+                    }
+                }
+                target.style.cursor = 'default';
+            },
+            scales: {
+                y: {
+                    stacked: false,
+                    min: 7, max: 20,
+                    grid: { color: '#334155' },
+                    ticks: { color: '#94a3b8', stepSize: 1, callback: val => val + ':00' }
+                },
+                x: {
+                    stacked: !showFocusSessions,
+                    grid: { display: false },
+                    ticks: { color: '#94a3b8' }
+                }
+            },
+            plugins: {
+                legend: { display: false },
+                tooltip: {
+                    callbacks: {
+                        label: function (context) {
+                            const raw = context.raw;
+                            if (raw.task_name) {
+                                const tagsStr = (raw.tags && raw.tags.length > 0) ? ` [${raw.tags.join(', ')}]` : '';
+                                return [`${raw.task_name}${tagsStr}`, `${formatHour(raw.y[0])} - ${formatHour(raw.y[1])}`];
+                            }
+                            const yRange = Array.isArray(raw) ? raw : (raw.y || null);
+                            if (yRange) {
+                                const dayIdx = context.dataIndex;
+                                const status = dayStatuses[dayIdx];
+                                let label = i18n['working_time'];
+                                if (status && status !== 'work') {
+                                    label = i18n[status] || status;
+                                }
+                                return `${label}: ${formatHour(yRange[0])} - ${formatHour(yRange[1])}`;
+                            }
+                            return context.formattedValue;
+                        }
+                    }
+                }
+            }
+        },
+        plugins: [{
+            id: 'weekNav',
+            afterDatasetsDraw: (chart) => {
+                if (currentViewType !== 'month') return;
+                const { ctx, chartArea: { width }, scales: { x, y } } = chart;
+                const y7 = y.getPixelForValue(7);
+                const barHeight = 24;
+                const yPos = y7 - barHeight;
+                const daysInMonth = chart.data.labels.length;
+                const year = currentViewDate.getFullYear();
+                const month = currentViewDate.getMonth();
+                const weeks = [];
+                let curWeek = null;
+                let startI = 0;
+                for (let i = 0; i < daysInMonth; i++) {
+                    const d = new Date(year, month, i + 1);
+                    const w = getWeekNumber(d);
+                    if (curWeek === null) { curWeek = w; startI = i; }
+                    else if (w !== curWeek) {
+                        weeks.push({ w: curWeek, s: startI, e: i - 1 });
+                        curWeek = w; startI = i;
+                    }
+                }
+                weeks.push({ w: curWeek, s: startI, e: daysInMonth - 1 });
+                chart.weekZones = [];
+                const slotWidth = width / daysInMonth;
+                ctx.save();
+                ctx.font = 'bold 11px Inter';
+                ctx.textAlign = 'center';
+                ctx.textBaseline = 'middle';
+                weeks.forEach(item => {
+                    const xStart = x.getPixelForValue(item.s) - slotWidth / 2 + 2;
+                    const xEnd = x.getPixelForValue(item.e) + slotWidth / 2 - 2;
+                    const w = xEnd - xStart;
+                    ctx.fillStyle = 'rgba(56, 189, 248, 0.25)';
+                    ctx.beginPath();
+                    ctx.rect(xStart, yPos, w, barHeight);
+                    ctx.fill();
+                    ctx.fillStyle = '#0ea5e9';
+                    ctx.fillText(`W${item.w}`, xStart + w / 2, yPos + barHeight / 2);
+                    chart.weekZones.push({
+                        x: xStart, y: yPos, w: w, h: barHeight,
+                        startDay: item.s + 1,
+                        week: item.w
+                    });
+                });
+                ctx.restore();
+            }
+        }]
+    });
+}
+
+
+
+function formatTableTimes(root = document) {
+    root.querySelectorAll('.time-cell').forEach(cell => {
+        const iso = cell.getAttribute('data-time');
+
+        if (iso) {
+            const date = new Date(iso);
+            const h = date.getHours().toString().padStart(2, '0');
+            const m = date.getMinutes().toString().padStart(2, '0');
+            cell.innerText = `${h}:${m}`;
+        } else {
+            cell.innerText = '-';
+        }
+    });
+}
+
+// Filter Modal Logic
+const modal = document.getElementById('filterModal');
+
+function openFilterModal() {
+    modal.classList.add('active');
+}
+
+function closeFilterModal() {
+    modal.classList.remove('active');
+}
+
+function resetFilters() {
+    document.getElementById('filterText').value = '';
+    document.getElementById('filterDateStart').value = '';
+    document.getElementById('filterDateEnd').value = '';
+    document.getElementById('filterTimeStartBefore').value = '';
+    document.getElementById('filterTimeEndAfter').value = '';
+    applyFilters();
+}
+
+function showTagTasksPopup(tag, tasks, event) {
+    const popup = document.getElementById('tagTasksPopup');
+    const title = document.getElementById('popupTagTitle');
+    const list = document.getElementById('popupTasksList');
+
+    if (!popup || !title || !list) return;
+
+    title.innerHTML = `<span>${tag}</span> <span style="font-size: 0.7rem; color: var(--text-secondary); font-weight: normal;">${tasks.length} ${i18n['tasks']}</span>`;
+    list.innerHTML = '';
+
+    if (tasks && tasks.length > 0) {
+        // De-duplicate tasks by description
+        const uniqueTasksMap = new Map();
+        tasks.forEach(t => {
+            if (!uniqueTasksMap.has(t.description) || t.is_completed) {
+                uniqueTasksMap.set(t.description, t);
+            }
+        });
+        const uniqueTasksList = Array.from(uniqueTasksMap.values());
+
+        uniqueTasksList.slice(0, 10).forEach(t => {
+            const li = document.createElement('li');
+            li.innerHTML = `
+                <span class="task-status" style="color: ${t.is_completed ? 'var(--success)' : 'var(--danger)'}">${t.is_completed ? '✓' : '✗'}</span>
+                <span style="overflow: hidden; text-overflow: ellipsis; white-space: nowrap;">${t.description}</span>
+            `;
+            list.appendChild(li);
+        });
+
+        if (uniqueTasksList.length > 10) {
+            const li = document.createElement('li');
+            li.style.justifyContent = 'center';
+            li.style.color = 'var(--text-secondary)';
+            li.style.fontSize = '0.75rem';
+            li.style.marginTop = '0.25rem';
+            li.textContent = `+ ${uniqueTasksList.length - 10} more...`;
+            list.appendChild(li);
+        }
+    } else {
+        const li = document.createElement('li');
+        li.style.color = 'var(--text-secondary)';
+        li.style.fontStyle = 'italic';
+        li.textContent = 'No tasks';
+        list.appendChild(li);
+    }
+
+    popup.style.display = 'block';
+    popup.style.opacity = '1';
+    updateTagTasksPopupPosition(event);
+}
+
+function updateTagTasksPopupPosition(event) {
+    const popup = document.getElementById('tagTasksPopup');
+    if (!popup || popup.style.display === 'none') return;
+
+    const padding = 15;
+    let x = event.pageX + padding;
+    let y = event.pageY + padding;
+
+    const popupRect = popup.getBoundingClientRect();
+    const viewportWidth = window.innerWidth;
+    const viewportHeight = window.innerHeight;
+
+    // Check right edge
+    if (x + popupRect.width > viewportWidth + window.scrollX) {
+        x = event.pageX - popupRect.width - padding;
+    }
+
+    // Check bottom edge
+    if (y + popupRect.height > viewportHeight + window.scrollY) {
+        y = event.pageY - popupRect.height - padding;
+    }
+
+    popup.style.left = x + 'px';
+    popup.style.top = y + 'px';
+}
+
+function hideTagTasksPopup() {
+    const popup = document.getElementById('tagTasksPopup');
+    if (popup) {
+        popup.style.opacity = '0';
+        setTimeout(() => {
+            if (popup.style.opacity === '0') popup.style.display = 'none';
+        }, 200);
+    }
+}
+
+// Detailed Popup Logic
+
+function showSupertagDetails(group) {
+    const popup = document.getElementById('detailPopup');
+    const title = document.getElementById('detailTitle');
+    const subtitle = document.getElementById('detailSubtitle');
+    const stats = document.getElementById('detailStatsSummary');
+    const tasksList = document.getElementById('detailTasksList');
+    const link = document.getElementById('detailLink');
+
+    title.innerText = group.name;
+    title.style.color = group.color;
+
+    // Subtags list
+    const subtagsStr = group.subtags.map(st => st.tag).join(', ');
+    subtitle.innerText = subtagsStr || 'No tags';
+
+    const hours = Math.floor(group.timeMins / 60);
+    const minutes = Math.round(group.timeMins % 60);
+
+    stats.innerHTML = `
+        <div>
+            <div style="font-size: 0.75rem; color: var(--text-secondary);">${i18n['total_hours']}</div>
+            <div style="font-weight: 600;">${hours}h ${minutes}m</div>
+        </div>
+        <div>
+            <div style="font-size: 0.75rem; color: var(--text-secondary);">${i18n['completion']}</div>
+            <div style="font-weight: 600; color: #fff;">${Math.round(group.completed / group.total * 100 || 0)}%</div>
+        </div>
+        <div>
+            <div style="font-size: 0.75rem; color: var(--text-secondary);">${i18n['tasks']}</div>
+            <div style="font-weight: 600;">${Math.round(group.completed * 10) / 10} / ${Math.round(group.total * 10) / 10}</div>
+        </div>
+    `;
+
+    // Render grouped subtags and their tasks
+    tasksList.innerHTML = '';
+
+    // Sort subtags by time or tasks count? Let's do time.
+    const sortedSubtags = group.subtags.sort((a, b) => b.timeMins - a.timeMins);
+
+    sortedSubtags.forEach(st => {
+        const subSection = document.createElement('div');
+        subSection.className = 'detail-subtag-section';
+
+        const sHours = Math.floor(st.timeMins / 60);
+        const sMins = Math.round(st.timeMins % 60);
+        const sCompleted = st.taskData ? st.taskData.completed : 0;
+        const sTotal = st.taskData ? st.taskData.total : 0;
+
+        subSection.innerHTML = `
+            <div class="detail-subtag-header">
+                <span class="detail-subtag-title" style="color: ${group.color}">${st.tag}</span>
+                <span class="detail-subtag-time">${sHours}h ${sMins}m • ${Math.round(sCompleted * 10) / 10}/${Math.round(sTotal * 10) / 10} ${i18n['tasks']}</span>
+            </div>
+        `;
+
+        const subTaskList = document.createElement('ul');
+        subTaskList.className = 'task-list-detailed';
+        subTaskList.style.marginBottom = '1rem';
+
+        if (st.taskData && st.taskData.tasks && st.taskData.tasks.length > 0) {
+            renderDetailedTasks(st.taskData.tasks, subTaskList, group.color);
+        } else {
+            subTaskList.innerHTML = `<li style="padding: 0.5rem; font-size: 0.8rem; color: var(--text-secondary); opacity: 0.6; font-style: italic;">No specific tasks for this tag</li>`;
+        }
+
+        subSection.appendChild(subTaskList);
+        tasksList.appendChild(subSection);
+    });
+
+    link.style.display = 'none';
+    popup.classList.add('active');
+
+    // Reset scroll position to top
+    const body = popup.querySelector('.detail-body');
+    if (body) body.scrollTop = 0;
+}
+
+function renderDetailedTasks(tasks, container, accentColor) {
+    container.innerHTML = '';
+    if (!tasks || tasks.length === 0) {
+        container.innerHTML = `<li style="color: var(--text-secondary); font-style: italic;">No tasks found</li>`;
+        return;
+    }
+
+    // Group duplicates within this tag
+    const taskMap = new Map();
+    tasks.forEach(t => {
+        const key = t.description;
+        if (!taskMap.has(key)) {
+            taskMap.set(key, { ...t, count: 1 });
+        } else {
+            taskMap.get(key).count++;
+            if (t.is_completed) taskMap.get(key).is_completed = true;
+        }
+    });
+
+    Array.from(taskMap.values()).forEach(t => {
+        const li = document.createElement('li');
+        li.className = 'task-item-detailed';
+
+        // Other tags to show as mini-pills
+        const otherTagsHtml = (t.tags || [])
+            .map(tag => `<span class="mini-tag-badge">${tag}</span>`)
+            .join('');
+
+        li.innerHTML = `
+            <div class="task-detail-status ${t.is_completed ? 'task-detail-completed' : 'task-detail-pending'}">
+                ${t.is_completed ? '✓' : '✗'}
+            </div>
+            <div style="flex: 1; min-width: 0;">
+                <div style="color: var(--text-primary); font-size: 0.95rem; line-height: 1.4;">${t.description}</div>
+                <div style="display: flex; align-items: center; gap: 0.4rem; flex-wrap: wrap; margin-top: 4px;">
+                    ${t.count > 1 ? `<span style="font-size: 0.7rem; color: var(--text-secondary);">${t.count}x</span>` : ''}
+                    ${otherTagsHtml}
+                </div>
+            </div>
+        `;
+        container.appendChild(li);
+    });
+}
+
+function closeDetailPopup() {
+    const popup = document.getElementById('detailPopup');
+    if (popup) popup.classList.remove('active');
+}
+
+// Close on escape
+document.addEventListener('keydown', (e) => {
+    if (e.key === 'Escape') closeDetailPopup();
+});
+
+// Close on click outside card
+document.getElementById('detailPopup').addEventListener('click', (e) => {
+    if (e.target.id === 'detailPopup') closeDetailPopup();
+});
+
+// Session history is loaded page by page as the table is scrolled.
+// Text and date filters are applied by the server, time filters on the loaded rows.
+const historyBody = document.querySelector('.metrics-table tbody');
+const historySentinel = document.getElementById('historySentinel');
+let historyCursor = historySentinel.dataset.nextCursor || null;
+let historyFilters = {};
+let historyLoading = false;
+let historyGeneration = 0;
+
+function getTimeFilters() {
+    return {
+        startTimeBefore: normalizeTimeInput(document.getElementById('filterTimeStartBefore').value), // HH:MM
+        endTimeAfter: normalizeTimeInput(document.getElementById('filterTimeEndAfter').value)      // HH:MM
+    };
+}
+
+function applyTimeFilters(rows) {
+    const { startTimeBefore, endTimeAfter } = getTimeFilters();
+    rows.forEach(row => {
+        // Skip "No sessions" row
+        if (row.cells.length < 2) return;
+
+        // Time cells show HH:MM once formatted, '-' when unset
+        const startCell = row.querySelector('td[data-type="start"]');
+        const endCell = row.querySelector('td[data-type="end"]');
+        const rowStart = startCell && startCell.innerText !== '-' ? startCell.innerText : '';
+        const rowEnd = endCell && endCell.innerText !== '-' ? endCell.innerText : '';
+
+        let show = true;
+        if (startTimeBefore && rowStart && rowStart >= startTimeBefore) show = false;
+        if (endTimeAfter && rowEnd && rowEnd <= endTimeAfter) show = false;
+        row.style.display = show ? '' : 'none';
+    });
+}
+
+async function loadHistoryPage(reset = false) {
+    if (!reset && (historyLoading || !historyCursor)) return;
+    // A reset (new filters) supersedes any page still in flight
+    const generation = reset ? ++historyGeneration : historyGeneration;
+    historyLoading = true;
+    try {
+        const params = new URLSearchParams(historyFilters);
+        if (!reset) params.set('before', historyCursor);
+        const res = await fetch(`/api/sessions/history?${params}`);
+        if (!res.ok || generation !== historyGeneration) return;
+
+        const template = document.createElement('template');
+        template.innerHTML = await res.text();
+        if (generation !== historyGeneration) return;
+        const rows = Array.from(template.content.querySelectorAll('tr'));
+        formatTableTimes(template.content);
+        applyTimeFilters(rows);
+        if (reset) historyBody.replaceChildren();
+        historyBody.append(template.content);
+        historyCursor = res.headers.get('X-Next-Cursor') || null;
+    } finally {
+        if (generation === historyGeneration) historyLoading = false;
+    }
+    if (generation !== historyGeneration) return;
+    // Keep going while the sentinel is still visible (short pages or filtered-out rows)
+    if (historyCursor && isSentinelVisible()) loadHistoryPage();
+}
+
+function isSentinelVisible() {
+    const container = historySentinel.parentElement.getBoundingClientRect();
+    return historySentinel.getBoundingClientRect().top <= container.bottom;
+}
+
+new IntersectionObserver(entries => {
+    if (entries.some(entry => entry.isIntersecting)) loadHistoryPage();
+}, { root: document.querySelector('.session-history-scroll'), rootMargin: '200px' }).observe(historySentinel);
+
+function applyFilters() {
+    const filters = {};
+    const textTerm = document.getElementById('filterText').value.trim();
+    const dateStart = document.getElementById('filterDateStart').value; // YYYY-MM-DD
+    const dateEnd = document.getElementById('filterDateEnd').value;     // YYYY-MM-DD
+    if (textTerm) filters.q = textTerm;
+    if (dateStart) filters.start = dateStart;
+    if (dateEnd) filters.end = dateEnd;
+
+    if (JSON.stringify(filters) !== JSON.stringify(historyFilters)) {
+        historyFilters = filters;
+        loadHistoryPage(true);
+    } else {
+        applyTimeFilters(historyBody.querySelectorAll('tr'));
+    }
+
+    closeFilterModal();
+}
+
+function normalizeTimeInput(value) {
+    if (!value) return null;
+    const trimmed = value.trim();
+    const match = trimmed.match(/^([01]?\d|2[0-3]):([0-5]\d)$/);
+    if (!match) return null;
+    const h = match[1].padStart(2, '0');
+    const m = match[2];
+    return `${h}:${m}`;
+}
+
+function applyTimeMask(input) {
+    input.addEventListener('input', function (e) {
+        let val = e.target.value.replace(/\D/g, '');
+        if (val.length > 4) val = val.slice(0, 4);
+
+        if (val.length >= 2) {
+            let h = val.slice(0, 2);
+            if (parseInt(h) > 23) h = "23";
+            let m = val.slice(2);
+            if (m.length >= 2) {
+                if (parseInt(m) > 59) m = "59";
+                val = h + ":" + m.slice(0, 2);
+            } else if (val.length > 2) {
+                val = h + ":" + m;
+            } else {
+                val = h + ":";
+            }
+        }
+        e.target.value = val;
+    });
+
+    input.addEventListener('keydown', function (e) {
+        if (e.key === 'Backspace' && e.target.value.endsWith(':')) {
+            e.preventDefault();
+            e.target.value = e.target.value.slice(0, -2);
+        }
+    });
+}
+
+applyTimeMask(document.getElementById('filterTimeStartBefore'));
+applyTimeMask(document.getElementById('filterTimeEndAfter'));
+
+// Close modal on outside click
+modal.addEventListener('click', (e) => {
+    if (e.target === modal) closeFilterModal();
+});
+
+formatTableTimes();
+initMetrics();
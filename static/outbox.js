@@ -0,0 +1,126 @@
+// Writes waiting for the server, kept in IndexedDB so they survive a reload or
+// a lost connection. Loaded by the pages (see batchPost() in script.js) and by
+// the service worker, which replays it on background sync.
+//
+// Each record is {seq, id, path, body}, sent to /api/batch oldest first, up to
+// MAX_OPERATIONS per request. The server applies an operation id only once, so
+// sending a record again after a lost answer is harmless.
+const Outbox = (() => {
+    const DB_NAME = 'letempsestcompte';
+    const STORE = 'outbox';
+    const MAX_OPERATIONS = 200; // BATCH_MAX_OPERATIONS in app.py
+
+    let dbPromise = null;
+    let memory = null; // fallback store when IndexedDB is unavailable (e.g. some private modes)
+    let memorySeq = 0;
+
+    function openDb() {
+        if (!dbPromise) {
+            dbPromise = new Promise((resolve, reject) => {
+                const request = indexedDB.open(DB_NAME, 1);
+                request.onupgradeneeded = () => request.result.createObjectStore(STORE, { keyPath: 'seq', autoIncrement: true });
+                request.onsuccess = () => resolve(request.result);
+                request.onerror = () => reject(request.error);
+            }).catch(e => {
+                console.warn('Outbox kept in memory only', e);
+                memory = memory || [];
+                return null;
+            });
+        }
+        return dbPromise;
+    }
+
+    function done(request) {
+        return new Promise((resolve, reject) => {
+            request.onsuccess = () => resolve(request.result);
+            request.onerror = () => reject(request.error);
+        });
+    }
+
+    async function store(mode) {
+        const db = await openDb();
+        return db ? db.transaction(STORE, mode).objectStore(STORE) : null;
+    }
+
+    function newId() {
+        return self.crypto && crypto.randomUUID ? crypto.randomUUID().replace(/-/g, '') : `${Date.now()}${Math.random().toString(16).slice(2)}`;
+    }
+
+    // Returns the record's seq
+    async function add(id, path, body) {
+        const os = await store('readwrite');
+        if (!os) {
+            memory.push({ seq: ++memorySeq, id, path, body });
+            return memorySeq;
+        }
+        return done(os.add({ id, path, body }));
+    }
+
+    async function all() {
+        const os = await store('readonly');
+        return os ? done(os.getAll()) : memory.slice(); // getAll() is ordered by seq
+    }
+
+    async function remove(records) {
+        const os = await store('readwrite');
+        const seqs = new Set(records.map(r => r.seq));
+        if (!os) {
+            memory = memory.filter(r => !seqs.has(r.seq));
+            return;
+        }
+        await Promise.all(records.map(r => done(os.delete(r.seq))));
+    }
+
+    async function count() {
+        const os = await store('readonly');
+        return os ? done(os.count()) : memory.length;
+    }
+
+    function withLock(fn) {
+        // A page and the service worker may flush at the same time
+        return self.navigator && navigator.locks ? navigator.locks.request('outbox', fn) : fn();
+    }
+
+    // Send everything, oldest batch first. onResult(seq, {status, body}) is called
+    // for each operation the server answered. Resolves true once the outbox is
+    // empty, false when the server can't be reached (the rest stays queued).
+    function flush(onResult = () => {}) {
+        return withLock(async () => {
+            let alone = 0; // records to send one by one
+            for (;;) {
+                const records = await all();
+                if (records.length === 0) return true;
+                const group = records.slice(0, alone > 0 ? 1 : MAX_OPERATIONS);
+                alone = Math.max(0, alone - 1);
+
+                let res;
+                try {
+                    res = await fetch('/api/batch', {
+                        method: 'POST',
+                        headers: { 'Content-Type': 'application/json' },
+                        body: JSON.stringify({ operations: group.map(r => ({ id: r.id, path: r.path, body: r.body })) })
+                    });
+                } catch (e) {
+                    return false;
+                }
+                // Down, restarting or waiting for a migration: try again later
+                if (res.status >= 500) return false;
+                const data = await res.json().catch(() => null);
+
+                if (res.ok) {
+                    await remove(group);
+                    group.forEach((r, i) => onResult(r.seq, data.results[i]));
+                } else if (group.length > 1) {
+                    // All or nothing: retry one by one so a single bad edit doesn't drop the others
+                    alone = group.length;
+                } else {
+                    await remove(group);
+                    const results = data && data.results;
+                    onResult(group[0].seq, results && results.length ? results[results.length - 1] : { status: res.status, body: data });
+                }
+            }
+        });
+    }
+
+    return { add, count, flush, newId };
+})();
@@ -84,13 +84,16 @@ async function addTask() {
             description = description.replace(tagMatch[0], '').trim();
         }
 
-        const response = await fetch('/api/task/add', {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({ session_id: SESSION_ID, description: description, tag: tag })
-        });
+        const response = await batchPost('/api/task/add', { session_id: SESSION_ID, description: description, tag: tag }, { immediate: true });
 
-        if (response.ok) {
+        if (response.queued) {
+            // Offline: shown as pending, the page reloads with the real task once it is synced
+            const li = document.createElement('li');
+            li.className = 'task-item pending';
+            li.innerHTML = `<span class="task-text" style="flex: 1;"></span>`;
+            li.querySelector('.task-text').innerText = tag ? `${description} #${tag}` : description;
+            list.appendChild(li);
+        } else if (response.ok) {
             const task = await response.json();
             const li = document.createElement('li');
             li.className = 'task-item';
@@ -128,7 +131,7 @@ async function addTask() {
     input.value = '';
 }
 
-// Tag Menu Logic - No Caching
+// Tag Menu Logic
 async function showTagMenu(btn, taskId) {
     closeTagMenus();
 
@@ -142,7 +145,7 @@ async function showTagMenu(btn, taskId) {
     menu.style.left = (window.scrollX + rect.left) + 'px';
     document.body.appendChild(menu);
 
-    // Fetch tags fresh every time
+    // Revalidated each time: /api/tags answers 304 from its ETag while no tag changed
     let tags = [];
     try {
         const res = await fetch('/api/tags');
@@ -259,12 +262,8 @@ function closeTagMenusOnOutside(e) {
 }
 
 async function addTagToTaskRaw(taskId, tagName) {
-    const res = await fetch('/api/task/add_tag', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ task_id: taskId, tag_name: tagName })
-    });
-    if (res.ok) window.location.reload();
+    const res = await batchPost('/api/task/add_tag', { task_id: taskId, tag_name: tagName }, { immediate: true });
+    if (res.ok && !res.queued) window.location.reload();
 }
 
 async function updateTagColor(tagId, color) {
@@ -288,12 +287,8 @@ async function updateTagName(tagId, name) {
 
 async function removeTag(taskId, tagName) {
     if (!confirm(`Remove tag "${tagName}"?`)) return;
-    const res = await fetch('/api/task/remove_tag', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ task_id: taskId, tag_name: tagName })
-    });
-    if (res.ok) window.location.reload();
+    const res = await batchPost('/api/task/remove_tag', { task_id: taskId, tag_name: tagName }, { immediate: true });
+    if (res.ok && !res.queued) window.location.reload();
 }
 
 async function deleteTag(tagId) {
@@ -319,21 +314,125 @@ async function deleteTag(tagId) {
 }
 
 async function toggleTask(taskId) {
-    const response = await fetch('/api/task/toggle', {
+    // Optimistic: flip now, then settle on the server's answer
+    const li = document.querySelector(`.task-item[data-id="${taskId}"]`);
+    const completed = li.classList.toggle('completed');
+    const response = await batchPost('/api/task/toggle', { task_id: taskId });
+    if (response.queued) return;
+
+    if (response.ok) {
+        const data = await response.json();
+        li.classList.toggle('completed', data.is_completed);
+    } else {
+        li.classList.toggle('completed', !completed);
+    }
+}
+
+// Writes go through the outbox (outbox.js): saved in IndexedDB, then sent to
+// /api/batch, edits made in quick succession together (one request, one
+// transaction). batchPost() resolves with a Response-like {ok, status, json()}
+// once the server answers, or with {ok: true, queued: true} when it can't be
+// reached: the page keeps the edit and the outbox sends it later, from this
+// page, the next one or the service worker's background sync.
+const BATCH_DELAY_MS = 200;
+const OUTBOX_RETRY_MS = 15000;
+const outboxWaiting = new Map(); // seq -> resolve of a batchPost() waiting for the server
+let unsent = []; // operations not handed to flushBatch() yet, for pagehide
+let outboxAdds = Promise.resolve(); // keeps records in call order
+let batchTimer = null;
+let retryTimer = null;
+
+function batchPost(path, body, { immediate = false } = {}) {
+    const operation = { id: Outbox.newId(), path, body };
+    unsent.push(operation);
+    return new Promise(resolve => {
+        outboxAdds = outboxAdds.then(async () => {
+            outboxWaiting.set(await Outbox.add(operation.id, path, body), resolve);
+        }).catch(e => {
+            console.error(e);
+            resolve(batchResult(0, null));
+        });
+        clearTimeout(batchTimer);
+        batchTimer = setTimeout(flushBatch, immediate ? 0 : BATCH_DELAY_MS);
+    });
+}
+
+function batchResult(status, body) {
+    return { ok: status >= 200 && status < 300, status, json: async () => body };
+}
+
+function queuedResult() {
+    return { ok: true, status: 202, queued: true, json: async () => null };
+}
+
+function postJson(path, body) {
+    return fetch(path, {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ task_id: taskId })
+        body: JSON.stringify(body)
     });
+}
 
-    if (response.ok) {
-        const data = await response.json();
-        const li = document.querySelector(`.task-item[data-id="${taskId}"]`);
-        if (data.is_completed) {
-            li.classList.add('completed');
-        } else {
-            li.classList.remove('completed');
-        }
+async function flushBatch() {
+    clearTimeout(batchTimer);
+    batchTimer = null;
+    unsent = [];
+    await outboxAdds;
+    const sent = await Outbox.flush((seq, result) => {
+        const resolve = outboxWaiting.get(seq);
+        outboxWaiting.delete(seq);
+        if (resolve) resolve(batchResult(result.status, result.body));
+    });
+    if (!sent) {
+        // Unreachable: edits stay applied here and queued in the outbox
+        outboxWaiting.forEach(resolve => resolve(queuedResult()));
+        outboxWaiting.clear();
+        clearTimeout(retryTimer);
+        retryTimer = setTimeout(flushBatch, OUTBOX_RETRY_MS);
+        requestBackgroundSync();
     }
+    showOutboxStatus(sent ? 0 : await Outbox.count());
+}
+
+function showOutboxStatus(count) {
+    let el = document.getElementById('outboxStatus');
+    if (!count) {
+        if (el) el.remove();
+        return;
+    }
+    if (!el) {
+        el = document.createElement('div');
+        el.id = 'outboxStatus';
+        el.className = 'outbox-status';
+        document.body.appendChild(el);
+    }
+    const template = (typeof i18n !== 'undefined' && i18n.offline_changes) || 'Offline: {count} change(s) waiting to sync';
+    el.textContent = template.replace('{count}', count);
+}
+
+function requestBackgroundSync() {
+    if (!('serviceWorker' in navigator)) return;
+    navigator.serviceWorker.ready
+        .then(registration => registration.sync && registration.sync.register('outbox'))
+        .catch(() => {}); // not supported: the retry timer and the next page load cover it
+}
+
+// Leaving the page: send what is still waiting for the batch delay. The
+// records stay in the outbox until a flush hears back, and their ids keep the
+// server from applying them twice.
+window.addEventListener('pagehide', () => {
+    if (unsent.length === 0) return;
+    const operations = unsent;
+    unsent = [];
+    navigator.sendBeacon('/api/batch', new Blob([JSON.stringify({ operations })], { type: 'application/json' }));
+});
+
+window.addEventListener('online', flushBatch);
+// Edits left over from an earlier page or a lost connection
+flushBatch();
+
+if ('serviceWorker' in navigator) {
+    navigator.serviceWorker.register('/sw.js').catch(e => console.warn('Service worker not registered', e));
 }
 
 function scheduleAutoRefresh() {
@@ -354,9 +453,41 @@ function scheduleAutoRefresh() {
     const timeUntilNext = (diffMinutes * 60 * 1000) - (seconds * 1000) - ms;
 
     setTimeout(() => {
-        window.location.reload();
+        // Data changes arrive through subscribeChanges(); this only lets pages
+        // redraw what depends on the clock (e.g. a day still in progress)
+        if (typeof window.onAutoRefresh === 'function') {
+            window.onAutoRefresh();
+        }
+        scheduleAutoRefresh();
     }, timeUntilNext);
 }
 
 // Call it to start the cycle
 scheduleAutoRefresh();
+
+// Server-sent change events. handler receives {version, changes: [{entity, id, session_id, op}]},
+// or {version, reset: true} when too much was missed to list.
+function subscribeChanges(handler, since) {
+    const url = since === undefined || since === null ? '/api/events' : `/api/events?since=${since}`;
+    const source = new EventSource(url);
+    source.addEventListener('change', e => handler(JSON.parse(e.data)));
+    source.addEventListener('reset', e => handler({ ...JSON.parse(e.data), reset: true }));
+    return source;
+}
+
+// Reload once the user is not editing anything, so typed input is never lost
+function reloadWhenIdle() {
+    const active = document.activeElement;
+    const editing = active && (active.isContentEditable || ['INPUT', 'TEXTAREA', 'SELECT'].includes(active.tagName));
+    if (!editing) {
+        window.location.reload();
+        return;
+    }
+    // Give the blur's own save request time to go out first
+    active.addEventListener('blur', () => setTimeout(reloadWhenIdle, 1000), { once: true });
+}
+
+// Pages opt in by defining onDataChanged(event) (and DATA_VERSION, the version they were rendered at)
+if (typeof window.onDataChanged === 'function') {
+    subscribeChanges(window.onDataChanged, typeof DATA_VERSION !== 'undefined' ? DATA_VERSION : null);
+}
@@ -0,0 +1,222 @@
+"""Ready-to-plot summary of one Day/Week/Month/Year view of the metrics page.
+
+Everything the page used to work out from the raw sessions is computed
+here, for exactly the window shown:
+
+- bars: one per day (one per month in the year view) with its work
+  segments in hours of the day, pauses cut out. Non-work days show 9-17 and
+  a month bar spans the average start and end of its days.
+- totals: worked minutes (end, or now for today's running session, minus
+  start and pauses), pause and focus minutes.
+- averages: start and end hour and pause minutes of the window's work days.
+- groups: the tag breakdown by color (supertag). Focus minutes are split
+  equally between a task's tags; worked time not covered by focus sessions
+  counts as untagged. time_breakdown and task_breakdown are the two
+  doughnut charts, largest first.
+
+Totals, averages and the month bars of the year view come from the
+interval columns (intervals.py), so a year is summed without loading a
+session object; only the Day/Week/Month views read sessions and pauses for
+their bars. Tag time and task counts come from the DailyTagRollup rows.
+Untagged entries have tag None.
+"""
+import calendar
+from datetime import date, timedelta
+
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+
+from intervals import Intervals
+from models import db, DailySession, DailyTagRollup, Task
+import registry
+
+DEFAULT_TAG_COLOR = '#38bdf8'
+UNTAGGED_COLOR = '#94a3b8'
+# Shown for days off (vacation, sick, ...) and their month averages
+OFF_DAY_HOURS = (9, 17)
+
+def hour(value):
+    """Hour of the day of a datetime, minutes as a fraction (seconds dropped)."""
+    return value.hour + value.minute / 60 if value else None
+
+def work_segments(session, now):
+    """[start, end] hour pairs worked, pauses cut out. A running day ends now."""
+    if not session.start_time:
+        return []
+    if session.status != 'work':
+        return [list(OFF_DAY_HOURS)]
+    start = hour(session.start_time)
+    end = hour(session.end_time) if session.end_time else hour(now)
+
+    pauses = sorted((hour(p.start_time), hour(p.end_time)) for p in session.pauses
+                    if p.start_time and start <= hour(p.start_time) <= end)
+    segments = []
+    current = start
+    for pause_start, pause_end in pauses:
+        if pause_start > current:
+            segments.append([current, pause_start])
+        # A pause still running (or past the end) closes the day
+        current = pause_end if pause_end is not None and pause_end <= end else end + 1
+    if end > current:
+        segments.append([current, end])
+    return segments
+
+def month_average(days):
+    """[[average start, average end]] of a month's days (SessionFigures), [] when none has both."""
+    bounds = [OFF_DAY_HOURS if d.status != 'work' else (d.start_hour, d.end_hour) for d in days]
+    bounds = [(start, end) for start, end in bounds if start is not None and end is not None]
+    if not bounds:
+        return []
+    return [[sum(start for start, _ in bounds) / len(bounds), sum(end for _, end in bounds) / len(bounds)]]
+
+def _first_by_date(sessions):
+    """date -> its first session (by id), the one a bar shows."""
+    by_date = {}
+    for session in sorted(sessions, key=lambda s: (s.date, s.id)):
+        by_date.setdefault(session.date, session)
+    return by_date
+
+def _month_bars(year, figures, now):
+    today = now.date()
+    by_date = _first_by_date(figures)
+    bars = []
+    for month in range(1, 13):
+        first = date(year, month, 1)
+        days = calendar.monthrange(first.year, month)[1]
+        sessions = [by_date[first + timedelta(days=i)] for i in range(days) if first + timedelta(days=i) in by_date]
+        bars.append({
+            'date': first.isoformat(),
+            'session_id': None,
+            'status': 'work',
+            'segments': month_average(sessions),
+            'today': (today.year, today.month) == (first.year, month),
+        })
+    return bars
+
+def _day_bars(start_date, end_date, now):
+    today = now.date()
+    sessions = (DailySession.query.options(selectinload(DailySession.pauses))
+                .filter(DailySession.date >= start_date, DailySession.date <= end_date))
+    by_date = _first_by_date(sessions)
+    bars = []
+    day = start_date
+    while day <= end_date:
+        session = by_date.get(day)
+        bars.append({
+            'date': day.isoformat(),
+            'session_id': session.id if session else None,
+            'status': session.status if session else None,
+            'segments': work_segments(session, now) if session else [],
+            'today': day == today,
+        })
+        day += timedelta(days=1)
+    return bars
+
+def _tag_groups(tag_rows, untagged_minutes, tasks_by_tag):
+    """Color groups of the tag breakdown, most focus time first."""
+    tags_by_id = {t.id: t for t in registry.tags()}
+    per_tag = {}
+    for tag_id, focus, task_total, task_completed in tag_rows:
+        info = tags_by_id.get(tag_id)
+        if tag_id is not None and info is None:
+            continue  # deleted since the rollup was written
+        entry = per_tag.setdefault(tag_id, {'minutes': 0, 'task_total': 0, 'task_completed': 0})
+        entry['minutes'] += focus
+        entry['task_total'] += task_total
+        entry['task_completed'] += task_completed
+    if untagged_minutes > 0:
+        per_tag.setdefault(None, {'minutes': 0, 'task_total': 0, 'task_completed': 0})['minutes'] += untagged_minutes
+
+    groups = {}
+    for tag_id, entry in per_tag.items():
+        info = tags_by_id.get(tag_id)
+        color = (info.color or DEFAULT_TAG_COLOR) if info else UNTAGGED_COLOR
+        supertag = registry.supertag_by_color(color)
+        group = groups.setdefault(color, {
+            'color': color,
+            'name': supertag.name if supertag else color,
+            'minutes': 0,
+            'task_total': 0,
+            'task_completed': 0,
+            'tags': [],
+        })
+        group['minutes'] += entry['minutes']
+        group['task_total'] += entry['task_total']
+        group['task_completed'] += entry['task_completed']
+        tag = {'tag': info.name if info else None, **entry}
+        if tasks_by_tag is not None:
+            tag['tasks'] = tasks_by_tag.get(tag_id, [])
+        group['tags'].append(tag)
+
+    for group in groups.values():
+        group['minutes'] = round(group['minutes'], 2)
+        group['tags'].sort(key=lambda t: -t['minutes'])
+        for tag in group['tags']:
+            tag['minutes'] = round(tag['minutes'], 2)
+    return sorted(groups.values(), key=lambda g: -g['minutes'])
+
+def _tasks_by_tag(start_date, end_date):
+    """tag id (None for untagged) -> tasks of the window carrying it, for the breakdown popups."""
+    tasks = (Task.query.join(DailySession)
+             .filter(DailySession.date >= start_date, DailySession.date <= end_date)
+             .options(selectinload(Task.tags))
+             .order_by(DailySession.date, Task.order))
+    by_tag = {}
+    for task in tasks:
+        entry = {'description': task.description, 'is_completed': task.is_completed,
+                 'tags': [t.name for t in task.tags]}
+        for tag_id in [t.id for t in task.tags] or [None]:
+            by_tag.setdefault(tag_id, []).append(entry)
+    return by_tag
+
+def build_summary(view, start_date, end_date, now, include_tasks=False):
+    """Summary of the view covering start_date..end_date, as of `now` (naive local time)."""
+    intervals = Intervals.load(start_date, end_date)
+    # Today's running session counts until now
+    figures = intervals.sessions(whole=False, now=now)
+    work = sum(f.work for f in figures)
+    pause = sum(f.pause for f in figures)
+    worked = [f for f in figures if f.status == 'work' and f.start_hour is not None and f.end_hour is not None]
+    starts = [f.start_hour for f in worked]
+    ends = [f.end_hour for f in worked]
+    day_pauses = [f.pause for f in worked]
+
+    tag_rows = db.session.execute(
+        select(DailyTagRollup.tag_id, DailyTagRollup.focus_minutes,
+               DailyTagRollup.task_total, DailyTagRollup.task_completed)
+        .where(DailyTagRollup.date >= start_date, DailyTagRollup.date <= end_date)
+    ).all()
+    focus = sum(row.focus_minutes for row in tag_rows)
+    groups = _tag_groups(tag_rows, max(work - focus, 0),
+                         _tasks_by_tag(start_date, end_date) if include_tasks else None)
+
+    def average(values):
+        return round(sum(values) / len(values), 4) if values else None
+
+    return {
+        'view': view,
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        # Month bars average the days' recorded ends, not now
+        'bars': (_month_bars(start_date.year, intervals.sessions(whole=False), now) if view == 'year'
+                 else _day_bars(start_date, end_date, now)),
+        'totals': {
+            'sessions': len(intervals),
+            'work_minutes': round(work, 2),
+            'pause_minutes': round(pause, 2),
+            'focus_minutes': round(focus, 2),
+            'untagged_minutes': round(max(work - focus, 0), 2),
+        },
+        'averages': {
+            'days': len(starts),
+            'start_hour': average(starts),
+            'end_hour': average(ends),
+            'pause_minutes': round(sum(day_pauses) / len(day_pauses), 2) if day_pauses else None,
+        },
+        'groups': groups,
+        'time_breakdown': [{'color': g['color'], 'name': g['name'], 'minutes': g['minutes']}
+                           for g in groups if g['minutes'] > 0],
+        'task_breakdown': sorted(({'color': g['color'], 'name': g['name'], 'task_total': g['task_total'],
+                                   'task_completed': g['task_completed']} for g in groups if g['task_total'] > 0),
+                                 key=lambda g: -g['task_total']),
+    }
@@ -0,0 +1,91 @@
+// Service worker, rendered by pwa.py. See its docstring for the caching rules.
+const VERSION = {{ version|tojson }};
+const SHELL = {{ shell|tojson }};
+const SHELL_CACHE = `shell-${VERSION}`;
+const PAGES_CACHE = 'pages';
+const DATA_CACHE = 'metrics-data';
+const MAX_PAGES = 30;
+const MAX_DATA = 30;
+
+importScripts({{ outbox_url|tojson }});
+
+self.addEventListener('install', event => {
+    event.waitUntil((async () => {
+        const cache = await caches.open(SHELL_CACHE);
+        // One missing file shouldn't keep the worker from installing
+        await Promise.all(SHELL.map(url => cache.add(url).catch(e => console.warn('Not cached', url, e))));
+        const pages = await caches.open(PAGES_CACHE);
+        await pages.add('/').catch(() => {});
+        await self.skipWaiting();
+    })());
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil((async () => {
+        const names = await caches.keys();
+        await Promise.all(names.filter(name => name.startsWith('shell-') && name !== SHELL_CACHE).map(name => caches.delete(name)));
+        await self.clients.claim();
+    })());
+});
+
+async function trim(cache, max) {
+    const keys = await cache.keys();
+    // Oldest first
+    await Promise.all(keys.slice(0, Math.max(0, keys.length - max)).map(key => cache.delete(key)));
+}
+
+// Network first, keeping a copy; the copy when offline
+async function networkFirst(request, cacheName, max, fallbackUrl) {
+    const cache = await caches.open(cacheName);
+    try {
+        const response = await fetch(request);
+        if (response.ok && !response.redirected) {
+            await cache.put(request, response.clone());
+            await trim(cache, max);
+        }
+        return response;
+    } catch (e) {
+        const cached = await cache.match(request) || (fallbackUrl && await cache.match(fallbackUrl));
+        if (cached) return cached;
+        throw e;
+    }
+}
+
+// Fingerprinted files never change: the cache first
+async function cacheFirst(request) {
+    const cache = await caches.open(SHELL_CACHE);
+    const cached = await cache.match(request);
+    if (cached) return cached;
+    const response = await fetch(request);
+    if (response.ok || response.type === 'opaque') await cache.put(request, response.clone());
+    return response;
+}
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    if (request.method !== 'GET') return;
+    const url = new URL(request.url);
+
+    if (url.origin !== self.location.origin) {
+        // CDN scripts and fonts
+        event.respondWith(cacheFirst(request));
+    } else if (request.mode === 'navigate') {
+        event.respondWith(networkFirst(request, PAGES_CACHE, MAX_PAGES, '/'));
+    } else if (url.pathname === '/api/metrics/data' || url.pathname === '/api/metrics/summary') {
+        event.respondWith(networkFirst(request, DATA_CACHE, MAX_DATA));
+    } else if (url.pathname.startsWith('/assets/') || url.pathname.startsWith('/i18n/')) {
+        event.respondWith(cacheFirst(request));
+    } else if (url.pathname.startsWith('/static/')) {
+        // Unversioned: fresh when online
+        event.respondWith(networkFirst(request, SHELL_CACHE, Infinity));
+    }
+    // Anything else (other API calls, /api/events) goes to the network as usual
+});
+
+self.addEventListener('sync', event => {
+    if (event.tag !== 'outbox') return;
+    // Rejecting makes the browser try again later
+    event.waitUntil(Outbox.flush().then(sent => {
+        if (!sent) throw new Error('Server unreachable');
+    }));
+});
@@ -45,6 +45,7 @@ TRANSLATIONS = {
         'failed_update': 'Failed to update time',
         'discard_changes': 'Discard Changes',
         'confirm_discard': 'Are you sure you want to discard all changes made during this session and return to metrics?',
+        'offline_changes': 'Offline: {count} change(s) waiting to sync',
         'modification_mode': 'Modification Mode',
         'working_time': 'Working Time',
         'hour_of_day': 'Hour of Day',
@@ -70,6 +71,8 @@ TRANSLATIONS = {
         'task_report_radio': 'Task Report',
         'time_report_radio': 'Time Report (incl. pauses)',
         'generate_pdf': 'Generate PDF',
+        'generating_pdf': 'Generating…',
+        'failed_generate_pdf': 'Failed to generate the report',
         'from': 'From',
         'to': 'To',
         'set_intention': 'Set your intention for the day.',
@@ -208,6 +211,7 @@ TRANSLATIONS = {
         'failed_update': 'Aktualisieren der Zeit fehlgeschlagen',
         'discard_changes': 'Änderungen verwerfen',
         'confirm_discard': 'Sind Sie sicher, dass Sie alle während dieser Sitzung vorgenommenen Änderungen verwerfen und zu den Metriken zurückkehren möchten?',
+        'offline_changes': 'Offline: {count} Änderung(en) warten auf Synchronisierung',
         'modification_mode': 'Änderungsmodus',
         'working_time': 'Arbeitszeit',
         'hour_of_day': 'Tageszeit',
@@ -233,6 +237,8 @@ TRANSLATIONS = {
         'task_report_radio': 'Aufgabenbericht',
         'time_report_radio': 'Zeiterfassungsbericht (inkl. Pausen)',
         'generate_pdf': 'PDF erzeugen',
+        'generating_pdf': 'Wird erstellt…',
+        'failed_generate_pdf': 'Bericht konnte nicht erstellt werden',
         'from': 'Von',
         'to': 'Bis',
         'set_intention': 'Setzen Sie Ihre Absicht für den Tag.',
@@ -371,6 +377,7 @@ TRANSLATIONS = {
         'failed_update': 'Échec de la mise à jour',
         'discard_changes': 'Annuler les modifications',
         'confirm_discard': 'Êtes-vous sûr de vouloir annuler tous les changements effectués durant cette session et revenir aux statistiques ?',
+        'offline_changes': 'Hors ligne : {count} modification(s) en attente de synchronisation',
         'modification_mode': 'Mode Modification',
         'working_time': 'Temps de travail',
         'hour_of_day': 'Heure du jour',
@@ -396,6 +403,8 @@ TRANSLATIONS = {
         'task_report_radio': 'Rapport de tâches',
         'time_report_radio': 'Rapport de temps (pauses incl.)',
         'generate_pdf': 'Générer PDF',
+        'generating_pdf': 'Génération…',
+        'failed_generate_pdf': 'Échec de la génération du rapport',
         'from': 'De',
         'to': 'À',
         'set_intention': 'Définissez votre intention pour la journée.',
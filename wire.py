@@ -0,0 +1,95 @@
+"""Compact columnar encoding of the metrics payload.
+
+Instead of one object per session with nested pauses, tasks and focus
+sessions, each entity becomes a table of parallel arrays. Tag names are
+interned into one list and referenced by index, focus sessions reference
+their task by id instead of repeating its name and tags, and datetimes are
+epoch seconds. Datetimes are stored naive (local wall-clock time), so they
+are encoded as if they were UTC and the client decodes them the same way.
+
+The same structure is served as JSON or, when the optional `msgpack`
+package is installed, as MessagePack.
+"""
+import calendar
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+COLUMNAR_JSON = 'application/vnd.letempsestcompte.columnar+json'
+MSGPACK = 'application/x-msgpack'
+FORMAT_VERSION = 1
+
+def epoch(value):
+    """Seconds since the epoch for a naive datetime or date, read as UTC."""
+    if value is None:
+        return None
+    return calendar.timegm(value.timetuple())
+
+def encode_columnar(sessions, durations):
+    """Columnar tables for sessions loaded by metrics_sessions_query().
+
+    durations maps each focus session id to its worked minutes (see intervals.py).
+    """
+    tags = []
+    tag_index = {}
+    def intern_tags(task):
+        indexes = []
+        for tag in task.tags:
+            if tag.name not in tag_index:
+                tag_index[tag.name] = len(tags)
+                tags.append(tag.name)
+            indexes.append(tag_index[tag.name])
+        return indexes
+
+    columns = {
+        'sessions': {'id': [], 'date': [], 'status': [], 'start': [], 'end': []},
+        'pauses': {'id': [], 'session': [], 'start': [], 'end': []},
+        'tasks': {'id': [], 'session': [], 'description': [], 'completed': [], 'tags': []},
+        'focus': {'id': [], 'session': [], 'task': [], 'start': [], 'end': [], 'duration': []},
+    }
+    sessions_col, pauses_col = columns['sessions'], columns['pauses']
+    tasks_col, focus_col = columns['tasks'], columns['focus']
+    seen_tasks = set()
+
+    def add_task(task):
+        if task.id in seen_tasks:
+            return
+        seen_tasks.add(task.id)
+        tasks_col['id'].append(task.id)
+        tasks_col['session'].append(task.session_id)
+        tasks_col['description'].append(task.description)
+        tasks_col['completed'].append(1 if task.is_completed else 0)
+        tasks_col['tags'].append(intern_tags(task))
+
+    for s in sessions:
+        sessions_col['id'].append(s.id)
+        sessions_col['date'].append(epoch(s.date))
+        sessions_col['status'].append(s.status)
+        sessions_col['start'].append(epoch(s.start_time))
+        sessions_col['end'].append(epoch(s.end_time))
+        for p in s.pauses:
+            pauses_col['id'].append(p.id)
+            pauses_col['session'].append(s.id)
+            pauses_col['start'].append(epoch(p.start_time))
+            pauses_col['end'].append(epoch(p.end_time))
+        for task in s.tasks:
+            add_task(task)
+
+    for s in sessions:
+        for fs in s.focus_sessions:
+            # The task may belong to a day outside the payload
+            if fs.task:
+                add_task(fs.task)
+            focus_col['id'].append(fs.id)
+            focus_col['session'].append(fs.session_id)
+            focus_col['task'].append(fs.task_id)
+            focus_col['start'].append(epoch(fs.start_time))
+            focus_col['end'].append(epoch(fs.end_time))
+            focus_col['duration'].append(durations[fs.id])
+
+    return {'format': 'columnar', 'version': FORMAT_VERSION, 'tags': tags, **columns}
+
+def pack(payload):
+    return msgpack.packb(payload, use_bin_type=True)